@@ -1,14 +1,26 @@
-import csv
+import hashlib
+import importlib
+import io
+import json
 import logging
 import os
-import subprocess
 from functools import wraps
 from pathlib import Path
 
 import pandas as pd
-from flask import (Flask, flash, redirect, render_template,
+from flask import (Flask, flash, jsonify, redirect, render_template,
                    request, send_file, session, url_for)
 
+import comment_index
+import export_data as exporter
+import jobs
+import model_store
+import rollup
+import run_all
+import storage
+from export_pdf import cache_key as pdf_cache_key, generate_pdf
+from text_clean import clean_texts
+
 # ── Konfigurasi ───────────────────────────────────────────────────────────────
 
 app = Flask(__name__)
@@ -22,11 +34,11 @@ app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-ganti-sebelum-deploy")
 ADMIN_USER = os.environ.get("ADMIN_USER", "admin")
 ADMIN_PASS = os.environ.get("ADMIN_PASS", "admin123")
 
-# Path data — semua file CSV berada di dalam folder ini
+# Path data — sumber data utama ada di storage.HASIL_PARQUET
 DATA_DIR = Path(__file__).parent / "data"
-HASIL_CSV   = DATA_DIR / "hasil.csv"
-LAPORAN_CSV = DATA_DIR / "laporan.csv"
-LAPORAN_PDF = Path(__file__).parent / "laporan.pdf"
+
+# Jumlah komentar maksimum per request /api/classify
+CLASSIFY_MAX_BATCH = int(os.environ.get("CLASSIFY_MAX_BATCH", "500"))
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 
@@ -49,26 +61,87 @@ def login_required(f):
     return decorated
 
 
-def load_csv() -> pd.DataFrame:
+def api_login_required(f):
+    """Decorator untuk endpoint JSON: balas 401 (bukan redirect) jika belum login."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not session.get("logged_in"):
+            return jsonify(error="Autentikasi diperlukan."), 401
+        return f(*args, **kwargs)
+    return decorated
+
+
+def data_etag(*parts) -> str:
     """
-    Baca hasil.csv dengan penanganan error yang jelas.
-    Kembalikan DataFrame kosong jika file tidak ada / rusak.
+    ETag untuk respons yang hanya bergantung pada versi data + parameter request
+    (parts). Dihitung dari stat file data, tanpa membaca isi data.
     """
-    if not HASIL_CSV.exists():
-        logger.warning("File CSV tidak ditemukan: %s", HASIL_CSV)
-        return pd.DataFrame(columns=["tanggal", "platform", "sentimen", "komentar", "likes"])
+    key = json.dumps([storage.data_version(), *parts], default=str)
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def not_modified(etag: str):
+    """Respons 304 jika klien sudah punya versi etag (If-None-Match), selain itu None."""
+    if not request.if_none_match.contains(etag):
+        return None
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
 
+def sentiment_summary(platform: str | None = None, sentimen: str | None = None) -> dict:
+    """Jumlah komentar per sentimen dari agregat harian (O(hari), bukan O(komentar))."""
+    counts  = rollup.load(platform=platform, sentimen=sentimen).groupby("sentimen", observed=True)["n"].sum()
+    summary = {label: int(counts.get(label, 0)) for label in ("positif", "netral", "negatif")}
+    summary["total"] = sum(summary.values())
+    return summary
+
+
+# Antrian job background (update pipeline, scraping) — satu per proses web
+_job_queue = jobs.JobQueue()
+
+
+def _wants_json() -> bool:
+    """True jika klien (fetch dari dashboard) meminta balasan JSON."""
+    return request.accept_mimetypes.best == "application/json"
+
+
+def _scraper_job(module_name: str):
+    """Fungsi job yang menjalankan run_scraper() dari modul scraper."""
+    def run(cancel):
+        return importlib.import_module(module_name).run_scraper()
+    return run
+
+
+def _submit_job(key: str, label: str, func):
+    """
+    Masukkan job ke antrian & langsung balas: JSON 202 berisi status job untuk
+    fetch, atau flash + redirect ke dashboard untuk form biasa.
+    """
     try:
-        df = pd.read_csv(HASIL_CSV)
-        # Normalisasi kolom sentimen & platform ke huruf kecil agar filter konsisten
-        if "sentimen" in df.columns:
-            df["sentimen"] = df["sentimen"].str.lower().str.strip()
-        if "platform" in df.columns:
-            df["platform"] = df["platform"].str.strip()
-        return df
-    except Exception as exc:
-        logger.error("Gagal membaca CSV: %s", exc)
-        return pd.DataFrame(columns=["tanggal", "platform", "sentimen", "komentar", "likes"])
+        job, coalesced = _job_queue.submit(key, label, func)
+    except jobs.QueueFull as exc:
+        logger.warning("%s ditolak: %s", label, exc)
+        if _wants_json():
+            return jsonify(error=str(exc)), 503
+        flash(f"❌ {exc}. Coba lagi nanti.", "error")
+        return redirect(url_for("dashboard"))
+
+    logger.info(
+        "%s diminta oleh %s → job %s%s",
+        label, session.get("username"), job.id, " (digabung)" if coalesced else "",
+    )
+    if _wants_json():
+        return jsonify(
+            job=job.to_dict(),
+            coalesced=coalesced,
+            status_url=url_for("job_status", job_id=job.id),
+        ), 202
+
+    status = "sudah berjalan" if coalesced else "dimulai di background"
+    flash(f"⏳ {label} {status} (job {job.id}).", "info")
+    return redirect(url_for("dashboard"))
 
 # ── Routes ────────────────────────────────────────────────────────────────────
 
@@ -112,26 +185,24 @@ def logout():
 @login_required
 def dashboard():
     """Halaman utama dashboard dengan filter platform & sentimen."""
-    df = load_csv()
-
     platform_filter = request.args.get("platform", "all")
     sentimen_filter = request.args.get("sentimen", "all")
 
-    # Terapkan filter hanya jika bukan 'all'
-    if platform_filter != "all":
-        df = df[df["platform"].str.lower() == platform_filter.lower()]
-    if sentimen_filter != "all":
-        df = df[df["sentimen"] == sentimen_filter.lower()]
-
-    positif = int((df["sentimen"] == "positif").sum())
-    netral  = int((df["sentimen"] == "netral").sum())
-    negatif = int((df["sentimen"] == "negatif").sum())
+    # Filter hanya jika bukan 'all'
+    try:
+        summary = sentiment_summary(
+            platform=None if platform_filter == "all" else platform_filter,
+            sentimen=None if sentimen_filter == "all" else sentimen_filter,
+        )
+    except Exception as exc:
+        logger.error("Gagal membaca agregat: %s", exc)
+        summary = {"positif": 0, "netral": 0, "negatif": 0}
 
     return render_template(
         "dashboard.html",
-        positif=positif,
-        netral=netral,
-        negatif=negatif,
+        positif=summary["positif"],
+        netral=summary["netral"],
+        negatif=summary["negatif"],
         platform_filter=platform_filter,
         sentimen_filter=sentimen_filter,
     )
@@ -140,133 +211,301 @@ def dashboard():
 @app.route("/detail")
 @login_required
 def detail():
-    """Halaman tabel detail semua komentar."""
-    df = load_csv()
-    records = df.to_dict(orient="records")
-    return render_template("detail.html", data=records)
+    """Halaman tabel detail komentar — baris diambil per halaman lewat /api/comments."""
+    return render_template(
+        "detail.html",
+        per_page=comment_index.PER_PAGE_DEFAULT,
+        default_sort=comment_index.DEFAULT_SORT,
+    )
 
 
-@app.route("/export/csv")
+@app.route("/export/<fmt>")
 @login_required
-def export_csv():
-    """Ekspor data sebagai file CSV."""
-    df = load_csv()
+def export_data(fmt: str):
+    """
+    Ekspor data dalam format fmt: csv, csv.gz, ndjson, arrow (Arrow IPC stream)
+    atau parquet (lihat export_data.FORMATS). /export/pdf ditangani terpisah.
+
+    Query : platform, sentimen (filter dashboard; kosong / "all" = semua),
+            kolom (dipisah koma, default semua kolom)
 
-    if df.empty:
+    Format selain Parquet di-stream per batch: byte pertama langsung dikirim
+    dan memori sebanding dengan ukuran batch. Parquet dikirim dari file cache
+    per (versi data, filter, kolom).
+    """
+    if fmt not in exporter.FORMATS:
+        flash(f"Format ekspor tidak dikenal: {fmt}", "error")
+        return redirect(url_for("dashboard"))
+    if not storage.exists():
         flash("Tidak ada data untuk diekspor.", "warning")
         return redirect(url_for("dashboard"))
 
+    platform = request.args.get("platform", "all")
+    sentimen = request.args.get("sentimen", "all")
+    platform = None if platform in ("", "all") else platform
+    sentimen = None if sentimen in ("", "all") else sentimen
     try:
-        df.to_csv(LAPORAN_CSV, index=False, quoting=csv.QUOTE_ALL)
-        logger.info("Ekspor CSV oleh: %s", session.get("username"))
+        columns = exporter.parse_columns(request.args.get("kolom"))
+    except ValueError as exc:
+        flash(str(exc), "error")
+        return redirect(url_for("dashboard"))
+
+    spec = exporter.FORMATS[fmt]
+    logger.info("Ekspor %s oleh: %s", fmt, session.get("username"))
+
+    if spec["cached"]:
+        try:
+            path = exporter.cached_parquet(columns, platform, sentimen)
+        except Exception as exc:
+            logger.error("Gagal ekspor %s: %s", fmt, exc)
+            flash(f"Gagal mengekspor {fmt.upper()}. Coba lagi.", "error")
+            return redirect(url_for("dashboard"))
         return send_file(
-            str(LAPORAN_CSV),
+            str(path),
             as_attachment=True,
-            download_name="laporan_sentimen_jkt48.csv",
-            mimetype="text/csv",
+            download_name=exporter.filename(fmt),
+            mimetype=spec["mimetype"],
         )
+
+    chunks = exporter.stream(fmt, columns, platform, sentimen)
+    try:
+        # Error membuka data muncul di sini, sebelum respons dikirim. Filter
+        # tanpa baris yang cocok tetap ekspor yang valid (NDJSON kosong)
+        first = next(chunks, b"")
     except Exception as exc:
-        logger.error("Gagal ekspor CSV: %s", exc)
-        flash("Gagal mengekspor CSV. Coba lagi.", "error")
+        logger.error("Gagal ekspor %s: %s", fmt, exc)
+        flash(f"Gagal mengekspor {fmt.upper()}. Coba lagi.", "error")
         return redirect(url_for("dashboard"))
 
+    def generate():
+        yield first
+        try:
+            yield from chunks
+        except Exception as exc:
+            # Status 200 sudah terkirim — hanya bisa dicatat; unduhan akan terpotong
+            logger.error("Ekspor %s terhenti di tengah jalan: %s", fmt, exc)
+            raise
+
+    return app.response_class(
+        generate(),
+        mimetype=spec["mimetype"],
+        headers={
+            "Content-Disposition": f'attachment; filename="{exporter.filename(fmt)}"',
+            "X-Accel-Buffering":   "no",     # jangan ditahan proxy (nginx) sampai selesai
+        },
+    )
+
 
 @app.route("/export/pdf")
 @login_required
 def export_pdf():
-    """Ekspor laporan sebagai PDF."""
-    # Jalankan script generator PDF secara terpisah (bukan import dinamis)
-    try:
-        result = subprocess.run(
-            ["python", "export_pdf.py"],
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
-        logger.info("PDF berhasil di-generate: %s", result.stdout.strip())
-    except subprocess.TimeoutExpired:
-        logger.error("Timeout saat generate PDF")
-        flash("Gagal membuat PDF: proses terlalu lama.", "error")
-        return redirect(url_for("dashboard"))
-    except subprocess.CalledProcessError as exc:
-        logger.error("Error generate PDF: %s", exc.stderr)
-        flash("Gagal membuat PDF. Lihat log untuk detail.", "error")
-        return redirect(url_for("dashboard"))
+    """
+    Ekspor laporan sebagai PDF. Dirender di proses ini (export_pdf.generate_pdf)
+    dan di-cache per versi data + file grafik, sehingga unduhan berulang
+    langsung dilayani dari memori.
+    """
+    key = pdf_cache_key()
+    cached = not_modified(key)
+    if cached is not None:
+        return cached
 
-    if not LAPORAN_PDF.exists():
-        flash("File PDF tidak ditemukan setelah proses selesai.", "error")
+    pdf = generate_pdf()
+    if pdf is None:
+        flash("Gagal membuat PDF. Lihat log untuk detail.", "error")
         return redirect(url_for("dashboard"))
 
     logger.info("Ekspor PDF oleh: %s", session.get("username"))
-    return send_file(
-        str(LAPORAN_PDF),
+    response = send_file(
+        io.BytesIO(pdf),
         as_attachment=True,
         download_name="laporan_sentimen_jkt48.pdf",
         mimetype="application/pdf",
+        etag=key,
     )
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @app.route("/update-data")
 @login_required
 def update_data():
-    """Jalankan ulang seluruh pipeline pengumpulan & analisis data."""
-    try:
-        result = subprocess.run(
-            ["python", "run_all.py"],
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=300,          # maks 5 menit
-        )
-        logger.info("Update data berhasil oleh %s:\n%s",
-                    session.get("username"), result.stdout)
-        flash("✅ Data berhasil diperbarui.", "success")
-    except subprocess.TimeoutExpired:
-        logger.error("Update data timeout")
-        flash("❌ Update data timeout (> 5 menit). Coba jalankan run_all.py manual.", "error")
-    except subprocess.CalledProcessError as exc:
-        logger.error("Update data gagal:\n%s", exc.stderr)
-        flash(f"❌ Gagal update data: {exc.stderr[:300]}", "error")
-
-    return redirect(url_for("dashboard"))
+    """Jalankan ulang seluruh pipeline pengumpulan & analisis data (background job)."""
+    return _submit_job("pipeline", "Update data", run_all.main)
 
 
 @app.route("/scrape", methods=["POST"])
 @login_required
 def scrape():
-    """Ambil data baru dari platform yang dipilih."""
+    """Ambil data baru dari platform yang dipilih (background job)."""
     platform = request.form.get("platform", "semua")
 
-    # Whitelist platform yang valid
-    ALLOWED_PLATFORMS = {"twitter", "instagram", "semua"}
-    if platform not in ALLOWED_PLATFORMS:
+    # Whitelist platform yang valid → (key coalescing, label, fungsi job)
+    job_map = {
+        "twitter":   ("scrape:twitter",   "Scraping Twitter/X", _scraper_job("scrape_twitter")),
+        "instagram": ("scrape:instagram", "Scraping Instagram", _scraper_job("scrape_instagram")),
+        "semua":     ("pipeline",         "Update data",        run_all.main),
+    }
+    if platform not in job_map:
+        if _wants_json():
+            return jsonify(error="Platform tidak valid."), 400
         flash("Platform tidak valid.", "error")
         return redirect(url_for("dashboard"))
 
-    script_map = {
-        "twitter":   ["python", "scraper_twitter.py"],
-        "instagram": ["python", "scraper_instagram.py"],
-        "semua":     ["python", "run_all.py"],
-    }
+    return _submit_job(*job_map[platform])
+
+
+@app.route("/jobs")
+@api_login_required
+def job_list():
+    """Daftar job background terbaru."""
+    return jsonify(jobs=[job.to_dict() for job in _job_queue.recent()])
+
+
+@app.route("/jobs/<job_id>")
+@api_login_required
+def job_status(job_id):
+    """Status satu job background (untuk polling)."""
+    job = _job_queue.get(job_id)
+    if job is None:
+        return jsonify(error="Job tidak ditemukan."), 404
+    return jsonify(job=job.to_dict())
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+@api_login_required
+def job_cancel(job_id):
+    """Batalkan job yang masih antri / berjalan."""
+    job = _job_queue.get(job_id)
+    if job is None:
+        return jsonify(error="Job tidak ditemukan."), 404
+    if not _job_queue.cancel(job_id):
+        return jsonify(error="Job sudah selesai.", job=job.to_dict()), 409
+    logger.info("Job %s dibatalkan oleh %s", job_id, session.get("username"))
+    return jsonify(job=job.to_dict()), 202
+
+
+# ── API ───────────────────────────────────────────────────────────────────────
+
+@app.route("/api/classify", methods=["POST"])
+@api_login_required
+def api_classify():
+    """
+    Klasifikasi sentimen satu batch komentar dengan model aktif.
+
+    Request : {"komentar": ["teks 1", "teks 2", ...]}
+    Response: {"model": "<versi>", "hasil": [{"sentimen": "positif",
+               "probabilitas": {"negatif": 0.1, "netral": 0.2, "positif": 0.7}}, ...]}
+
+    Model dimuat sekali per proses worker (model_store.get_model) dan
+    preprocessing memakai clean_texts yang sama dengan pipeline batch.
+    """
+    payload  = request.get_json(silent=True) or {}
+    comments = payload.get("komentar")
+
+    if not isinstance(comments, list) or not all(isinstance(c, str) for c in comments):
+        return jsonify(error="Field 'komentar' harus berupa list string."), 400
+    if not comments:
+        return jsonify(error="Field 'komentar' tidak boleh kosong."), 400
+    if len(comments) > CLASSIFY_MAX_BATCH:
+        return jsonify(error=f"Maksimal {CLASSIFY_MAX_BATCH} komentar per request."), 413
+
+    model = model_store.get_model()
+    if model is None:
+        return jsonify(error="Model belum tersedia. Jalankan classify_sentimen.py dulu."), 503
+
+    try:
+        proba = model.predict_proba(clean_texts(pd.Series(comments)))
+    except Exception as exc:
+        logger.error("Gagal klasifikasi via API: %s", exc)
+        return jsonify(error="Gagal mengklasifikasi komentar."), 500
+
+    classes = [str(c) for c in model.classes_]
+    results = [
+        {
+            "sentimen":     classes[row.argmax()],
+            "probabilitas": {cls: round(float(p), 4) for cls, p in zip(classes, row)},
+        }
+        for row in proba
+    ]
+    return jsonify(model=model_store.latest_version(), hasil=results)
+
+
+@app.route("/api/comments")
+@api_login_required
+def api_comments():
+    """
+    Satu halaman komentar untuk tabel detail.
+
+    Query : page, per_page (maks comment_index.MAX_PER_PAGE), sort (tanggal /
+            platform / sentimen / likes, awali "-" untuk descending),
+            platform, sentimen, q (kata yang wajib ada di komentar, lewat
+            indeks full-text search_index), dari / sampai (tanggal YYYY-MM-DD)
+    Response: {"page", "per_page", "pages", "total", "sort",
+               "data": [{"tanggal", "platform", "sentimen", "komentar", "likes"}, ...]}
+
+    Urutan baris per kolom sudah dihitung sekali per versi data (comment_index),
+    sehingga satu request hanya memfilter & memotong satu halaman.
+    """
+    args = request.args
+    try:
+        page     = int(args.get("page", 1))
+        per_page = int(args.get("per_page", comment_index.PER_PAGE_DEFAULT))
+    except ValueError:
+        return jsonify(error="page dan per_page harus berupa bilangan bulat."), 400
 
     try:
-        result = subprocess.run(
-            script_map[platform],
-            check=True,
-            capture_output=True,
-            text=True,
-            timeout=300,
+        result = comment_index.query(
+            page=page,
+            per_page=per_page,
+            sort=args.get("sort", comment_index.DEFAULT_SORT),
+            platform=args.get("platform") or None,
+            sentimen=args.get("sentimen") or None,
+            q=args.get("q", "").strip() or None,
+            dari=args.get("dari") or None,
+            sampai=args.get("sampai") or None,
         )
-        logger.info("Scrape '%s' berhasil oleh %s", platform, session.get("username"))
-        flash(f"✅ Data dari {platform.capitalize()} berhasil diambil.", "success")
-    except subprocess.TimeoutExpired:
-        flash(f"❌ Scraping {platform} timeout. Coba lagi.", "error")
-    except subprocess.CalledProcessError as exc:
-        logger.error("Scrape '%s' gagal: %s", platform, exc.stderr)
-        flash(f"❌ Scraping gagal: {exc.stderr[:200]}", "error")
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    except Exception as exc:
+        logger.error("Gagal mengambil komentar: %s", exc)
+        return jsonify(error="Gagal mengambil data komentar."), 500
 
-    return redirect(url_for("dashboard"))
+    return jsonify(result)
+
+
+@app.route("/api/summary")
+@api_login_required
+def api_summary():
+    """
+    Jumlah komentar per sentimen untuk kartu KPI & grafik dashboard.
+
+    Query : platform, sentimen (kosong / "all" = semua)
+    Response: {"platform", "sentimen", "positif", "netral", "negatif", "total"}
+
+    Dibaca dari agregat harian (rollup). ETag diturunkan dari versi data +
+    filter, sehingga polling dengan If-None-Match dibalas 304 tanpa membaca
+    agregat sama sekali selama data belum berubah.
+    """
+    platform = request.args.get("platform", "").strip()
+    sentimen = request.args.get("sentimen", "").strip().lower()
+    platform = None if platform in ("", "all") else platform
+    sentimen = None if sentimen in ("", "all") else sentimen
+
+    etag = data_etag("summary", (platform or "").lower(), sentimen)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        summary = sentiment_summary(platform, sentimen)
+    except Exception as exc:
+        logger.error("Gagal membaca agregat: %s", exc)
+        return jsonify(error="Gagal mengambil ringkasan sentimen."), 500
+
+    response = jsonify(platform=platform, sentimen=sentimen, **summary)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 # ── Error handlers ────────────────────────────────────────────────────────────
@@ -0,0 +1,226 @@
+"""
+benchmark.py — Benchmark komponen pipeline sentimen JKT48
+=========================================================
+Pemakaian:
+  python benchmark.py clean-text [-n 200000]
+  python benchmark.py features   [-n 100000]   # backend fitur tfidf vs hashing
+  python benchmark.py features --tuned          # tfidf memakai hasil search_model.py
+"""
+
+import argparse
+import logging
+import pickle
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from classify_sentimen import CHUNK_ROWS, HASH_FEATURES, build_model, fit_streaming, load_tuned_params
+from generate_data_dummy import COMMENTS
+from text_clean import clean_text, clean_texts
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Data sintetis ─────────────────────────────────────────────────────────────
+
+# Noise khas media sosial yang ditangani clean_text
+NOISE = [
+    "https://t.co/AbC123", "www.jkt48.com/news", "@jkt48official", "@fans_01",
+    "#JKT48", "#Senbatsu2025", "2025", "10/10", "😭❤️", "🎉", "!!!", "...",
+]
+
+
+def make_corpus(n: int, seed: int = 42) -> pd.Series:
+    """Buat n komentar sintetis: kalimat dummy + noise acak."""
+    rng   = random.Random(seed)
+    base  = [c for lst in COMMENTS.values() for c in lst]
+    texts = []
+    for _ in range(n):
+        words = rng.choice(base).split()
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randint(0, len(words)), rng.choice(NOISE))
+        texts.append(" ".join(words))
+    return pd.Series(texts)
+
+
+def make_labeled_corpus(
+    n: int, seed: int = 42, rare_vocab: int = 0,
+) -> tuple[pd.Series, pd.Series]:
+    """
+    Buat n komentar sintetis berlabel. Sebagian komentar dicampur potongan
+    komentar dari label lain agar klasifikasi tidak trivial.
+    rare_vocab > 0 menyisipkan kata acak dari kosakata sebesar itu (typo,
+    slang, nama) agar vocabulary tumbuh seperti data media sosial asli.
+    """
+    rng    = random.Random(seed)
+    rare   = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+        for _ in range(rare_vocab)
+    ]
+    labels = list(COMMENTS)
+    texts, y = [], []
+    for _ in range(n):
+        label = rng.choice(labels)
+        words = rng.choice(COMMENTS[label]).split()
+        if rng.random() < 0.3:
+            other = rng.choice(COMMENTS[rng.choice(labels)]).split()
+            words += other[:rng.randint(1, len(other))]
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randint(0, len(words)), rng.choice(NOISE))
+        for _ in range(rng.randint(0, 3) if rare else 0):
+            words.insert(rng.randint(0, len(words)), rng.choice(rare))
+        texts.append(" ".join(words))
+        y.append(label)
+    return pd.Series(texts), pd.Series(y)
+
+
+def _timeit(func, repeat: int) -> float:
+    """Waktu terbaik (detik) dari beberapa kali pemanggilan."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+
+def bench_clean_text(n: int, repeat: int) -> bool:
+    """Bandingkan Series.apply(clean_text) dengan clean_texts(Series)."""
+    texts = make_corpus(n)
+
+    expected = texts.apply(clean_text).tolist()
+    actual   = clean_texts(texts).tolist()
+    if expected != actual:
+        diff = sum(e != a for e, a in zip(expected, actual))
+        logger.error("❌ Hasil clean_texts berbeda dari clean_text pada %d baris.", diff)
+        return False
+
+    t_apply = _timeit(lambda: texts.apply(clean_text), repeat)
+    t_batch = _timeit(lambda: clean_texts(texts), repeat)
+
+    logger.info("clean-text — %d komentar, terbaik dari %d kali:", n, repeat)
+    logger.info("  %-28s %8.3f detik  (%9.0f baris/detik)", "Series.apply(clean_text)", t_apply, n / t_apply)
+    logger.info("  %-28s %8.3f detik  (%9.0f baris/detik)", "clean_texts(Series)", t_batch, n / t_batch)
+    logger.info("  Speed-up: %.2fx — output identik ✅", t_apply / t_batch)
+    return True
+
+
+def _peak_memory_mb(func) -> float:
+    """Memori puncak (MB) yang dialokasikan selama func() menurut tracemalloc."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def bench_features(n: int, chunk_size: int, rare_vocab: int, n_features: int, tuned: bool = False) -> bool:
+    """
+    Bandingkan backend fitur model: akurasi holdout vs memori vs waktu.
+      tfidf          — TfidfVectorizer (vocabulary), fit sekaligus
+      hashing        — HashingVectorizer + TfidfTransformer, fit sekaligus
+      hashing-stream — backend hashing, fit_streaming per chunk
+
+    tfidf memakai hyperparameter default build_model, kecuali tuned=True
+    (hasil search_model.py di tuned_params.json) — agar hasil antar-run bisa
+    dibandingkan tanpa bergantung pada ada tidaknya hasil tuning.
+    """
+    params = load_tuned_params() if tuned else {}
+    texts, labels = make_labeled_corpus(n, rare_vocab=rare_vocab)
+    texts  = clean_texts(texts)
+    split  = int(n * 0.8)
+    X_train, y_train = texts[:split], labels[:split]
+    X_test,  y_test  = texts[split:], labels[split:]
+
+    def chunks():
+        for i in range(0, split, chunk_size):
+            yield X_train[i:i + chunk_size], y_train[i:i + chunk_size]
+
+    variants = {
+        "tfidf":          ("tfidf",   lambda m: m.fit(X_train, y_train)),
+        "hashing":        ("hashing", lambda m: m.fit(X_train, y_train)),
+        "hashing-stream": ("hashing", lambda m: fit_streaming(m, chunks, use_cache=False)),
+    }
+
+    logger.info(
+        "features — %d komentar latih, %d uji, kosakata langka %d, dimensi hashing %d, chunk %d:",
+        split, n - split, rare_vocab, n_features, chunk_size,
+    )
+    logger.info("  hyperparameter tfidf: %s", params or "default build_model")
+    logger.info(
+        "  %-16s %9s %10s %11s %10s %10s",
+        "backend", "akurasi", "fit (s)", "puncak (MB)", "model (MB)", "prediksi (s)",
+    )
+    for name, (backend, fit) in variants.items():
+        # Memori diukur pada fit terpisah — tracemalloc memperlambat eksekusi
+        peak_mb = _peak_memory_mb(lambda: fit(build_model(backend, n_features, params)))
+
+        model = build_model(backend, n_features, params)
+        t_fit = _timeit(lambda: fit(model), repeat=1)
+
+        t0 = time.perf_counter()
+        predicted = model.predict(X_test)
+        t_pred = time.perf_counter() - t0
+
+        accuracy = (predicted == y_test.to_numpy()).mean()
+        size_mb  = len(pickle.dumps(model)) / 1e6
+        logger.info(
+            "  %-16s %8.2f%% %10.2f %11.1f %10.1f %10.2f",
+            name, accuracy * 100, t_fit, peak_mb, size_mb, t_pred,
+        )
+    return True
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark komponen pipeline sentimen JKT48."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("clean-text", help="clean_text per baris vs clean_texts batch")
+    p.add_argument("-n", "--num", type=int, default=200_000, help="Jumlah komentar (default: 200000)")
+    p.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan (default: 3)")
+
+    p = sub.add_parser("features", help="Backend fitur tfidf vs hashing (akurasi, memori, waktu)")
+    p.add_argument("-n", "--num", type=int, default=100_000, help="Jumlah komentar (default: 100000)")
+    p.add_argument(
+        "--chunk-size", type=int, default=CHUNK_ROWS,
+        help=f"Baris per chunk untuk hashing-stream (default: {CHUNK_ROWS})",
+    )
+    p.add_argument(
+        "--rare-vocab", type=int, default=200_000,
+        help="Ukuran kosakata langka acak yang disisipkan (default: 200000, 0 = tanpa)",
+    )
+    p.add_argument(
+        "--hash-features", type=int, default=HASH_FEATURES,
+        help=f"Dimensi fitur backend hashing (default: {HASH_FEATURES})",
+    )
+    p.add_argument(
+        "--tuned", action="store_true",
+        help="Backend tfidf memakai hyperparameter hasil tuning (default: hyperparameter bawaan)",
+    )
+
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.command == "clean-text":
+        success = bench_clean_text(args.num, args.repeat)
+    elif args.command == "features":
+        success = bench_features(args.num, args.chunk_size, args.rare_vocab, args.hash_features, args.tuned)
+
+    raise SystemExit(0 if success else 1)
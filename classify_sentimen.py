@@ -1,17 +1,27 @@
-import csv
+import argparse
+import json
 import logging
-import re
-import shutil
-import string
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
 from sklearn.metrics import classification_report
 from sklearn.model_selection import cross_val_score
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 
+import feature_cache
+import model_store
+import rollup
+import storage
+from text_clean import clean_texts
+
 # ── Logging ───────────────────────────────────────────────────────────────────
 
 logging.basicConfig(
@@ -22,174 +32,732 @@ logger = logging.getLogger(__name__)
 
 # ── Konstanta ─────────────────────────────────────────────────────────────────
 
-DATA_DIR      = Path(__file__).parent / "data"
-HASIL_CSV     = DATA_DIR / "hasil.csv"
-BACKUP_CSV    = DATA_DIR / "hasil_backup.csv"
-
 # Label sentimen yang diizinkan
 VALID_LABELS  = {"positif", "netral", "negatif"}
 
-# Kolom wajib ada di CSV
-REQUIRED_COLS = {"komentar", "sentimen"}
-
 # Jumlah minimum data latih agar model layak dipakai
 MIN_TRAIN_ROWS = 10
 
-# ── Preprocessing ─────────────────────────────────────────────────────────────
+# Watermark file data yang sudah diproses (model disimpan oleh model_store)
+STATE_PATH = model_store.MODEL_DIR / "state.json"
+
+# Hyperparameter TF-IDF + NB hasil search_model.py (menimpa default build_model)
+TUNED_PARAMS_PATH = model_store.MODEL_DIR / "tuned_params.json"
+
+# Latih ulang jika data berlabel baru sejak training terakhir melebihi
+# proporsi ini dari ukuran data latih model saat ini
+RETRAIN_THRESHOLD = float(os.environ.get("RETRAIN_THRESHOLD", "0.10"))
+
+# Jumlah proses untuk cleaning + prediksi (1 = serial di proses utama)
+DEFAULT_WORKERS = int(os.environ.get("CLASSIFY_WORKERS", "1"))
+
+# Di bawah jumlah baris ini biaya start worker lebih besar dari hasilnya
+MIN_PARALLEL_ROWS = 20_000
+
+# Backend fitur model:
+#   tfidf   — TfidfVectorizer dengan vocabulary (default, perilaku lama)
+#   hashing — HashingVectorizer + TfidfTransformer, dimensi fitur tetap,
+#             tanpa vocabulary; wajib untuk mode streaming
+FEATURE_BACKENDS = ("tfidf", "hashing")
+FEATURE_BACKEND  = os.environ.get("FEATURE_BACKEND", "tfidf")
+HASH_FEATURES    = 2 ** 20
+
+# Mode streaming: jumlah baris per chunk baca/tulis
+CHUNK_ROWS = 50_000
+
+# Jumlah proses untuk fold cross-validation (-1 = semua core)
+CV_JOBS = int(os.environ.get("CV_JOBS", "-1"))
+
+# ── State & model tersimpan ───────────────────────────────────────────────────
 
-def clean_text(text: str) -> str:
+def _load_state() -> dict:
     """
-    Bersihkan teks komentar dari noise umum media sosial.
-    Urutan pembersihan penting — jangan diubah sembarangan.
+    Baca watermark run sebelumnya. State kosong jika belum ada / rusak.
+
+    files    : kunci file (storage.file_key) per nama file saat terakhir diproses
+    labeled  : jumlah baris berlabel per nama file saat terakhir diproses
     """
-    text = str(text).lower()
-    text = re.sub(r"http\S+|www\S+|https\S+", " ", text, flags=re.MULTILINE)  # URL
-    text = re.sub(r"@\w+", " ", text)          # mention (@username)
-    text = re.sub(r"#\w+", " ", text)           # hashtag
-    text = re.sub(r"\d+", " ", text)            # angka
-    text = re.sub(r"[^\x00-\x7F]+", " ", text)  # karakter non-ASCII (emoji, dll)
-    text = text.translate(str.maketrans("", "", string.punctuation))
-    text = re.sub(r"\s+", " ", text).strip()    # spasi ganda
-    return text
+    state = {"files": {}, "labeled": {}, "n_train": 0, "labeled_since_train": 0}
+    if STATE_PATH.exists():
+        try:
+            state.update(json.loads(STATE_PATH.read_text(encoding="utf-8")))
+        except Exception as exc:
+            logger.warning("State klasifikasi rusak, diabaikan: %s", exc)
+    return state
+
+
+def _save_state(state: dict) -> None:
+    model_store.write_text_atomic(STATE_PATH, json.dumps(state, indent=2))
 
-# ── Fungsi utama ──────────────────────────────────────────────────────────────
 
-def run_classifier() -> bool:
+# ── Training ──────────────────────────────────────────────────────────────────
+
+def build_model(
+    backend: str = FEATURE_BACKEND, n_features: int = HASH_FEATURES, params: dict | None = None,
+) -> Pipeline:
     """
-    Jalankan pipeline klasifikasi sentimen.
-    Kembalikan True jika berhasil, False jika gagal.
+    Pipeline fitur (lihat FEATURE_BACKENDS) + Naive Bayes yang belum dilatih.
+    n_features hanya dipakai backend hashing. params (format set_params) hanya
+    dipakai backend tfidf; None = hyperparameter hasil tuning (load_tuned_params).
     """
+    if backend == "hashing":
+        # Tanpa vocabulary: memori & ukuran model tetap berapa pun besar korpus,
+        # dan idf bisa dihitung per chunk (lihat fit_streaming)
+        return Pipeline([
+            ("hash", HashingVectorizer(
+                ngram_range=(1, 2),
+                n_features=n_features,
+                alternate_sign=False,   # MultinomialNB butuh fitur non-negatif
+                norm=None,              # normalisasi dilakukan TfidfTransformer
+            )),
+            ("idf", TfidfTransformer(sublinear_tf=True)),
+            ("nb", MultinomialNB(alpha=0.5)),
+        ])
+    if backend != "tfidf":
+        raise ValueError(f"Backend fitur tidak valid: {backend!r}. Pilihan: {FEATURE_BACKENDS}")
+
+    # TF-IDF lebih baik dari CountVectorizer untuk teks pendek
+    model = Pipeline([
+        ("tfidf", TfidfVectorizer(
+            ngram_range=(1, 2),     # unigram + bigram
+            min_df=2,               # abaikan token yang sangat jarang
+            max_df=0.95,            # abaikan token yang terlalu umum
+            sublinear_tf=True,      # log normalization
+        )),
+        ("nb", MultinomialNB(alpha=0.5)),
+    ])
+    return model.set_params(**(load_tuned_params() if params is None else params))
 
-    # 1. Pastikan file CSV ada
-    if not HASIL_CSV.exists():
-        logger.error("File tidak ditemukan: %s", HASIL_CSV)
-        return False
 
-    # 2. Baca CSV
+def load_tuned_params() -> dict:
+    """Hyperparameter hasil tuning (format set_params), kosong jika belum ada."""
+    if not TUNED_PARAMS_PATH.exists():
+        return {}
     try:
-        df = pd.read_csv(HASIL_CSV)
+        params = json.loads(TUNED_PARAMS_PATH.read_text(encoding="utf-8"))
     except Exception as exc:
-        logger.error("Gagal membaca CSV: %s", exc)
-        return False
+        logger.warning("File hyperparameter tuning rusak, diabaikan: %s", exc)
+        return {}
+    if "tfidf__ngram_range" in params:
+        params["tfidf__ngram_range"] = tuple(params["tfidf__ngram_range"])
+    return params
 
-    # 3. Validasi kolom wajib
-    missing_cols = REQUIRED_COLS - set(df.columns)
-    if missing_cols:
-        logger.error("Kolom wajib tidak ditemukan: %s", missing_cols)
-        return False
 
-    # 4. Normalisasi label sentimen yang sudah ada
-    df["sentimen"] = df["sentimen"].str.lower().str.strip()
+def save_tuned_params(params: dict) -> None:
+    """Simpan hyperparameter hasil tuning; dipakai build_model("tfidf") berikutnya."""
+    model_store.write_text_atomic(TUNED_PARAMS_PATH, json.dumps(params, indent=2))
 
-    # Tandai label yang tidak valid sebagai NaN (akan diklasifikasi ulang)
-    invalid_mask = df["sentimen"].notna() & ~df["sentimen"].isin(VALID_LABELS)
-    if invalid_mask.sum() > 0:
-        logger.warning(
-            "%d baris memiliki label sentimen tidak valid dan akan diklasifikasi ulang: %s",
-            invalid_mask.sum(),
-            df.loc[invalid_mask, "sentimen"].unique().tolist(),
+
+def fit_streaming(model: Pipeline, chunks, use_cache: bool = True) -> dict:
+    """
+    Latih pipeline backend hashing per chunk tanpa memuat seluruh data latih.
+
+    chunks() harus mengembalikan iterator baru berisi (teks bersih, label)
+    setiap kali dipanggil; dipanggil dua kali:
+      1. pass document frequency → idf_ TfidfTransformer (rumus sama dengan fit)
+      2. pass partial_fit Naive Bayes; setiap chunk diuji dulu sebelum dipakai
+         melatih (akurasi prequential) dan ikut dihitung ke hash data latih
+
+    Dengan use_cache=True vektor hashing per komentar diambil dari / disimpan
+    ke feature_cache, sehingga tokenisasi hanya terjadi sekali per komentar.
+
+    Kembalikan statistik: n_train, n_scored, n_correct, train_hash.
+    """
+    vectorizer  = model.named_steps["hash"]
+    vectorize   = feature_cache.FeatureCache(vectorizer).transform if use_cache else vectorizer.transform
+    transformer = model.named_steps["idf"]
+    classifier  = model.named_steps["nb"]
+    n_features  = vectorizer.n_features
+
+    doc_freq = np.zeros(n_features, dtype=np.float64)
+    n_docs   = 0
+    for texts, _ in chunks():
+        X = vectorize(texts)
+        doc_freq += np.bincount(X.indices, minlength=n_features)
+        n_docs   += X.shape[0]
+
+    stats = {"n_train": 0, "n_scored": 0, "n_correct": 0, "train_hash": None}
+    if n_docs == 0:
+        return stats
+
+    transformer.fit(sp.csr_matrix((1, n_features)))     # inisialisasi atribut transformer
+    transformer.idf_ = np.log((n_docs + 1) / (doc_freq + 1)) + 1.0
+
+    classes = sorted(VALID_LABELS)
+    hasher  = model_store.training_hasher()
+    for texts, labels in chunks():
+        X = transformer.transform(vectorize(texts))
+        if stats["n_train"]:
+            stats["n_correct"] += int((classifier.predict(X) == labels.to_numpy()).sum())
+            stats["n_scored"]  += len(labels)
+        classifier.partial_fit(X, labels, classes=classes)
+        model_store.update_training_hash(hasher, texts, labels)
+        stats["n_train"] += len(labels)
+        logger.info("Training streaming: %d data latih diproses.", stats["n_train"])
+
+    stats["train_hash"] = hasher.hexdigest()
+    return stats
+
+
+def _iter_train_chunks(chunk_size: int):
+    """Data latih bersih per chunk: (teks, label), dibaca file demi file."""
+    for path in storage.data_files():
+        for df in storage.iter_part(path, chunk_size, columns=["komentar", "sentimen"]):
+            df = df[df["sentimen"].isin(VALID_LABELS)]
+            texts  = clean_texts(df["komentar"])
+            keep   = texts.str.len() > 0
+            if keep.any():
+                yield texts[keep], df.loc[keep, "sentimen"].astype(str)
+
+
+def _train_model_streaming(
+    chunk_size: int = CHUNK_ROWS, reuse: bool = True,
+) -> tuple[Pipeline, int] | None:
+    """
+    Latih model backend hashing per chunk (lihat fit_streaming) — memori puncak
+    sebanding dengan chunk_size, bukan jumlah data latih. Cross-validation
+    diganti akurasi prequential.
+    Kembalikan (model, jumlah data latih), atau None jika data tidak layak.
+    """
+    model = build_model("hashing")
+    stats = fit_streaming(model, lambda: _iter_train_chunks(chunk_size))
+    n_train = stats["n_train"]
+
+    if n_train < MIN_TRAIN_ROWS:
+        logger.error(
+            "Data latih terlalu sedikit (%d baris). Minimum %d baris diperlukan.",
+            n_train, MIN_TRAIN_ROWS,
         )
-        df.loc[invalid_mask, "sentimen"] = None
+        return None
+
+    # Data & hyperparameter sama persis dengan model aktif → pakai artefak yang ada
+    train_hash = stats["train_hash"]
+    version    = model_store.find_version(train_hash, model_store.model_params(model)) if reuse else None
+    existing   = model_store.get_model() if version else None
+    if existing is not None:
+        logger.info("Data latih tidak berubah — memakai model versi %s.", version)
+        return existing, n_train
+
+    metrics: dict = {}
+    if stats["n_scored"]:
+        metrics = {
+            "prequential_rows":     stats["n_scored"],
+            "prequential_accuracy": stats["n_correct"] / stats["n_scored"],
+        }
+        logger.info(
+            "Akurasi prequential: %.2f%% (%d baris).",
+            metrics["prequential_accuracy"] * 100, stats["n_scored"],
+        )
+
+    model_store.save_model(model, train_hash, n_train, metrics)
+    return model, n_train
 
-    # 5. Pisahkan data latih dan data uji
-    train_df = df[df["sentimen"].notna()].copy()
-    test_df  = df[df["sentimen"].isna()].copy()
 
-    logger.info("Data latih: %d baris | Data uji: %d baris", len(train_df), len(test_df))
+def load_training_data() -> pd.DataFrame | None:
+    """
+    Seluruh data berlabel yang tersimpan, sudah dibersihkan (komentar, sentimen).
+    None jika data latih tidak layak.
+    """
+    df = storage.load(["komentar", "sentimen"])
+    train_df = df[df["sentimen"].isin(VALID_LABELS)]
+    train_df = pd.DataFrame({
+        "komentar": clean_texts(train_df["komentar"]),
+        "sentimen": train_df["sentimen"].astype(str),
+    })
 
     if len(train_df) < MIN_TRAIN_ROWS:
         logger.error(
             "Data latih terlalu sedikit (%d baris). Minimum %d baris diperlukan.",
             len(train_df), MIN_TRAIN_ROWS,
         )
-        return False
-
-    if len(test_df) == 0:
-        logger.info("Tidak ada data uji — semua komentar sudah memiliki label.")
-        return True
-
-    # 6. Bersihkan teks
-    train_df = train_df.assign(komentar=train_df["komentar"].apply(clean_text))
-    test_df  = test_df.assign(komentar=test_df["komentar"].apply(clean_text))
+        return None
 
     # Hapus baris dengan komentar kosong setelah cleaning
     train_df = train_df[train_df["komentar"].str.len() > 0]
     if len(train_df) == 0:
         logger.error("Semua teks latih kosong setelah preprocessing.")
-        return False
+        return None
+    return train_df
 
-    # 7. Bangun pipeline — TF-IDF lebih baik dari CountVectorizer untuk teks pendek
-    model = Pipeline([
-        ("tfidf", TfidfVectorizer(
-            ngram_range=(1, 2),     # unigram + bigram
-            min_df=2,               # abaikan token yang sangat jarang
-            max_df=0.95,            # abaikan token yang terlalu umum
-            sublinear_tf=True,      # log normalization
-        )),
-        ("nb", MultinomialNB(alpha=0.5)),
-    ])
 
-    # 8. Evaluasi model dengan cross-validation (jika data cukup)
+def evaluate_model(
+    model: Pipeline,
+    train_df: pd.DataFrame,
+    train_hash: str,
+    n_jobs: int = CV_JOBS,
+    features: sp.csr_matrix | None = None,
+) -> dict:
+    """
+    Cross-validation akurasi untuk pipeline (belum dilatih) pada train_df.
+    Hasil di-cache per hash data latih + hyperparameter (model_store), sehingga
+    data berlabel yang tidak berubah tidak dievaluasi ulang. Fold dijalankan
+    paralel di n_jobs proses. Kembalikan dict metrik (kosong jika dilewati).
+
+    features: matriks vectorizer siap pakai (lihat _cached_features) — jika ada,
+    hanya langkah setelah vectorizer yang dievaluasi, tanpa tokenisasi ulang.
+    """
+    params = model_store.model_params(model)
+    cached = model_store.load_eval(train_hash, params)
+    if cached is not None:
+        logger.info(
+            "Cross-validation (%d-fold) dari cache: %.2f%% ± %.2f%%",
+            cached["cv_folds"], cached["cv_accuracy_mean"] * 100, cached["cv_accuracy_std"] * 100,
+        )
+        return cached
+
     n_classes = train_df["sentimen"].nunique()
-    if len(train_df) >= 30 and n_classes >= 2:
-        cv_folds = min(5, len(train_df) // n_classes)
-        try:
-            cv_scores = cross_val_score(
-                model,
-                train_df["komentar"],
-                train_df["sentimen"],
-                cv=cv_folds,
-                scoring="accuracy",
-            )
-            logger.info(
-                "Cross-validation (%d-fold) akurasi: %.2f%% ± %.2f%%",
-                cv_folds,
-                cv_scores.mean() * 100,
-                cv_scores.std() * 100,
-            )
-        except Exception as exc:
-            logger.warning("Cross-validation dilewati: %s", exc)
-    else:
+    if len(train_df) < 30 or n_classes < 2:
         logger.warning(
             "Data latih terlalu sedikit untuk cross-validation (%d baris, %d kelas).",
             len(train_df), n_classes,
         )
+        return {}
 
-    # 9. Latih model dengan semua data latih
-    model.fit(train_df["komentar"], train_df["sentimen"])
+    cv_folds = min(5, len(train_df) // n_classes)
+    try:
+        cv_scores = cross_val_score(
+            model if features is None else model[1:],
+            train_df["komentar"] if features is None else features,
+            train_df["sentimen"],
+            cv=cv_folds,
+            scoring="accuracy",
+            n_jobs=n_jobs,
+        )
+    except Exception as exc:
+        logger.warning("Cross-validation dilewati: %s", exc)
+        return {}
+
+    logger.info(
+        "Cross-validation (%d-fold) akurasi: %.2f%% ± %.2f%%",
+        cv_folds,
+        cv_scores.mean() * 100,
+        cv_scores.std() * 100,
+    )
+    metrics = {
+        "cv_folds":         cv_folds,
+        "cv_accuracy_mean": float(cv_scores.mean()),
+        "cv_accuracy_std":  float(cv_scores.std()),
+    }
+    model_store.save_eval(train_hash, params, metrics)
+    return metrics
+
+
+def _cached_features(model: Pipeline, texts: pd.Series) -> sp.csr_matrix | None:
+    """
+    Matriks HashingVectorizer untuk texts dari feature_cache, atau None jika
+    pipeline memakai vectorizer dengan vocabulary (TF-IDF) / cache gagal dipakai.
+    """
+    if "hash" not in model.named_steps:
+        return None
+    try:
+        return feature_cache.FeatureCache(model.named_steps["hash"]).transform(texts)
+    except Exception as exc:
+        logger.warning("Cache fitur dilewati: %s", exc)
+        return None
+
+
+def train_model(
+    reuse: bool = True, backend: str = FEATURE_BACKEND, evaluate: bool = True,
+    params: dict | None = None,
+) -> tuple[Pipeline, int] | None:
+    """
+    Latih model dari seluruh data berlabel yang tersimpan dan simpan sebagai
+    versi aktif di model_store.
+    Jika reuse=True dan data latih + hyperparameter identik dengan model aktif,
+    artefak yang ada dipakai tanpa training ulang.
+    evaluate=False melewati cross-validation (lihat --eval-only untuk mengisinya nanti).
+    params: hyperparameter backend tfidf (lihat build_model).
+    Kembalikan (model, jumlah data latih), atau None jika data tidak layak.
+    """
+    train_df = load_training_data()
+    if train_df is None:
+        return None
+
+    model = build_model(backend, params=params)
+
+    # Data & hyperparameter sama persis dengan model aktif → pakai artefak yang ada
+    train_hash = model_store.training_hash(train_df["komentar"], train_df["sentimen"])
+    version    = model_store.find_version(train_hash, model_store.model_params(model)) if reuse else None
+    existing   = model_store.get_model() if version else None
+    if existing is not None:
+        logger.info("Data latih tidak berubah — memakai model versi %s.", version)
+        return existing, len(train_df)
+
+    # Vektor hashing dari cache fitur (backend hashing saja)
+    features = _cached_features(model, train_df["komentar"])
+
+    # Evaluasi model dengan cross-validation (jika data cukup)
+    metrics = evaluate_model(model, train_df, train_hash, features=features) if evaluate else {}
+
+    # Latih model dengan semua data latih
+    if features is None:
+        model.fit(train_df["komentar"], train_df["sentimen"])
+    else:
+        model[1:].fit(features, train_df["sentimen"])     # vectorizer hashing tanpa state
 
     # Cetak feature importance (top kata per kelas) untuk inspeksi
     _log_top_features(model)
 
-    # 10. Prediksi data uji
-    predicted = model.predict(test_df["komentar"])
-    logger.info("Distribusi prediksi: %s", pd.Series(predicted).value_counts().to_dict())
+    model_store.save_model(model, train_hash, len(train_df), metrics)
+    return model, len(train_df)
+
 
-    # 11. Backup CSV sebelum overwrite
+def run_evaluation(backend: str = FEATURE_BACKEND) -> bool:
+    """
+    Hanya evaluasi (cross-validation) konfigurasi model pada data berlabel saat
+    ini, tanpa training & pelabelan. Jika model aktif dilatih dari data &
+    hyperparameter yang sama, metriknya disimpan ke metadata model tersebut.
+    """
     try:
-        shutil.copy2(HASIL_CSV, BACKUP_CSV)
-        logger.info("Backup disimpan ke: %s", BACKUP_CSV)
+        train_df = load_training_data()
     except Exception as exc:
-        logger.warning("Gagal membuat backup: %s", exc)
+        logger.error("Gagal membaca data: %s", exc)
+        return False
+    if train_df is None:
+        return False
+
+    model      = build_model(backend)
+    train_hash = model_store.training_hash(train_df["komentar"], train_df["sentimen"])
+    features   = _cached_features(model, train_df["komentar"])
+    metrics    = evaluate_model(model, train_df, train_hash, features=features)
+    if not metrics:
+        return False
+
+    version = model_store.find_version(train_hash, model_store.model_params(model))
+    if version:
+        model_store.update_meta(version, metrics=metrics)
+        logger.info("Metrik disimpan ke metadata model versi %s.", version)
+    return True
+
+# ── Prediksi (serial / paralel) ───────────────────────────────────────────────
+
+# Model milik proses worker — dimuat sekali oleh _init_worker, bukan dikirim per chunk
+_worker_model = None
+
 
-    # 12. Simpan hasil ke CSV
-    df.loc[df["sentimen"].isna(), "sentimen"] = predicted
+def _init_worker(version: str) -> None:
+    global _worker_model
+    _worker_model = model_store.load_model(version)
+    if _worker_model is None:
+        raise RuntimeError(f"Model {version} tidak bisa dimuat di worker")
+
+
+def _predict_chunk(texts: list[str]) -> list[str]:
+    """Bersihkan & prediksi satu chunk komentar di proses worker."""
+    return _worker_model.predict(clean_texts(pd.Series(texts))).tolist()
+
+
+def _worker_pool(workers: int, version: str) -> ProcessPoolExecutor:
+    """Pool proses yang tiap worker-nya memuat model versi version satu kali."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(version,),
+    )
+
+
+def predict_texts(
+    model: Pipeline,
+    texts: pd.Series,
+    workers: int = 1,
+    pool: ProcessPoolExecutor | None = None,
+) -> list[str]:
+    """
+    Bersihkan & prediksi label untuk Series komentar, urutan hasil sama dengan input.
+
+    Jika workers > 1 dan data cukup besar, komentar dibagi ke beberapa chunk
+    yang diproses oleh pool proses. Setiap worker memuat versi tersimpan dari
+    model yang sama satu kali dari model_store (array di-mmap, sehingga halaman
+    memori dipakai bersama) — model tidak di-pickle per chunk. Model yang tidak
+    punya versi tersimpan (model_store.version_of) selalu diprediksi serial.
+    Hasil identik dengan jalur serial. Pool yang sudah ada (dari _worker_pool
+    dengan versi model yang sama) bisa dipakai ulang lewat pool.
+    """
+    if pool is None:
+        version = model_store.version_of(model)
+        if workers <= 1 or len(texts) < MIN_PARALLEL_ROWS or version is None:
+            return model.predict(clean_texts(texts)).tolist()
+        with _worker_pool(workers, version) as pool:
+            return predict_texts(model, texts, workers, pool)
+
+    values     = texts.tolist()
+    chunk_size = max(1, -(-len(values) // (workers * 4)))    # ±4 chunk per worker
+    chunks     = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    logger.info(
+        "Prediksi paralel: %d komentar, %d worker, %d chunk.",
+        len(values), workers, len(chunks),
+    )
+    results = pool.map(_predict_chunk, chunks)
+    return [label for chunk in results for label in chunk]
+
+# ── Fungsi utama ──────────────────────────────────────────────────────────────
+
+def _prepare_part(df: pd.DataFrame) -> pd.DataFrame:
+    """Siapkan satu file / chunk data: label tidak valid ditandai NaN."""
+    # Ubah ke object agar label hasil prediksi bisa diisi tanpa batasan kategori
+    df["sentimen"] = df["sentimen"].astype(object)
+
+    # Tandai label yang tidak valid sebagai NaN (akan diklasifikasi ulang)
+    invalid_mask = df["sentimen"].notna() & ~df["sentimen"].isin(VALID_LABELS)
+    if invalid_mask.sum() > 0:
+        logger.warning(
+            "%d baris memiliki label sentimen tidak valid dan akan diklasifikasi ulang: %s",
+            invalid_mask.sum(),
+            df.loc[invalid_mask, "sentimen"].unique().tolist(),
+        )
+        df.loc[invalid_mask, "sentimen"] = None
+    return df
+
+
+def _label_chunk(
+    model: Pipeline, df: pd.DataFrame, counts: Counter, workers: int, pool,
+    deltas: list | None = None,
+) -> pd.DataFrame:
+    """
+    Isi label kosong pada satu chunk (mode streaming). Delta agregat harian
+    untuk baris yang diberi label ditambahkan ke deltas (jika diberikan).
+    """
+    old_sentimen = df["sentimen"]
+    df = _prepare_part(df)
+    test_mask = df["sentimen"].isna()
+    if test_mask.any():
+        labels = predict_texts(model, df.loc[test_mask, "komentar"], workers, pool)
+        df.loc[test_mask, "sentimen"] = labels
+        counts.update(labels)
+        if deltas is not None:
+            deltas.append(rollup.relabel(df[test_mask], old_sentimen))
+    return df
+
+
+def run_classifier(
+    retrain_threshold: float = RETRAIN_THRESHOLD,
+    force_retrain: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    stream: bool = False,
+    chunk_size: int = CHUNK_ROWS,
+    backend: str = FEATURE_BACKEND,
+    evaluate: bool = True,
+) -> bool:
+    """
+    Jalankan pipeline klasifikasi sentimen secara inkremental.
+
+    Hanya file data (file utama / segmen) yang baru atau berubah sejak run
+    terakhir yang dibersihkan & diprediksi. Model tersimpan dipakai ulang dan
+    baru dilatih ulang jika data berlabel baru melebihi retrain_threshold
+    dari ukuran data latih (atau force_retrain=True).
+
+    workers > 1 membagi cleaning + prediksi ke beberapa proses (lihat predict_texts).
+
+    backend memilih fitur model saat training ulang ("tfidf" / "hashing").
+    evaluate=False melewati cross-validation saat training ulang.
+
+    stream=True membaca, melatih (backend hashing + partial_fit), memprediksi,
+    dan menulis per chunk berisi chunk_size baris, sehingga memori puncak
+    tetap terbatas berapa pun ukuran file data.
+
+    Kembalikan True jika berhasil, False jika gagal.
+    """
+
+    if backend not in FEATURE_BACKENDS:
+        logger.error("Backend fitur tidak valid: %r. Pilihan: %s", backend, FEATURE_BACKENDS)
+        return False
+    if stream and backend != "hashing":
+        logger.info("Mode streaming memakai backend fitur hashing (vocabulary TF-IDF butuh seluruh data).")
+
+    # 1. Pastikan data ada
+    if not storage.exists():
+        logger.error("File tidak ditemukan: %s", storage.HASIL_PARQUET)
+        return False
+
+    # 2. Cari file yang belum diproses sejak run terakhir
+    try:
+        if not storage.HASIL_PARQUET.exists() and storage.LEGACY_CSV.exists():
+            storage.migrate_from_csv()
+        state   = _load_state()
+        files   = storage.data_files()
+        pending = [f for f in files if list(storage.file_key(f) or ()) != state["files"].get(f.name)]
+    except Exception as exc:
+        logger.error("Gagal membaca data: %s", exc)
+        return False
+
+    # Watermark hanya menyimpan file yang masih ada. Baris berlabel di file yang
+    # hilang (digabung kompaksi / data diganti) dikurangkan: baris yang sama
+    # muncul lagi di file penggantinya dan tidak boleh terhitung sebagai baru.
+    names = {f.name for f in files}
+    state["files"] = {f.name: state["files"][f.name] for f in files if f.name in state["files"]}
+    state["labeled_since_train"] -= sum(n for name, n in state["labeled"].items() if name not in names)
+    state["labeled"] = {name: n for name, n in state["labeled"].items() if name in names}
+
+    if not pending and not force_retrain:
+        logger.info("Tidak ada data baru sejak run terakhir — klasifikasi dilewati.")
+        return True
+
+    # 3. Hitung data berlabel & data uji di file baru. Mode biasa membaca
+    #    file utuh sekali; mode streaming cukup memindai kolom sentimen per chunk.
+    #    Data berlabel baru = selisih terhadap jumlah berlabel file itu saat
+    #    terakhir diproses (file yang ditulis ulang tidak dihitung ulang).
+    parts: dict[Path, pd.DataFrame] = {}
+    old_sentimen: dict[Path, pd.Series] = {}     # label asli, untuk delta agregat
+    new_labeled: dict[Path, int] = {}
+    labeled_rows: dict[Path, int] = {}           # baris berlabel setelah diproses
+    test_rows: dict[Path, int] = {}
+    for path in pending:
+        try:
+            if stream:
+                valid = [
+                    chunk["sentimen"].isin(VALID_LABELS)
+                    for chunk in storage.iter_part(path, chunk_size, columns=["sentimen"])
+                ]
+                labeled         = sum(int(v.sum()) for v in valid)
+                test_rows[path] = sum(int((~v).sum()) for v in valid)
+            else:
+                df = storage.read_part(path)
+                old_sentimen[path] = df["sentimen"]
+                df = _prepare_part(df)
+                labeled         = int(df["sentimen"].notna().sum())
+                test_rows[path] = int(df["sentimen"].isna().sum())
+                parts[path] = df
+        except Exception as exc:
+            logger.error("Gagal membaca %s: %s", path.name, exc)
+            return False
+        new_labeled[path]  = labeled - state["labeled"].get(path.name, 0)
+        labeled_rows[path] = labeled + test_rows[path]
+
+    n_test = sum(test_rows.values())
+    labeled_since_train = max(0, state["labeled_since_train"] + sum(new_labeled.values()))
+    logger.info(
+        "File baru: %d | Data uji baru: %d baris | Data berlabel baru sejak training: %d",
+        len(pending), n_test, labeled_since_train,
+    )
+
+    # 4. Pakai model tersimpan, latih ulang hanya jika perlu
+    model = None if force_retrain else model_store.get_model()
+    need_retrain = (
+        model is None
+        or labeled_since_train > retrain_threshold * max(state["n_train"], 1)
+    )
+
+    if n_test == 0 and not force_retrain:
+        logger.info("Tidak ada data uji — semua komentar baru sudah memiliki label.")
+        need_retrain = False
+
+    if need_retrain:
+        try:
+            trained = (
+                _train_model_streaming(chunk_size, reuse=not force_retrain) if stream
+                else train_model(reuse=not force_retrain, backend=backend, evaluate=evaluate)
+            )
+        except Exception as exc:
+            logger.error("Gagal melatih model: %s", exc)
+            return False
+        if trained is None:
+            return False
+        model, state["n_train"] = trained
+        # Data berlabel di file baru sudah ikut dilatih
+        state["labeled_since_train"] = 0
+        new_labeled = dict.fromkeys(new_labeled, 0)
+    elif n_test:
+        logger.info("Memakai model tersimpan (%d data latih).", state["n_train"])
+
+    # 5. Prediksi & tulis ulang hanya file yang punya data uji
+    if stream:
+        return _predict_streaming(
+            model, pending, test_rows, new_labeled, labeled_rows, state, workers, chunk_size,
+        )
+
+    #    Semua data uji diprediksi sekaligus (satu pool untuk semua file)
+    test_masks = {path: df["sentimen"].isna() for path, df in parts.items()}
+    test_texts = [df.loc[test_masks[path], "komentar"] for path, df in parts.items()]
     try:
-        df.to_csv(HASIL_CSV, index=False, quoting=csv.QUOTE_ALL)
-        logger.info("✅ Klasifikasi selesai. %d komentar diberi label baru.", len(test_df))
+        predicted = (
+            predict_texts(model, pd.concat(test_texts, ignore_index=True), workers)
+            if n_test else []
+        )
     except Exception as exc:
-        logger.error("Gagal menyimpan hasil ke CSV: %s", exc)
-        # Coba restore backup
-        if BACKUP_CSV.exists():
-            shutil.copy2(BACKUP_CSV, HASIL_CSV)
-            logger.info("CSV dikembalikan dari backup.")
+        logger.error("Gagal memprediksi sentimen: %s", exc)
         return False
 
+    n_labeled = 0
+    offset    = 0
+    for path, df in parts.items():
+        test_mask = test_masks[path]
+        n_part    = test_rows[path]
+        if n_part:
+            labels = predicted[offset:offset + n_part]
+            offset += n_part
+            logger.info(
+                "%s — distribusi prediksi: %s",
+                path.name, pd.Series(labels).value_counts().to_dict(),
+            )
+            df.loc[test_mask, "sentimen"] = labels
+            try:
+                with rollup.Rollup(write=True) as agg:
+                    before = storage.data_version()
+                    storage.write_part(path, df)
+                    agg.record(before, rollup.relabel(df[test_mask], old_sentimen[path]))
+            except Exception as exc:
+                logger.error("Gagal menyimpan hasil ke %s: %s", path.name, exc)
+                _save_state(state)
+                return False
+            n_labeled += n_part
+
+        state["files"][path.name]   = list(storage.file_key(path))
+        state["labeled"][path.name] = labeled_rows[path]
+        state["labeled_since_train"] += new_labeled[path]
+
+    _save_state(state)
+    logger.info("✅ Klasifikasi selesai. %d komentar diberi label baru.", n_labeled)
+    return True
+
+
+def _predict_streaming(
+    model: Pipeline,
+    pending: list[Path],
+    test_rows: dict[Path, int],
+    new_labeled: dict[Path, int],
+    labeled_rows: dict[Path, int],
+    state: dict,
+    workers: int,
+    chunk_size: int,
+) -> bool:
+    """Langkah prediksi mode streaming: baca → prediksi → tulis per chunk."""
+    version  = model_store.version_of(model)
+    use_pool = workers > 1 and version is not None and sum(test_rows.values()) >= MIN_PARALLEL_ROWS
+    n_labeled = 0
+    with (_worker_pool(workers, version) if use_pool else nullcontext()) as pool:
+        for path in pending:
+            if test_rows[path]:
+                counts: Counter = Counter()
+                deltas: list[pd.DataFrame] = []
+                frames = (
+                    _label_chunk(model, df, counts, workers, pool, deltas)
+                    for df in storage.iter_part(path, chunk_size)
+                )
+                try:
+                    with rollup.Rollup(write=True) as agg:
+                        before = storage.data_version()
+                        storage.write_part_stream(path, frames)
+                        agg.record(before, *deltas)
+                except Exception as exc:
+                    logger.error("Gagal memproses %s: %s", path.name, exc)
+                    _save_state(state)
+                    return False
+                logger.info("%s — distribusi prediksi: %s", path.name, dict(counts))
+                n_labeled += test_rows[path]
+
+            state["files"][path.name]   = list(storage.file_key(path))
+            state["labeled"][path.name] = labeled_rows[path]
+            state["labeled_since_train"] += new_labeled[path]
+
+    _save_state(state)
+    logger.info("✅ Klasifikasi selesai. %d komentar diberi label baru.", n_labeled)
     return True
 
 
 def _log_top_features(model: Pipeline, top_n: int = 8) -> None:
     """Cetak kata-kata paling berpengaruh per kelas ke log (opsional, untuk debugging)."""
+    if "tfidf" not in model.named_steps:
+        return      # backend hashing tidak punya nama fitur
     try:
         vectorizer = model.named_steps["tfidf"]
         classifier = model.named_steps["nb"]
@@ -204,8 +772,66 @@ def _log_top_features(model: Pipeline, top_n: int = 8) -> None:
         pass  # Fitur ini opsional, jangan sampai crash proses utama
 
 
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Klasifikasi sentimen komentar JKT48 (TF-IDF + Naive Bayes)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+        help=f"Jumlah proses untuk cleaning + prediksi (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--retrain", action="store_true",
+        help="Paksa latih ulang model walau data latih tidak berubah",
+    )
+    parser.add_argument(
+        "--retrain-threshold", type=float, default=RETRAIN_THRESHOLD, metavar="P",
+        help=(
+            "Latih ulang jika data berlabel baru > P × data latih model "
+            f"(default: {RETRAIN_THRESHOLD}, env RETRAIN_THRESHOLD)"
+        ),
+    )
+    parser.add_argument(
+        "--features", choices=FEATURE_BACKENDS, default=FEATURE_BACKEND,
+        help=f"Backend fitur saat training (default: {FEATURE_BACKEND})",
+    )
+    eval_group = parser.add_mutually_exclusive_group()
+    eval_group.add_argument(
+        "--skip-eval", action="store_true",
+        help="Lewati cross-validation saat training ulang (pelabelan saja)",
+    )
+    eval_group.add_argument(
+        "--eval-only", action="store_true",
+        help="Hanya jalankan cross-validation, tanpa training & pelabelan",
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Proses per chunk (memori terbatas) dengan model hashing + partial_fit",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_ROWS, metavar="N",
+        help=f"Jumlah baris per chunk pada mode --stream (default: {CHUNK_ROWS})",
+    )
+    return parser.parse_args()
+
+
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    success = run_classifier()
-    raise SystemExit(0 if success else 1)
\ No newline at end of file
+    args = parse_args()
+
+    if args.eval_only:
+        success = run_evaluation(backend=args.features)
+    else:
+        success = run_classifier(
+            retrain_threshold=args.retrain_threshold,
+            force_retrain=args.retrain,
+            workers=args.workers,
+            stream=args.stream,
+            chunk_size=args.chunk_size,
+            backend=args.features,
+            evaluate=not args.skip_eval,
+        )
+    raise SystemExit(0 if success else 1)
@@ -0,0 +1,193 @@
+"""
+comment_index.py — Indeks terurut untuk paging, sorting & filter komentar
+=========================================================================
+Dipakai oleh endpoint /api/comments (app.py) agar halaman detail tidak perlu
+mengirim seluruh komentar ke browser.
+
+Untuk setiap kolom yang bisa diurutkan disimpan urutan baris hasil argsort
+(stabil) dari data storage, dibangun sekali per versi data dan dipakai bersama
+oleh semua request dalam satu proses. Satu request cukup:
+  - memilih urutan kolom sort (dibalik untuk descending),
+  - menerapkan filter sebagai mask vektor pada urutan itu,
+  - mengambil satu halaman baris.
+Tanpa filter, biaya request sebanding dengan ukuran halaman, bukan jumlah data.
+
+Pencarian kata (q) memakai indeks full-text search_index; substring biasa
+hanya dipakai jika q tidak memuat kata yang bisa diindeks (mis. hanya angka)
+atau indeks belum sinkron dengan data yang sedang dipakai.
+"""
+
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+import search_index
+import storage
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+SORT_COLUMNS = ("tanggal", "platform", "sentimen", "likes")
+DEFAULT_SORT = "-tanggal"
+
+PER_PAGE_DEFAULT = 25
+MAX_PER_PAGE     = 100
+
+# ── Indeks ────────────────────────────────────────────────────────────────────
+
+def _sort_key(s: pd.Series) -> np.ndarray:
+    """
+    Kunci numerik untuk argsort: kategori diurutkan menurut nama huruf kecil,
+    tanggal sebagai int64. Nilai kosong (NaN / NaT) selalu paling kecil.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        names = np.array([str(c).lower() for c in s.cat.categories], dtype=object)
+        _, rank = np.unique(names, return_inverse=True)     # peringkat padat, mulai 0
+        codes = s.cat.codes.to_numpy()
+        return np.where(codes >= 0, rank[codes] + 1, 0)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return s.to_numpy()
+
+
+def _category_mask(s: pd.Series, value: str) -> np.ndarray:
+    """Mask baris yang kategorinya sama dengan value (tidak peka huruf besar/kecil)."""
+    wanted = [c for c in s.cat.categories if str(c).lower() == value.lower()]
+    return s.isin(wanted).to_numpy()
+
+
+class CommentIndex:
+    """Urutan baris per kolom sort untuk satu versi data (DataFrame tidak diubah)."""
+
+    def __init__(self, df: pd.DataFrame, layout: tuple | None = None):
+        self.df     = df
+        self.layout = layout        # storage.layout_version() milik df
+        self.orders = {
+            col: np.argsort(_sort_key(df[col]), kind="stable") for col in SORT_COLUMNS
+        }
+
+    def query(
+        self,
+        page:     int = 1,
+        per_page: int = PER_PAGE_DEFAULT,
+        sort:     str = DEFAULT_SORT,
+        platform: str | None = None,
+        sentimen: str | None = None,
+        q:        str | None = None,
+        dari:     str | None = None,
+        sampai:   str | None = None,
+    ) -> dict:
+        """
+        Satu halaman komentar. sort = nama kolom, awali "-" untuk descending.
+        q mencari komentar yang memuat semua kata di q (awalan kata, tidak peka
+        huruf besar/kecil). dari / sampai membatasi tanggal (YYYY-MM-DD, inklusif).
+        Raise ValueError untuk parameter tidak valid.
+        """
+        column = sort.lstrip("-")
+        if column not in self.orders:
+            raise ValueError(f"sort tidak valid: {sort!r}. Pilihan: {', '.join(SORT_COLUMNS)}")
+        if not 1 <= per_page <= MAX_PER_PAGE:
+            raise ValueError(f"per_page harus 1–{MAX_PER_PAGE}.")
+        if page < 1:
+            raise ValueError("page harus >= 1.")
+
+        order = self.orders[column]
+        if sort.startswith("-"):
+            order = order[::-1]
+
+        mask = None
+        if platform:
+            mask = _category_mask(self.df["platform"], platform)
+        if sentimen:
+            m = _category_mask(self.df["sentimen"], sentimen)
+            mask = m if mask is None else mask & m
+        if dari or sampai:
+            m = self._date_mask(dari, sampai)
+            mask = m if mask is None else mask & m
+        if q:
+            m = self._text_mask(q)
+            mask = m if mask is None else mask & m
+        if mask is not None:
+            order = order[mask[order]]
+
+        total = len(order)
+        start = (page - 1) * per_page
+        rows  = self.df.iloc[order[start:start + per_page]]
+
+        return {
+            "page":     page,
+            "per_page": per_page,
+            "pages":    max(1, -(-total // per_page)),
+            "total":    total,
+            "sort":     sort,
+            "data":     _records(rows),
+        }
+
+    def _date_mask(self, dari: str | None, sampai: str | None) -> np.ndarray:
+        try:
+            lo = pd.Timestamp(dari)   if dari   else None
+            hi = pd.Timestamp(sampai) if sampai else None
+        except ValueError:
+            raise ValueError("dari / sampai harus berformat YYYY-MM-DD.") from None
+        tanggal = self.df["tanggal"]
+        mask = tanggal.notna()
+        if lo is not None:
+            mask &= tanggal >= lo
+        if hi is not None:
+            mask &= tanggal <= hi
+        return mask.to_numpy()
+
+    def _text_mask(self, q: str) -> np.ndarray:
+        positions = search_index.search(q, self.layout)
+        if positions is None:
+            return self.df["komentar"].str.contains(q, case=False, regex=False, na=False).to_numpy()
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[positions[positions < len(self.df)]] = True
+        return mask
+
+
+def _records(rows: pd.DataFrame) -> list[dict]:
+    """Baris halaman → list dict JSON (nilai kosong menjadi None)."""
+    out = pd.DataFrame({
+        "tanggal":  rows["tanggal"].dt.strftime("%Y-%m-%d"),
+        "platform": rows["platform"].astype(object),
+        "sentimen": rows["sentimen"].astype(object),
+        "komentar": rows["komentar"].astype(object),
+        "likes":    rows["likes"].astype(int),
+    })
+    return out.astype(object).where(out.notna(), None).to_dict(orient="records")
+
+# ── Cache per versi data ──────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_cached: tuple[tuple | None, CommentIndex | None] = (None, None)
+
+
+def get_index() -> CommentIndex:
+    """Indeks untuk versi data saat ini; dibangun ulang jika data berubah."""
+    global _cached
+    version = storage.data_version()
+    with _lock:
+        if version is not None and _cached[0] == version:
+            return _cached[1]
+
+        layout = storage.layout_version()
+        df     = storage.load() if storage.exists() else storage.empty_frame()
+        index  = CommentIndex(df, layout)
+        _cached = (version, index) if version == storage.data_version() else (None, None)
+        logger.info("Indeks komentar dibangun: %d baris.", len(df))
+        return index
+
+
+def query(**params) -> dict:
+    """Pintasan: get_index().query(**params)."""
+    return get_index().query(**params)
@@ -0,0 +1,256 @@
+"""
+dedup_index.py — Indeks hash komentar persisten untuk deteksi duplikat
+======================================================================
+Menyimpan hash 64-bit dari teks komentar yang sudah dinormalisasi di tabel
+SQLite, sehingga pengecekan duplikat saat ingest cukup lookup per baris
+(tanpa membaca ulang seluruh data). Dipakai oleh semua jalur penulisan data
+(ingest.py untuk scraper, generate_data_dummy.py).
+
+Kunci dedup diatur lewat environment variable DEDUP_MODE:
+  komentar                   (default) — komentar yang sama = duplikat
+  komentar+platform+tanggal  — duplikat hanya jika platform & tanggal juga sama
+
+Pemakaian CLI:
+  python dedup_index.py --stats     # ukuran indeks & hit rate
+  python dedup_index.py --rebuild   # bangun ulang dari data yang tersimpan
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+import storage
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+INDEX_PATH = storage.DATA_DIR / "dedup_index.sqlite"
+
+VALID_MODES = {"komentar", "komentar+platform+tanggal"}
+DEDUP_MODE  = os.environ.get("DEDUP_MODE", "komentar")
+
+# Batas parameter per query SQLite (aman untuk semua versi)
+_CHUNK = 500
+
+# ── Hash ──────────────────────────────────────────────────────────────────────
+
+def normalize_text(text) -> str:
+    """Normalisasi komentar untuk dedup: huruf kecil, spasi dirapikan."""
+    return " ".join(str(text).lower().split())
+
+
+def text_hash(text) -> int:
+    """Hash 64-bit (signed, muat di INTEGER SQLite) dari komentar ternormalisasi."""
+    digest = hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def row_hashes(df: pd.DataFrame, mode: str = DEDUP_MODE) -> list[int]:
+    """
+    Hash kunci dedup untuk setiap baris DataFrame (sudah dinormalisasi storage).
+    Pada mode komentar+platform+tanggal, platform & tanggal ikut di-hash.
+    """
+    if mode == "komentar":
+        return [text_hash(k) for k in df["komentar"]]
+
+    tanggal = df["tanggal"].dt.strftime("%Y-%m-%d").fillna("")
+    return [
+        text_hash(f"{k}\x1f{str(p).lower()}\x1f{t}")
+        for k, p, t in zip(df["komentar"], df["platform"], tanggal)
+    ]
+
+
+def drop_duplicate_rows(df: pd.DataFrame, mode: str = DEDUP_MODE) -> tuple[pd.DataFrame, list[int]]:
+    """
+    Buang duplikat di dalam satu DataFrame (simpan kemunculan pertama).
+    Kembalikan (DataFrame unik, hash kunci tiap baris yang tersisa).
+    """
+    hashes = pd.Series(row_hashes(df, mode), index=df.index)
+    keep   = ~hashes.duplicated()
+    return df[keep], hashes[keep].tolist()
+
+# ── Indeks ────────────────────────────────────────────────────────────────────
+
+class DedupIndex:
+    """
+    Indeks hash komentar di SQLite. Dipakai sebagai context manager:
+
+        with DedupIndex() as index:
+            baru = index.filter_new(hashes)
+            ...
+            index.add(baru)         # commit saat keluar dari blok tanpa error
+
+    Counter lookup & hit disimpan persisten di tabel meta untuk menghitung hit rate.
+    """
+
+    def __init__(self, path: Path = INDEX_PATH, mode: str = DEDUP_MODE):
+        if mode not in VALID_MODES:
+            raise ValueError(f"DEDUP_MODE tidak valid: {mode!r}. Pilihan: {VALID_MODES}")
+
+        self.path = path
+        self.mode = mode
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS komentar_hash (h INTEGER PRIMARY KEY)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+
+        # Cek mode & rebuild dalam satu transaksi tulis: proses lain yang
+        # membuka indeks bersamaan menunggu, lalu melihat meta mode yang sudah
+        # terisi. Meta mode baru ditulis bersama isi indeks, sehingga rebuild
+        # yang gagal di tengah jalan tidak meninggalkan indeks yang dikira lengkap.
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            stored_mode = self._get_meta("mode")
+            if stored_mode != mode:
+                if stored_mode is not None:
+                    logger.warning(
+                        "Mode indeks dedup berubah (%s → %s), indeks dibangun ulang.",
+                        stored_mode, mode,
+                    )
+                self.rebuild()
+            else:
+                self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            self.conn.close()
+            raise
+
+    def __enter__(self) -> "DedupIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+
+    # ── Meta ──────────────────────────────────────────────────────────────────
+
+    def _get_meta(self, key: str, default: str | None = None) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    # ── Operasi indeks ────────────────────────────────────────────────────────
+
+    def rebuild(self) -> int:
+        """Bangun ulang indeks dari data yang tersimpan. Kembalikan jumlah hash."""
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        df = (
+            storage.read_hasil(columns=["tanggal", "platform", "komentar"])
+            if storage.exists() else storage.empty_frame()
+        )
+        df = df[df["komentar"].notna()]
+        self.reset(row_hashes(df, self.mode))
+        self.conn.commit()
+        logger.info("Indeks dedup (%s) dibangun dari %d komentar.", self.mode, len(df))
+        return len(df)
+
+    def reset(self, hashes) -> None:
+        """Ganti seluruh isi indeks dengan hash yang diberikan (counter di-nol-kan)."""
+        self.conn.execute("DELETE FROM komentar_hash")
+        self.add(hashes)
+        self._set_meta("mode", self.mode)
+        self._set_meta("lookups", 0)
+        self._set_meta("hits", 0)
+
+    def filter_new(self, hashes: list[int]) -> list[bool]:
+        """Untuk setiap hash, True jika belum ada di indeks."""
+        known: set[int] = set()
+        for i in range(0, len(hashes), _CHUNK):
+            chunk = hashes[i:i + _CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT h FROM komentar_hash WHERE h IN ({placeholders})", chunk
+            )
+            known.update(h for (h,) in rows)
+
+        result = [h not in known for h in hashes]
+        hits   = len(result) - sum(result)
+        self._set_meta("lookups", int(self._get_meta("lookups", "0")) + len(result))
+        self._set_meta("hits",    int(self._get_meta("hits", "0")) + hits)
+        return result
+
+    def add(self, hashes) -> None:
+        """Tambahkan hash ke indeks (hash yang sudah ada diabaikan)."""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO komentar_hash (h) VALUES (?)",
+            ((h,) for h in hashes),
+        )
+
+    def stats(self) -> dict:
+        """Ukuran indeks & hit rate kumulatif sejak rebuild terakhir."""
+        size    = self.conn.execute("SELECT COUNT(*) FROM komentar_hash").fetchone()[0]
+        lookups = int(self._get_meta("lookups", "0"))
+        hits    = int(self._get_meta("hits", "0"))
+        return {
+            "mode":       self.mode,
+            "size":       size,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "lookups":    lookups,
+            "hits":       hits,
+            "hit_rate":   hits / lookups if lookups else 0.0,
+        }
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Kelola indeks dedup komentar JKT48."
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Bangun ulang indeks dari data yang tersimpan",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Tampilkan ukuran indeks & hit rate",
+    )
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        with DedupIndex() as index:
+            if args.rebuild:
+                index.rebuild()
+            if args.stats or not args.rebuild:
+                s = index.stats()
+                logger.info(
+                    "Indeks dedup (%s): %d hash, %.1f KB | lookup=%d hit=%d (hit rate %.1f%%)",
+                    s["mode"], s["size"], s["file_bytes"] / 1024,
+                    s["lookups"], s["hits"], s["hit_rate"] * 100,
+                )
+    except Exception as exc:
+        logger.error("Operasi indeks dedup gagal: %s", exc)
+        raise SystemExit(1)
+
+    raise SystemExit(0)
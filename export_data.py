@@ -0,0 +1,267 @@
+"""
+export_data.py — Ekspor data komentar dalam beberapa format
+===========================================================
+Dipakai oleh endpoint /export/<format> (app.py). Semua format dibuat dari
+rangkaian batch yang sama (storage.iter_rows): filter platform / sentimen
+seperti dashboard dan pilihan kolom.
+
+Format:
+  csv      : CSV (sama dengan export_csv)           — di-stream per batch
+  csv.gz   : CSV terkompresi gzip                   — di-stream per batch
+  ndjson   : satu objek JSON per baris              — di-stream per batch
+  arrow    : Arrow IPC stream (tipe kolom terjaga)  — di-stream per batch
+  parquet  : Parquet (tipe kolom terjaga)           — file cache per versi data
+
+Parquet butuh footer di akhir file sehingga tidak bisa dikirim sambil ditulis.
+File dibangun sekali per (versi data, filter, kolom) di data/ekspor/ lalu
+dikirim dengan send_file; request berikutnya dengan kunci yang sama langsung
+memakai file cache.
+
+Pemakaian CLI:
+  python export_data.py parquet out.parquet --platform twitter --kolom tanggal,komentar
+  python export_data.py --clear     # hapus cache ekspor
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import storage
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+CACHE_DIR = storage.DATA_DIR / "ekspor"
+
+# Jumlah file cache Parquet yang disimpan (terbaru dipakai lebih dulu)
+MAX_CACHE_FILES = 20
+
+FORMATS = {
+    "csv":     {"mimetype": "text/csv",                             "cached": False},
+    "csv.gz":  {"mimetype": "application/gzip",                     "cached": False},
+    "ndjson":  {"mimetype": "application/x-ndjson",                 "cached": False},
+    "arrow":   {"mimetype": "application/vnd.apache.arrow.stream",  "cached": False},
+    "parquet": {"mimetype": "application/vnd.apache.parquet",       "cached": True},
+}
+
+# ── Parameter ─────────────────────────────────────────────────────────────────
+
+def parse_columns(value: str | None) -> list[str] | None:
+    """
+    Daftar kolom dipisah koma (mis. "tanggal,komentar") → list kolom urut
+    seperti input. None / kosong = semua kolom. Raise ValueError untuk kolom
+    yang tidak dikenal.
+    """
+    if not value:
+        return None
+    columns = list(dict.fromkeys(c.strip().lower() for c in value.split(",") if c.strip()))
+    unknown = [c for c in columns if c not in storage.COLUMNS]
+    if unknown:
+        raise ValueError(
+            f"Kolom tidak dikenal: {', '.join(unknown)}. Pilihan: {', '.join(storage.COLUMNS)}"
+        )
+    return columns or None
+
+
+def filename(fmt: str) -> str:
+    return f"laporan_sentimen_jkt48.{fmt}"
+
+# ── Format stream ─────────────────────────────────────────────────────────────
+
+def iter_ndjson(
+    columns: list[str] | None = None, platform: str | None = None, sentimen: str | None = None,
+) -> Iterator[bytes]:
+    """Satu objek JSON per baris (tanggal YYYY-MM-DD, nilai kosong = null)."""
+    for df in storage.iter_rows(columns, platform, sentimen):
+        if "tanggal" in df:
+            df = df.assign(tanggal=df["tanggal"].dt.strftime("%Y-%m-%d"))
+        text = df.to_json(orient="records", lines=True, force_ascii=False)
+        yield (text if text.endswith("\n") else text + "\n").encode("utf-8")
+
+
+def _arrow_schema(columns: list[str] | None) -> pa.Schema:
+    return pa.schema([storage.SCHEMA.field(c) for c in columns or storage.COLUMNS])
+
+
+def _to_arrow(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def iter_arrow(
+    columns: list[str] | None = None, platform: str | None = None, sentimen: str | None = None,
+) -> Iterator[bytes]:
+    """
+    Arrow IPC stream, dibaca dengan pyarrow.ipc.open_stream(f).read_pandas().
+    Satu record batch per batch data; tipe kolom (date32, kategori, int32) terjaga.
+    """
+    schema = _arrow_schema(columns)
+    sink   = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for df in storage.iter_rows(columns, platform, sentimen):
+            writer.write_table(_to_arrow(df, schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()         # penanda akhir stream
+
+
+def stream(
+    fmt: str, columns: list[str] | None = None,
+    platform: str | None = None, sentimen: str | None = None,
+) -> Iterator[bytes]:
+    """Potongan bytes untuk format stream (lihat FORMATS)."""
+    if fmt in ("csv", "csv.gz"):
+        return storage.iter_csv(columns, platform, sentimen, compress=fmt == "csv.gz")
+    if fmt == "ndjson":
+        return iter_ndjson(columns, platform, sentimen)
+    if fmt == "arrow":
+        return iter_arrow(columns, platform, sentimen)
+    raise ValueError(f"Format tidak di-stream: {fmt!r}")
+
+# ── Parquet (cache file) ──────────────────────────────────────────────────────
+
+# Lock per kunci cache: request dengan kunci sama menunggu satu penulisan,
+# kunci berbeda ditulis paralel. _locks_guard hanya menjaga dict _locks.
+_locks_guard = threading.Lock()
+_locks: dict[str, threading.Lock] = {}
+
+
+def cache_key(fmt: str, columns: list[str] | None, platform: str | None, sentimen: str | None) -> str:
+    """Kunci cache dari versi data + format + filter + kolom."""
+    key = json.dumps([
+        storage.data_version(), fmt, columns,
+        (platform or "").lower(), (sentimen or "").lower(),
+    ])
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def write_parquet(
+    path: Path, columns: list[str] | None = None,
+    platform: str | None = None, sentimen: str | None = None,
+) -> int:
+    """Tulis data terfilter ke Parquet secara atomik, per batch. Kembalikan jumlah baris."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp    = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    schema = _arrow_schema(columns)
+    n_rows = 0
+    try:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            for df in storage.iter_rows(columns, platform, sentimen):
+                writer.write_table(_to_arrow(df, schema))
+                n_rows += len(df)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, path)
+    return n_rows
+
+
+def _prune(keep: Path) -> None:
+    """Hapus file cache terlama di atas MAX_CACHE_FILES (keep tidak pernah dihapus)."""
+    def mtime(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:       # dihapus _prune request lain
+            return 0.0
+
+    files = sorted(CACHE_DIR.glob("*.parquet"), key=mtime, reverse=True)
+    for path in [p for p in files if p != keep][MAX_CACHE_FILES - 1:]:
+        path.unlink(missing_ok=True)
+
+
+def cached_parquet(
+    columns: list[str] | None = None, platform: str | None = None, sentimen: str | None = None,
+) -> Path:
+    """
+    File Parquet untuk versi data & filter saat ini; dibangun jika belum ada di
+    cache. Hanya request dengan kunci yang sama yang saling menunggu.
+    """
+    key  = cache_key("parquet", columns, platform, sentimen)
+    path = CACHE_DIR / f"{key}.parquet"
+    if path.exists():
+        os.utime(path)              # tandai baru dipakai (untuk _prune)
+        return path
+
+    with _locks_guard:
+        lock = _locks.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            if path.exists():       # sudah dibangun request lain selama menunggu
+                return path
+            n_rows = write_parquet(path, columns, platform, sentimen)
+            logger.info("Cache ekspor Parquet dibuat: %s (%d baris).", path.name, n_rows)
+    finally:
+        with _locks_guard:
+            _locks.pop(key, None)
+    _prune(path)
+    return path
+
+
+def clear_cache() -> None:
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Ekspor data sentimen JKT48 ke CSV / NDJSON / Arrow / Parquet."
+    )
+    parser.add_argument("format", nargs="?", choices=list(FORMATS), help="Format ekspor")
+    parser.add_argument("output", nargs="?", type=str, help="Path file hasil")
+    parser.add_argument("--platform", type=str, default=None, help="Filter platform")
+    parser.add_argument("--sentimen", type=str, default=None, help="Filter sentimen")
+    parser.add_argument(
+        "--kolom", type=str, default=None,
+        help=f"Kolom dipisah koma (default semua: {','.join(storage.COLUMNS)})",
+    )
+    parser.add_argument("--clear", action="store_true", help="Hapus cache ekspor Parquet")
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.clear:
+        clear_cache()
+        logger.info("Cache ekspor dihapus: %s", CACHE_DIR)
+
+    if args.format:
+        if not args.output:
+            logger.error("Path output wajib diisi.")
+            raise SystemExit(1)
+        try:
+            columns = parse_columns(args.kolom)
+            out     = Path(args.output)
+            if args.format == "parquet":
+                write_parquet(out, columns, args.platform, args.sentimen)
+            else:
+                with out.open("wb") as f:
+                    for chunk in stream(args.format, columns, args.platform, args.sentimen):
+                        f.write(chunk)
+            logger.info("✅ Data diekspor ke %s", out)
+        except Exception as exc:
+            logger.error("Gagal ekspor %s: %s", args.format, exc)
+            raise SystemExit(1)
+
+    raise SystemExit(0)
@@ -6,21 +6,34 @@ Perbaikan dari versi sebelumnya:
     tanpa langsung menjalankan proses (sebelumnya berbahaya jika di-import)
   - Font Unicode (DejaVu) menggantikan Arial agar karakter non-Latin aman
   - Validasi keberadaan file gambar sebelum di-embed (tidak crash)
-  - Baca statistik langsung dari hasil.csv dan tampilkan di PDF
+  - Baca statistik langsung dari data (storage) dan tampilkan di PDF
   - Header & footer per halaman (nomor halaman)
   - Semua path pakai pathlib.Path (lintas OS)
   - Logging menggantikan print
-  - Return True/False sehingga pemanggil tahu berhasil/gagal
+  - generate_pdf() mengembalikan bytes PDF (None jika gagal) dan dipanggil
+    langsung di proses web app (/export/pdf), tanpa subprocess & tanpa file
+    bersama. Hasil di-cache per versi data + fingerprint file grafik, sehingga
+    unduhan berulang dilayani langsung dari memori. Header menampilkan waktu
+    data terakhir ditulis (bukan waktu render), sehingga laporan dari cache
+    tetap akurat.
+
+Pemakaian CLI:
+  python export_pdf.py            # tulis laporan ke laporan.pdf
 """
 
-import csv
+import hashlib
+import json
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from fpdf import FPDF
 
+import rollup
+import storage
+
 # ── Logging ───────────────────────────────────────────────────────────────────
 
 logging.basicConfig(
@@ -33,18 +46,28 @@ logger = logging.getLogger(__name__)
 
 BASE_DIR    = Path(__file__).parent
 STATIC_DIR  = BASE_DIR / "static"
-DATA_DIR    = BASE_DIR / "data"
-HASIL_CSV   = DATA_DIR / "hasil.csv"
 OUTPUT_PDF  = BASE_DIR / "laporan.pdf"
+FONT_DIR    = STATIC_DIR / "fonts"
+
+# Grafik yang di-embed (dibuat oleh generate_visual.py)
+CHART_FILES = {
+    "pie":       STATIC_DIR / "pieChart.png",
+    "bar":       STATIC_DIR / "barChart.png",
+    "trend":     STATIC_DIR / "trend.png",
+    "wordcloud": STATIC_DIR / "wordcloud.png",
+}
+
+# Jumlah PDF yang disimpan di cache in-process (kunci berbeda per versi data)
+CACHE_SIZE = 4
 
 # ── PDF Class ─────────────────────────────────────────────────────────────────
 
 class LaporanPDF(FPDF):
     """FPDF dengan header, footer, dan helper styling yang konsisten."""
 
-    def __init__(self, generated_at: str):
+    def __init__(self, data_as_of: str):
         super().__init__()
-        self.generated_at = generated_at
+        self.data_as_of = data_as_of
         self._setup_fonts()
 
     def _setup_fonts(self):
@@ -52,7 +75,7 @@ class LaporanPDF(FPDF):
         Coba daftarkan DejaVu (Unicode) jika tersedia.
         Fallback ke Helvetica (built-in) agar tetap berjalan meski font tidak ada.
         """
-        dejavu_path = STATIC_DIR / "fonts"
+        dejavu_path = FONT_DIR
         regular = dejavu_path / "DejaVuSans.ttf"
         bold    = dejavu_path / "DejaVuSans-Bold.ttf"
 
@@ -84,7 +107,7 @@ class LaporanPDF(FPDF):
 
         self.set_font(self._font_family, "", 9)
         self.set_text_color(140, 140, 160)
-        self.cell(0, 6, f"Dibuat: {self.generated_at}", align="C", new_x="LMARGIN", new_y="NEXT")
+        self.cell(0, 6, f"Data per: {self.data_as_of}", align="C", new_x="LMARGIN", new_y="NEXT")
         self.ln(4)
 
     def footer(self):
@@ -153,121 +176,170 @@ class LaporanPDF(FPDF):
 
 # ── Fungsi utama ──────────────────────────────────────────────────────────────
 
-def generate_pdf() -> bool:
+def build_pdf() -> bytes:
     """
-    Buat laporan PDF dan simpan ke OUTPUT_PDF.
-    Kembalikan True jika berhasil, False jika gagal.
+    Render laporan PDF dari agregat & file grafik saat ini.
+    Exception diteruskan ke pemanggil (lihat generate_pdf).
     """
-    generated_at = datetime.now().strftime("%d %B %Y, %H:%M WIB")
-
-    # ── Baca statistik dari CSV ────────────────────────────────────────────
+    # Waktu data terakhir ditulis — bagian dari kunci cache (storage.data_version),
+    # berbeda dengan waktu render yang akan basi saat laporan dilayani dari cache
+    version    = storage.data_version()
+    data_as_of = (
+        datetime.fromtimestamp(max(mtime for _, mtime, _, _ in version) / 1e9)
+        .strftime("%d %B %Y, %H:%M WIB") if version else "-"
+    )
+
+    # ── Baca statistik dari data ───────────────────────────────────────────
     stats = {"positif": 0, "netral": 0, "negatif": 0, "total": 0}
     platform_counts: dict[str, int] = {}
 
-    if HASIL_CSV.exists():
+    if storage.exists():
         try:
-            df = pd.read_csv(HASIL_CSV)
-            if "sentimen" in df.columns:
-                df["sentimen"] = df["sentimen"].str.lower().str.strip()
-                stats["positif"] = int((df["sentimen"] == "positif").sum())
-                stats["netral"]  = int((df["sentimen"] == "netral").sum())
-                stats["negatif"] = int((df["sentimen"] == "negatif").sum())
-                stats["total"]   = len(df)
-            if "platform" in df.columns:
-                platform_counts = df["platform"].value_counts().to_dict()
+            # Agregat harian: O(hari × platform × sentimen) baris, bukan O(komentar)
+            agg = rollup.load()
+            by_sentimen = agg.groupby("sentimen", observed=True)["n"].sum()
+            stats["positif"] = int(by_sentimen.get("positif", 0))
+            stats["netral"]  = int(by_sentimen.get("netral", 0))
+            stats["negatif"] = int(by_sentimen.get("negatif", 0))
+            stats["total"]   = int(agg["n"].sum())
+            platform_counts = (
+                agg.groupby("platform", observed=True)["n"].sum()
+                .sort_values(ascending=False).to_dict()
+            )
         except Exception as exc:
-            logger.warning("Gagal membaca CSV untuk statistik: %s", exc)
+            logger.warning("Gagal membaca data untuk statistik: %s", exc)
     else:
-        logger.warning("CSV tidak ditemukan, statistik akan kosong.")
+        logger.warning("Data tidak ditemukan, statistik akan kosong.")
 
     pct = lambda n: f"{(n / stats['total'] * 100):.1f}%" if stats["total"] > 0 else "-"
 
     # ── Buat PDF ──────────────────────────────────────────────────────────
-    try:
-        pdf = LaporanPDF(generated_at)
-        pdf.alias_nb_pages()   # aktifkan {nb} untuk total halaman di footer
-        pdf.set_auto_page_break(auto=True, margin=18)
-        pdf.add_page()
-
-        # ── 1. Ringkasan statistik ─────────────────────────────────────
-        pdf.section_title("1. Ringkasan Statistik Sentimen")
-
-        pdf.stat_row("Total komentar dianalisis :", str(stats["total"]))
-        pdf.stat_row("Sentimen Positif :",
-                     f"{stats['positif']} komentar  ({pct(stats['positif'])})",
-                     color=(20, 160, 110))
-        pdf.stat_row("Sentimen Netral  :",
-                     f"{stats['netral']} komentar  ({pct(stats['netral'])})",
-                     color=(180, 140, 0))
-        pdf.stat_row("Sentimen Negatif :",
-                     f"{stats['negatif']} komentar  ({pct(stats['negatif'])})",
-                     color=(200, 60, 60))
-
-        if platform_counts:
-            pdf.ln(2)
-            for platform, count in platform_counts.items():
-                pdf.stat_row(f"  Platform - {platform} :", str(count))
-
-        pdf.ln(4)
-
-        # ── 2. Visualisasi pie & bar chart ────────────────────────────
-        pdf.section_title("2. Visualisasi Proporsi & Jumlah Sentimen")
-
-        # Tampilkan pie dan bar berdampingan jika memungkinkan
-        pie_path = STATIC_DIR / "pieChart.png"
-        bar_path = STATIC_DIR / "barChart.png"
-
-        if pie_path.exists() and bar_path.exists():
-            try:
-                x_start = pdf.get_x()
-                y_start = pdf.get_y()
-                pdf.image(str(pie_path), x=12,  y=y_start, w=88)
-                pdf.image(str(bar_path), x=108, y=y_start, w=88)
-                pdf.ln(72)
-            except Exception as exc:
-                logger.warning("Gagal embed chart berdampingan: %s", exc)
-                pdf.safe_image(pie_path, w=88, label="Pie Chart")
-                pdf.safe_image(bar_path, w=88, label="Bar Chart")
-        else:
+    pdf = LaporanPDF(data_as_of)
+    pdf.alias_nb_pages()   # aktifkan {nb} untuk total halaman di footer
+    pdf.set_auto_page_break(auto=True, margin=18)
+    pdf.add_page()
+
+    # ── 1. Ringkasan statistik ─────────────────────────────────────
+    pdf.section_title("1. Ringkasan Statistik Sentimen")
+
+    pdf.stat_row("Total komentar dianalisis :", str(stats["total"]))
+    pdf.stat_row("Sentimen Positif :",
+                 f"{stats['positif']} komentar  ({pct(stats['positif'])})",
+                 color=(20, 160, 110))
+    pdf.stat_row("Sentimen Netral  :",
+                 f"{stats['netral']} komentar  ({pct(stats['netral'])})",
+                 color=(180, 140, 0))
+    pdf.stat_row("Sentimen Negatif :",
+                 f"{stats['negatif']} komentar  ({pct(stats['negatif'])})",
+                 color=(200, 60, 60))
+
+    if platform_counts:
+        pdf.ln(2)
+        for platform, count in platform_counts.items():
+            pdf.stat_row(f"  Platform - {platform} :", str(count))
+
+    pdf.ln(4)
+
+    # ── 2. Visualisasi pie & bar chart ────────────────────────────
+    pdf.section_title("2. Visualisasi Proporsi & Jumlah Sentimen")
+
+    # Tampilkan pie dan bar berdampingan jika memungkinkan
+    pie_path = CHART_FILES["pie"]
+    bar_path = CHART_FILES["bar"]
+
+    if pie_path.exists() and bar_path.exists():
+        try:
+            x_start = pdf.get_x()
+            y_start = pdf.get_y()
+            pdf.image(str(pie_path), x=12,  y=y_start, w=88)
+            pdf.image(str(bar_path), x=108, y=y_start, w=88)
+            pdf.ln(72)
+        except Exception as exc:
+            logger.warning("Gagal embed chart berdampingan: %s", exc)
             pdf.safe_image(pie_path, w=88, label="Pie Chart")
             pdf.safe_image(bar_path, w=88, label="Bar Chart")
+    else:
+        pdf.safe_image(pie_path, w=88, label="Pie Chart")
+        pdf.safe_image(bar_path, w=88, label="Bar Chart")
+
+    # ── 3. Tren harian ────────────────────────────────────────────
+    pdf.add_page()
+    pdf.section_title("3. Tren Sentimen Harian")
+    pdf.safe_image(CHART_FILES["trend"], label="Grafik Tren")
+
+    # ── 4. Word cloud ──────────────────────────────────────────────
+    pdf.section_title("4. Word Cloud Komentar Fanbase")
+    pdf.safe_image(CHART_FILES["wordcloud"], label="Word Cloud")
+
+    # ── 5. Disclaimer etika ────────────────────────────────────────
+    pdf.add_page()
+    pdf.section_title("5. Pernyataan Etika & Privasi")
+    pdf.body_text(
+        "Data yang digunakan dalam laporan ini bersumber dari postingan publik di "
+        "media sosial (Twitter/X dan Instagram) dan telah melalui proses anonimisasi "
+        "penuh. Tidak ada informasi identitas personal (nama akun, foto profil, atau "
+        "data pribadi lainnya) yang disimpan maupun ditampilkan dalam sistem ini.\n\n"
+        "Analisis sentimen dilakukan secara otomatis menggunakan model machine learning "
+        "dan bersifat indikatif. Hasil klasifikasi dapat mengandung ketidakakuratan "
+        "dan tidak dimaksudkan sebagai representasi resmi opini publik.\n\n"
+        "Sistem ini dikembangkan sesuai prinsip etika riset digital dan pedoman "
+        "perlindungan data pribadi yang berlaku."
+    )
+
+    return bytes(pdf.output())
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_cache: OrderedDict[str, bytes] = OrderedDict()
+
+
+def _fingerprint(path: Path) -> tuple | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (path.name, st.st_mtime_ns, st.st_size)
+
+
+def cache_key() -> str:
+    """
+    Kunci laporan: versi data (statistik) + fingerprint file grafik & font yang
+    di-embed. Dihitung dari stat file saja, tanpa membaca isi.
+    """
+    inputs = [*CHART_FILES.values(), *sorted(FONT_DIR.glob("*.ttf"))]
+    key = json.dumps([storage.data_version(), [_fingerprint(p) for p in inputs]])
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
 
-        # ── 3. Tren harian ────────────────────────────────────────────
-        pdf.add_page()
-        pdf.section_title("3. Tren Sentimen Harian")
-        pdf.safe_image(STATIC_DIR / "trend.png", label="Grafik Tren")
-
-        # ── 4. Word cloud ──────────────────────────────────────────────
-        pdf.section_title("4. Word Cloud Komentar Fanbase")
-        pdf.safe_image(STATIC_DIR / "wordcloud.png", label="Word Cloud")
-
-        # ── 5. Disclaimer etika ────────────────────────────────────────
-        pdf.add_page()
-        pdf.section_title("5. Pernyataan Etika & Privasi")
-        pdf.body_text(
-            "Data yang digunakan dalam laporan ini bersumber dari postingan publik di "
-            "media sosial (Twitter/X dan Instagram) dan telah melalui proses anonimisasi "
-            "penuh. Tidak ada informasi identitas personal (nama akun, foto profil, atau "
-            "data pribadi lainnya) yang disimpan maupun ditampilkan dalam sistem ini.\n\n"
-            "Analisis sentimen dilakukan secara otomatis menggunakan model machine learning "
-            "dan bersifat indikatif. Hasil klasifikasi dapat mengandung ketidakakuratan "
-            "dan tidak dimaksudkan sebagai representasi resmi opini publik.\n\n"
-            "Sistem ini dikembangkan sesuai prinsip etika riset digital dan pedoman "
-            "perlindungan data pribadi yang berlaku."
-        )
-
-        # ── Simpan ────────────────────────────────────────────────────
-        pdf.output(str(OUTPUT_PDF))
-        logger.info("✅ PDF berhasil dibuat: %s", OUTPUT_PDF)
-        return True
-
-    except Exception as exc:
-        logger.error("Gagal membuat PDF: %s", exc, exc_info=True)
-        return False
+
+def generate_pdf() -> bytes | None:
+    """
+    Laporan PDF sebagai bytes, dari cache jika data & grafik belum berubah sejak
+    laporan terakhir dibuat. Kembalikan None jika gagal.
+    """
+    key = cache_key()
+    with _lock:                 # request bersamaan untuk kunci yang sama cukup dirender sekali
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+        try:
+            pdf = build_pdf()
+        except Exception as exc:
+            logger.error("Gagal membuat PDF: %s", exc, exc_info=True)
+            return None
+        _cache[key] = pdf
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    logger.info("✅ PDF dibuat (%.1f KB).", len(pdf) / 1024)
+    return pdf
 
 
 # ── Entry point ───────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    success = generate_pdf()
-    raise SystemExit(0 if success else 1)
\ No newline at end of file
+    pdf = generate_pdf()
+    if pdf is None:
+        raise SystemExit(1)
+    OUTPUT_PDF.write_bytes(pdf)
+    logger.info("✅ PDF disimpan: %s", OUTPUT_PDF)
+    raise SystemExit(0)
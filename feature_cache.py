@@ -0,0 +1,323 @@
+"""
+feature_cache.py — Cache vektor fitur sparse per komentar di disk
+=================================================================
+Menyimpan hasil HashingVectorizer (backend fitur "hashing") per baris, dengan
+kunci hash teks komentar yang sudah dibersihkan. Refit & evaluasi model cukup
+merangkai matriks dari cache, hanya komentar baru yang perlu ditokenisasi.
+
+Vektor per baris hanya stabil untuk vectorizer tanpa state (hashing), sehingga
+cache ini HANYA dipakai dengan backend fitur hashing (classify_sentimen.py
+--features hashing / FEATURE_BACKEND=hashing, dan mode --stream). Backend
+default TF-IDF dengan vocabulary tidak memakai cache ini.
+
+Struktur di disk:
+  data/fitur/<versi vectorizer>/shard-<id>/keys.npy     hash teks (int64)
+                                           indptr.npy   \
+                                           indices.npy   > matriks CSR
+                                           data.npy     /
+
+Versi vectorizer = hash parameter vectorizer, jadi perubahan ngram_range /
+n_features otomatis memakai direktori cache baru. Array disimpan sebagai .npy
+tanpa kompresi supaya bisa di-mmap (berkas .npz tidak bisa di-mmap).
+
+Ukuran cache dibatasi: per versi paling banyak MAX_ROWS baris (shard terlama
+dibuang lebih dulu), dan direktori versi vectorizer lain yang tidak dipakai
+selama MAX_AGE_DAYS hari dihapus.
+
+Pemakaian CLI:
+  python feature_cache.py --stats     # ukuran cache per versi vectorizer
+  python feature_cache.py --prune     # hapus versi vectorizer yang lama tidak dipakai
+  python feature_cache.py --clear     # hapus seluruh cache
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+import storage
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+CACHE_DIR = storage.DATA_DIR / "fitur"
+
+# Shard digabung menjadi satu jika jumlahnya melebihi batas ini
+MAX_SHARDS = 32
+
+# Baris maksimum per versi vectorizer; di atasnya shard terlama dibuang
+MAX_ROWS = int(os.environ.get("FEATURE_CACHE_MAX_ROWS", "2000000"))
+
+# Direktori versi vectorizer yang tidak dipakai selama ini dihapus
+MAX_AGE_DAYS = int(os.environ.get("FEATURE_CACHE_MAX_AGE_DAYS", "30"))
+
+_ARRAYS = ("keys", "indptr", "indices", "data")
+
+# ── Kunci ─────────────────────────────────────────────────────────────────────
+
+def vectorizer_version(vectorizer) -> str:
+    """Hash parameter vectorizer — vektor per baris hanya valid untuk versi yang sama."""
+    params = {k: repr(v) for k, v in sorted(vectorizer.get_params().items())}
+    payload = json.dumps({"class": type(vectorizer).__name__, "params": params})
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def text_key(text: str) -> int:
+    """Hash 64-bit (signed) dari teks bersih persis apa adanya."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+# ── Cache ─────────────────────────────────────────────────────────────────────
+
+class FeatureCache:
+    """
+    Cache vektor fitur untuk satu vectorizer tanpa state:
+
+        cache = FeatureCache(vectorizer)
+        X = cache.transform(teks_bersih)    # identik dengan vectorizer.transform
+
+    Indeks hash → (shard, baris) dibangun sekali per objek lalu diperbarui
+    inkremental untuk shard baru; shard di-mmap read-only.
+    """
+
+    def __init__(self, vectorizer, root: Path = CACHE_DIR):
+        self.vectorizer = vectorizer
+        self.version    = vectorizer_version(vectorizer)
+        self.dir        = root / self.version
+        self._shards: list[sp.csr_matrix] = []
+        self._shard_keys: list[np.ndarray] = []
+        self._paths: list[Path] = []
+
+        if self.dir.exists():
+            os.utime(self.dir)          # tandai versi ini masih dipakai (lihat prune)
+            for path in sorted(self.dir.glob("shard-*")):
+                try:
+                    self._open_shard(path)
+                except Exception as exc:
+                    logger.warning("Shard cache fitur %s rusak, diabaikan: %s", path.name, exc)
+        self._reindex()
+        prune(root, keep=self.version)
+
+    # ── Shard ─────────────────────────────────────────────────────────────────
+
+    def _open_shard(self, path: Path) -> None:
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        n_rows = len(arrays["keys"])
+        matrix = sp.csr_matrix(
+            (arrays["data"], arrays["indices"], arrays["indptr"]),
+            shape=(n_rows, self.vectorizer.n_features),
+            copy=False,
+        )
+        self._shards.append(matrix)
+        self._shard_keys.append(arrays["keys"])
+        self._paths.append(path)
+
+    def _write_shard(self, keys: np.ndarray, matrix: sp.csr_matrix) -> None:
+        name = f"shard-{time.time_ns()}-{os.getpid()}"
+        tmp  = self.dir / f".{name}.tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        np.save(tmp / "keys.npy", keys)
+        np.save(tmp / "indptr.npy", matrix.indptr)
+        np.save(tmp / "indices.npy", matrix.indices)
+        np.save(tmp / "data.npy", matrix.data)
+        tmp.replace(self.dir / name)
+        self._open_shard(self.dir / name)
+
+    def _reindex(self) -> None:
+        """
+        Bangun indeks terurut hash → (shard, baris) dari semua shard (saat
+        dibuka, setelah kompaksi / eviction). Hash ganda: kemunculan pertama dipakai.
+        """
+        if not self._shard_keys:
+            self._keys  = np.empty(0, dtype=np.int64)
+            self._shard = np.empty(0, dtype=np.int32)
+            self._row   = np.empty(0, dtype=np.int64)
+            return
+        keys  = np.concatenate(self._shard_keys)
+        shard = np.concatenate([np.full(len(k), i, dtype=np.int32) for i, k in enumerate(self._shard_keys)])
+        row   = np.concatenate([np.arange(len(k)) for k in self._shard_keys])
+        self._keys, first = np.unique(keys, return_index=True)
+        self._shard, self._row = shard[first], row[first]
+
+    def _merge_index(self, keys: np.ndarray) -> None:
+        """
+        Tambahkan hash shard terakhir (unik, belum ada di indeks) ke indeks
+        terurut: hanya hash baru yang diurutkan lalu disisipkan, indeks lama
+        tidak disusun ulang.
+        """
+        order = np.argsort(keys, kind="stable")
+        at    = np.searchsorted(self._keys, keys[order])
+        self._keys  = np.insert(self._keys, at, keys[order])
+        self._shard = np.insert(self._shard, at, np.int32(len(self._shards) - 1))
+        self._row   = np.insert(self._row, at, order)
+
+    def _lookup(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(posisi di indeks, mask ditemukan) untuk setiap hash."""
+        pos = np.searchsorted(self._keys, keys)
+        pos = np.minimum(pos, max(len(self._keys) - 1, 0))
+        found = self._keys[pos] == keys if len(self._keys) else np.zeros(len(keys), dtype=bool)
+        return pos, found
+
+    def compact(self) -> None:
+        """Gabungkan semua shard menjadi satu (baris ganda dibuang)."""
+        if len(self._shards) <= 1:
+            return
+        old_paths = list(self._paths)
+        keys   = self._keys.copy()
+        matrix = self._gather(np.arange(len(keys)))
+        self._shards, self._shard_keys, self._paths = [], [], []
+        self._write_shard(keys, matrix)
+        self._reindex()
+        for path in old_paths:
+            shutil.rmtree(path, ignore_errors=True)
+        logger.info("Cache fitur %s digabung menjadi 1 shard (%d baris).", self.version, len(keys))
+
+    def _evict(self, max_rows: int) -> None:
+        """Buang shard terlama sampai jumlah baris <= max_rows (shard terbaru selalu disimpan)."""
+        n_rows = sum(len(k) for k in self._shard_keys)
+        drop   = 0
+        while drop < len(self._shards) - 1 and n_rows > max_rows:
+            n_rows -= len(self._shard_keys[drop])
+            drop   += 1
+        if not drop:
+            return
+        old_paths = self._paths[:drop]
+        self._shards, self._shard_keys, self._paths = (
+            self._shards[drop:], self._shard_keys[drop:], self._paths[drop:],
+        )
+        self._reindex()
+        for path in old_paths:
+            shutil.rmtree(path, ignore_errors=True)
+        logger.info("Cache fitur %s: %d shard terlama dibuang (%d baris tersisa).", self.version, drop, n_rows)
+
+    # ── Baca ──────────────────────────────────────────────────────────────────
+
+    def _gather(self, pos: np.ndarray) -> sp.csr_matrix:
+        """Rangkai baris-baris indeks (urutan pos) menjadi satu matriks CSR."""
+        shard_ids = self._shard[pos]
+        rows      = self._row[pos]
+        parts, order = [], []
+        for sid in np.unique(shard_ids):
+            sel = np.flatnonzero(shard_ids == sid)
+            parts.append(self._shards[sid][rows[sel]])
+            order.append(sel)
+        stacked = sp.vstack(parts, format="csr")
+        order   = np.concatenate(order)
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        return stacked[inverse]
+
+    def transform(self, texts) -> sp.csr_matrix:
+        """
+        Vektor fitur untuk teks bersih, dari cache jika ada. Teks yang belum ada
+        di cache ditokenisasi lalu disimpan sebagai shard baru.
+        """
+        texts = list(texts)
+        if not texts:
+            return self.vectorizer.transform(texts)
+
+        keys = np.fromiter((text_key(t) for t in texts), dtype=np.int64, count=len(texts))
+        pos, found = self._lookup(keys)
+
+        if not found.all():
+            missing = np.flatnonzero(~found)
+            new_keys, first = np.unique(keys[missing], return_index=True)
+            new_rows = self.vectorizer.transform([texts[i] for i in missing[first]])
+            try:
+                self._write_shard(new_keys, new_rows)
+            except Exception as exc:
+                logger.warning("Cache fitur tidak bisa ditulis, dihitung langsung: %s", exc)
+                return self.vectorizer.transform(texts)
+            self._merge_index(new_keys)
+            pos, found = self._lookup(keys)
+
+        result = self._gather(pos)
+        # Perawatan setelah hasil dirangkai: eviction bisa membuang shard yang
+        # baru saja dipakai untuk hasil ini
+        if len(self._keys) > MAX_ROWS:
+            self._evict(MAX_ROWS)
+        if len(self._shards) > MAX_SHARDS:
+            self.compact()
+        return result
+
+
+def prune(root: Path = CACHE_DIR, keep: str | None = None, max_age_days: int = MAX_AGE_DAYS) -> int:
+    """
+    Hapus direktori versi vectorizer yang tidak dipakai selama max_age_days
+    hari (versi keep tidak pernah dihapus). Kembalikan jumlah versi yang dihapus.
+    """
+    if not root.exists():
+        return 0
+    cutoff  = time.time() - max_age_days * 86400
+    removed = 0
+    for path in root.iterdir():
+        if path.is_dir() and path.name != keep and path.stat().st_mtime < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info("Cache fitur: %d versi vectorizer lama dihapus.", removed)
+    return removed
+
+
+def transform(vectorizer, texts) -> sp.csr_matrix:
+    """Pintasan: FeatureCache(vectorizer).transform(texts)."""
+    return FeatureCache(vectorizer).transform(texts)
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Kelola cache vektor fitur komentar JKT48 (hanya backend hashing)."
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Tampilkan ukuran cache per versi vectorizer",
+    )
+    parser.add_argument(
+        "--prune", action="store_true",
+        help=f"Hapus versi vectorizer yang tidak dipakai > {MAX_AGE_DAYS} hari",
+    )
+    parser.add_argument(
+        "--clear", action="store_true",
+        help="Hapus seluruh cache fitur",
+    )
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        logger.info("✅ Cache fitur dihapus: %s", CACHE_DIR)
+    elif args.prune:
+        prune()
+    else:
+        versions = sorted(p for p in CACHE_DIR.glob("*") if p.is_dir()) if CACHE_DIR.exists() else []
+        if not versions:
+            logger.info("Cache fitur kosong.")
+        for path in versions:
+            shards = [s for s in path.glob("shard-*") if s.is_dir()]
+            rows   = sum(len(np.load(s / "keys.npy", mmap_mode="r")) for s in shards)
+            size   = sum(f.stat().st_size for s in shards for f in s.glob("*.npy"))
+            logger.info(
+                "Versi %s: %d baris, %d shard, %.1f MB", path.name, rows, len(shards), size / 1e6,
+            )
+
+    raise SystemExit(0)
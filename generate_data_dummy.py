@@ -1,5 +1,4 @@
 import argparse
-import csv
 import logging
 import random
 from datetime import datetime, timedelta
@@ -7,6 +6,9 @@ from pathlib import Path
 
 import pandas as pd
 
+import storage
+from dedup_index import DedupIndex, row_hashes
+
 # ── Logging ───────────────────────────────────────────────────────────────────
 
 logging.basicConfig(
@@ -17,8 +19,7 @@ logger = logging.getLogger(__name__)
 
 # ── Konstanta ─────────────────────────────────────────────────────────────────
 
-DATA_DIR    = Path(__file__).parent / "data"
-OUTPUT_CSV  = DATA_DIR / "hasil.csv"
+OUTPUT_PATH = storage.HASIL_PARQUET
 
 PLATFORMS   = ["Twitter", "Instagram"]
 
@@ -136,7 +137,7 @@ def generate_data(
             # Baris tanpa label: komentar diambil acak dari semua kelas
             all_comments = [c for lst in COMMENTS.values() for c in lst]
             comment   = rng.choice(all_comments)
-            sentiment = None   # NaN di CSV — akan diklasifikasi oleh classify_sentimen.py
+            sentiment = None   # NaN — akan diklasifikasi oleh classify_sentimen.py
 
         rows.append({
             "tanggal":  date,
@@ -150,22 +151,29 @@ def generate_data(
     return df
 
 
-def save_csv(df: pd.DataFrame, output_path: Path = OUTPUT_CSV) -> bool:
+def save_data(df: pd.DataFrame, output_path: Path = OUTPUT_PATH) -> bool:
     """
-    Simpan DataFrame ke CSV.
-    Sentimen None/NaN disimpan sebagai string kosong agar mudah dibaca.
+    Simpan DataFrame ke storage (Parquet), menggantikan data yang ada.
+    Baris ditulis apa adanya — teks dummy sengaja berulang (COMMENTS hanya
+    berisi beberapa puluh kalimat), jadi tidak di-dedup. Indeks dedup diisi
+    ulang dengan hash data baru agar ingest berikutnya tetap konsisten.
+    Jika output_path berakhiran .csv, data diekspor sebagai CSV
+    (sentimen None/NaN disimpan sebagai string kosong).
     Kembalikan True jika berhasil.
     """
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        df.to_csv(
-            output_path,
-            index=False,
-            quoting=csv.QUOTE_ALL,
-            encoding="utf-8",
-            na_rep="",     # NaN → string kosong di CSV
-        )
+        df = storage.normalize(df)
+
+        if output_path.suffix.lower() == ".csv":
+            storage.export_csv(df, output_path)
+        elif output_path.resolve() == storage.HASIL_PARQUET.resolve():
+            with DedupIndex() as index:
+                storage.write_hasil(df, replaces=storage.list_segments())   # data lama diganti
+                index.reset(row_hashes(df[df["komentar"].notna()]))
+        else:
+            storage.write_hasil(df, output_path)
         labeled   = df["sentimen"].notna().sum()
         unlabeled = df["sentimen"].isna().sum()
         logger.info(
@@ -179,7 +187,7 @@ def save_csv(df: pd.DataFrame, output_path: Path = OUTPUT_CSV) -> bool:
         )
         return True
     except Exception as exc:
-        logger.error("Gagal menyimpan CSV: %s", exc)
+        logger.error("Gagal menyimpan data: %s", exc)
         return False
 
 
@@ -216,8 +224,8 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--output",
-        type=str, default=str(OUTPUT_CSV),
-        help=f"Path output CSV (default: {OUTPUT_CSV})",
+        type=str, default=str(OUTPUT_PATH),
+        help=f"Path output Parquet, atau .csv untuk ekspor CSV (default: {OUTPUT_PATH})",
     )
     return parser.parse_args()
 
@@ -250,5 +258,5 @@ if __name__ == "__main__":
         seed=args.seed,
     )
 
-    success = save_csv(df, Path(args.output))
+    success = save_data(df, Path(args.output))
     raise SystemExit(0 if success else 1)
\ No newline at end of file
@@ -1,14 +1,16 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import matplotlib
-matplotlib.use("Agg")   # WAJIB sebelum import pyplot — agar aman di server tanpa display
-
-import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import pandas as pd
+from matplotlib.figure import Figure
 from wordcloud import WordCloud
 
+import rollup
+import storage
+
 # ── Logging ───────────────────────────────────────────────────────────────────
 
 logging.basicConfig(
@@ -21,8 +23,14 @@ logger = logging.getLogger(__name__)
 
 BASE_DIR    = Path(__file__).parent
 STATIC_DIR  = BASE_DIR / "static"
-DATA_DIR    = BASE_DIR / "data"
-HASIL_CSV   = DATA_DIR / "hasil.csv"
+
+# File output per chart (juga dipakai run_all.py untuk melewati chart yang terkini)
+CHART_FILES = {
+    "wordcloud": STATIC_DIR / "wordcloud.png",
+    "trend":     STATIC_DIR / "trend.png",
+    "bar":       STATIC_DIR / "barChart.png",
+    "pie":       STATIC_DIR / "pieChart.png",
+}
 
 # Urutan & warna sentimen yang konsisten di semua chart
 SENTIMENT_ORDER  = ["positif", "netral", "negatif"]
@@ -44,8 +52,10 @@ ID_STOPWORDS = {
     "akan", "bukan", "belum", "jangan", "baik", "buat", "emang",
 }
 
-# Matplotlib style global
-plt.rcParams.update({
+# Matplotlib style global. Chart dibuat lewat API objek (Figure) tanpa pyplot,
+# sehingga tidak ada state global per figure dan keempat chart aman dibuat
+# paralel di thread terpisah (lihat run_generate_visual / run_all.py).
+matplotlib.rcParams.update({
     "figure.facecolor":  "#1a1d27",
     "axes.facecolor":    "#22263a",
     "axes.edgecolor":    "#2e3348",
@@ -66,27 +76,18 @@ plt.rcParams.update({
 # ── Helper ────────────────────────────────────────────────────────────────────
 
 def load_data() -> pd.DataFrame | None:
-    """Baca dan validasi hasil.csv. Return None jika gagal."""
-    if not HASIL_CSV.exists():
-        logger.error("File tidak ditemukan: %s", HASIL_CSV)
+    """Baca komentar berlabel dari storage (cache proses). Return None jika gagal."""
+    if not storage.exists():
+        logger.error("File tidak ditemukan: %s", storage.HASIL_PARQUET)
         return None
 
     try:
-        df = pd.read_csv(HASIL_CSV)
+        # Sentimen & tanggal sudah bertipe standar — tidak perlu normalisasi ulang
+        df = storage.load(["komentar", "sentimen"])
     except Exception as exc:
-        logger.error("Gagal membaca CSV: %s", exc)
-        return None
-
-    required = {"tanggal", "komentar", "sentimen"}
-    missing  = required - set(df.columns)
-    if missing:
-        logger.error("Kolom wajib tidak ditemukan: %s", missing)
+        logger.error("Gagal membaca data: %s", exc)
         return None
 
-    # Normalisasi
-    df["sentimen"] = df["sentimen"].str.lower().str.strip()
-    df["tanggal"]  = pd.to_datetime(df["tanggal"], errors="coerce")
-
     rows_before = len(df)
     df = df[df["sentimen"].isin(SENTIMENT_ORDER)]  # filter hanya sentimen valid & berlabel
     dropped = rows_before - len(df)
@@ -100,7 +101,7 @@ def load_data() -> pd.DataFrame | None:
     return df
 
 
-def _save(fig: plt.Figure, path: Path, label: str) -> bool:
+def _save(fig: Figure, path: Path, label: str) -> bool:
     """Simpan figure ke path. Return True jika berhasil."""
     try:
         fig.savefig(path, dpi=150, bbox_inches="tight")
@@ -109,14 +110,16 @@ def _save(fig: plt.Figure, path: Path, label: str) -> bool:
     except Exception as exc:
         logger.error("Gagal menyimpan %s: %s", label, exc)
         return False
-    finally:
-        plt.close(fig)
 
 
 # ── Chart generators ──────────────────────────────────────────────────────────
 
-def make_wordcloud(df: pd.DataFrame) -> bool:
-    """Buat Word Cloud dari kolom komentar."""
+def make_wordcloud() -> bool:
+    """Buat Word Cloud dari komentar berlabel."""
+    df = load_data()
+    if df is None:
+        return False
+
     texts = df["komentar"].dropna().astype(str)
     if texts.empty:
         logger.warning("Kolom komentar kosong, WordCloud dilewati.")
@@ -136,7 +139,7 @@ def make_wordcloud(df: pd.DataFrame) -> bool:
             prefer_horizontal=0.85,
         ).generate(text)
 
-        out = STATIC_DIR / "wordcloud.png"
+        out = CHART_FILES["wordcloud"]
         wc.to_file(str(out))
         logger.info("✅ Word Cloud → %s", out)
         return True
@@ -145,22 +148,28 @@ def make_wordcloud(df: pd.DataFrame) -> bool:
         return False
 
 
-def make_trend_chart(df: pd.DataFrame) -> bool:
-    """Buat grafik tren sentimen harian (line chart)."""
-    df_valid = df.dropna(subset=["tanggal"])
-    if df_valid.empty:
+def _sentiment_counts() -> pd.Series | None:
+    """Jumlah komentar per sentimen dari agregat harian. None jika gagal."""
+    try:
+        return rollup.sentiment_counts().reindex(SENTIMENT_ORDER, fill_value=0)
+    except Exception as exc:
+        logger.error("Gagal membaca agregat: %s", exc)
+        return None
+
+
+def make_trend_chart() -> bool:
+    """Buat grafik tren sentimen harian (line chart) dari agregat harian."""
+    try:
+        trend = rollup.daily_counts().reindex(columns=SENTIMENT_ORDER, fill_value=0)
+    except Exception as exc:
+        logger.error("Gagal membaca agregat: %s", exc)
+        return False
+    if trend.empty:
         logger.warning("Tidak ada data tanggal valid, tren dilewati.")
         return False
 
-    trend = (
-        df_valid
-        .groupby(["tanggal", "sentimen"])
-        .size()
-        .unstack(fill_value=0)
-        .reindex(columns=SENTIMENT_ORDER, fill_value=0)
-    )
-
-    fig, ax = plt.subplots(figsize=(11, 5))
+    fig = Figure(figsize=(11, 5))
+    ax  = fig.subplots()
 
     for sentiment in SENTIMENT_ORDER:
         if sentiment in trend.columns:
@@ -191,19 +200,18 @@ def make_trend_chart(df: pd.DataFrame) -> bool:
     ax.legend(framealpha=0.6)
     ax.grid(True, axis="y")
 
-    return _save(fig, STATIC_DIR / "trend.png", "Grafik Tren")
+    return _save(fig, CHART_FILES["trend"], "Grafik Tren")
 
 
-def make_bar_chart(df: pd.DataFrame) -> bool:
+def make_bar_chart() -> bool:
     """Buat bar chart jumlah komentar per sentimen."""
-    counts = (
-        df["sentimen"]
-        .value_counts()
-        .reindex(SENTIMENT_ORDER, fill_value=0)
-    )
+    counts = _sentiment_counts()
+    if counts is None:
+        return False
     colors = [SENTIMENT_COLORS[s] for s in counts.index]
 
-    fig, ax = plt.subplots(figsize=(6, 4))
+    fig = Figure(figsize=(6, 4))
+    ax  = fig.subplots()
     bars = ax.bar(
         [s.capitalize() for s in counts.index],
         counts.values,
@@ -229,16 +237,14 @@ def make_bar_chart(df: pd.DataFrame) -> bool:
     ax.yaxis.get_major_locator().set_params(integer=True)
     ax.grid(True, axis="y", zorder=0)
 
-    return _save(fig, STATIC_DIR / "barChart.png", "Bar Chart")
+    return _save(fig, CHART_FILES["bar"], "Bar Chart")
 
 
-def make_pie_chart(df: pd.DataFrame) -> bool:
+def make_pie_chart() -> bool:
     """Buat pie chart proporsi sentimen."""
-    counts = (
-        df["sentimen"]
-        .value_counts()
-        .reindex(SENTIMENT_ORDER, fill_value=0)
-    )
+    counts = _sentiment_counts()
+    if counts is None:
+        return False
     # Hapus slice bernilai 0 agar pie tidak punya irisan kosong
     counts = counts[counts > 0]
     if counts.empty:
@@ -247,7 +253,8 @@ def make_pie_chart(df: pd.DataFrame) -> bool:
 
     colors = [SENTIMENT_COLORS[s] for s in counts.index]
 
-    fig, ax = plt.subplots(figsize=(6, 6))
+    fig = Figure(figsize=(6, 6))
+    ax  = fig.subplots()
     wedges, texts, autotexts = ax.pie(
         counts.values,
         labels=[s.capitalize() for s in counts.index],
@@ -269,31 +276,51 @@ def make_pie_chart(df: pd.DataFrame) -> bool:
 
     ax.set_title("Proporsi Sentimen", fontsize=13, fontweight="bold", pad=14)
 
-    return _save(fig, STATIC_DIR / "pieChart.png", "Pie Chart")
+    return _save(fig, CHART_FILES["pie"], "Pie Chart")
 
 
+# Semua generator chart — saling independen. Input dibaca dari cache proses
+# (storage.load / rollup.load), sehingga data hanya dimuat sekali per versi.
+CHARTS = {
+    "wordcloud": make_wordcloud,
+    "trend":     make_trend_chart,
+    "bar":       make_bar_chart,
+    "pie":       make_pie_chart,
+}
+
 # ── Fungsi utama ──────────────────────────────────────────────────────────────
 
-def run_generate_visual() -> dict[str, bool]:
+def prefetch() -> bool:
     """
-    Jalankan semua generator visual.
-    Kembalikan dict status per chart:
-      {"wordcloud": True, "trend": True, "bar": True, "pie": False, ...}
+    Muat komentar berlabel & agregat harian ke cache proses sekali, sebelum
+    chart dibuat paralel. Return False jika data tidak tersedia.
     """
     STATIC_DIR.mkdir(parents=True, exist_ok=True)
-
     df = load_data()
     if df is None:
-        return {k: False for k in ("wordcloud", "trend", "bar", "pie")}
+        return False
+    try:
+        rollup.load()
+    except Exception as exc:
+        logger.error("Gagal membaca agregat: %s", exc)
+        return False
+
+    logger.info("Data dimuat: %d baris berlabel dari %s.", len(df), storage.HASIL_PARQUET)
+    return True
 
-    logger.info("Data dimuat: %d baris berlabel dari %s.", len(df), HASIL_CSV)
 
-    results = {
-        "wordcloud": make_wordcloud(df),
-        "trend":     make_trend_chart(df),
-        "bar":       make_bar_chart(df),
-        "pie":       make_pie_chart(df),
-    }
+def run_generate_visual(max_workers: int = len(CHARTS)) -> dict[str, bool]:
+    """
+    Jalankan semua generator visual (paralel di max_workers thread).
+    Kembalikan dict status per chart:
+      {"wordcloud": True, "trend": True, "bar": True, "pie": False, ...}
+    """
+    if not prefetch():
+        return {k: False for k in CHARTS}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(func) for name, func in CHARTS.items()}
+        results = {name: future.result() for name, future in futures.items()}
 
     success = sum(results.values())
     total   = len(results)
@@ -0,0 +1,101 @@
+"""
+ingest.py — Ingest append-only untuk data hasil scraping
+========================================================
+Baris baru hanya ditulis sebagai segmen baru (storage.append_segment) setelah
+dicek terhadap indeks hash persisten (dedup_index). Biaya ingest sebanding
+dengan ukuran batch, bukan dengan total data yang sudah tersimpan. Agregat
+harian (rollup) dan indeks pencarian (search_index) ikut diperbarui dengan
+batch tersebut.
+
+compact_segments() menggabungkan segmen ke hasil.parquet (dipanggil pipeline
+run_all) agar jumlah file data tidak terus bertambah.
+"""
+
+import logging
+import os
+
+import pandas as pd
+
+import rollup
+import search_index
+import storage
+from dedup_index import DedupIndex, drop_duplicate_rows
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+# Kompaksi di pipeline dijalankan jika jumlah segmen mencapai batas ini
+COMPACT_MIN_SEGMENTS = int(os.environ.get("COMPACT_MIN_SEGMENTS", "20"))
+
+# ── Fungsi utama ──────────────────────────────────────────────────────────────
+
+def ingest_rows(df_new: pd.DataFrame) -> int:
+    """
+    Tambahkan baris baru yang belum pernah tersimpan.
+    Kembalikan jumlah baris yang benar-benar ditambahkan.
+    Exception dari storage / indeks diteruskan ke pemanggil.
+    """
+    df_new = storage.normalize(df_new)
+    df_new = df_new[df_new["komentar"].notna()]
+    if df_new.empty:
+        return 0
+
+    # Duplikat di dalam batch itu sendiri — simpan kemunculan pertama
+    unique, hashes = drop_duplicate_rows(df_new)
+
+    with (
+        DedupIndex() as index,
+        rollup.Rollup(write=True) as agg,
+        search_index.SearchIndex(write=True) as fts,
+    ):
+        is_new = index.filter_new(hashes)
+        dupes  = len(df_new) - sum(is_new)
+        if dupes:
+            logger.info("Dilewati %d duplikat komentar.", dupes)
+
+        fresh = unique[is_new]
+        if fresh.empty:
+            return 0
+
+        # Segmen ditulis dulu; hash baru, agregat & indeks pencarian di-commit
+        # hanya jika penulisan berhasil
+        before, before_layout = storage.data_version(), storage.layout_version()
+        storage.append_segment(fresh)
+        index.add(h for h, keep in zip(hashes, is_new) if keep)
+        agg.record(before, rollup.aggregate(fresh))
+        fts.record(before_layout, fresh["komentar"])
+
+        stats = index.stats()
+        logger.info(
+            "Indeks dedup: %d hash, hit rate %.1f%%", stats["size"], stats["hit_rate"] * 100,
+        )
+
+    return len(fresh)
+
+
+def compact_segments(min_segments: int = COMPACT_MIN_SEGMENTS) -> bool:
+    """
+    Gabungkan segmen ke hasil.parquet jika jumlahnya >= min_segments.
+    Isi & urutan baris tidak berubah, jadi agregat harian dan indeks pencarian
+    ditandai tetap sinkron (tanpa rebuild). Kembalikan True jika berhasil /
+    tidak perlu kompaksi.
+    """
+    if len(storage.list_segments()) < min_segments:
+        return True
+    try:
+        with rollup.Rollup(write=True) as agg, search_index.SearchIndex(write=True) as fts:
+            before, before_layout = storage.data_version(), storage.layout_version()
+            if storage.compact(min_segments):
+                agg.record(before)
+                fts.relayout(before_layout, storage.layout_version())
+    except Exception as exc:
+        logger.error("Kompaksi segmen gagal: %s", exc)
+        return False
+    return True
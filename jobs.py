@@ -0,0 +1,184 @@
+"""
+jobs.py — Antrian job background di dalam proses web app
+========================================================
+Menjalankan pekerjaan panjang (update pipeline, scraping) di thread pool
+terbatas, sehingga request HTTP langsung kembali dan tidak perlu menyalakan
+interpreter baru lewat subprocess.
+
+  - setiap job punya id untuk polling status (lihat /jobs/<id> di app.py)
+  - request ganda untuk pekerjaan yang sama (key sama) selagi job masih
+    antri / berjalan digabung ke job yang sudah ada (coalescing)
+  - job yang masih antri bisa dibatalkan langsung; job yang sedang berjalan
+    dibatalkan secara kooperatif lewat threading.Event yang diterima fungsi job
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+# Default 1 worker: job pipeline menulis data yang sama, jadi dijalankan berurutan
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+
+# Batas job yang antri; request berikutnya ditolak (QueueFull)
+MAX_PENDING = 10
+
+# Jumlah job selesai yang tetap disimpan untuk polling
+MAX_HISTORY = 100
+
+ANTRI, BERJALAN, SELESAI, GAGAL, DIBATALKAN = (
+    "antri", "berjalan", "selesai", "gagal", "dibatalkan",
+)
+ACTIVE = {ANTRI, BERJALAN}
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+class QueueFull(Exception):
+    """Antrian job sudah penuh."""
+
+
+class Job:
+    """Satu pekerjaan background beserta status & waktunya."""
+
+    def __init__(self, key: str, label: str, func):
+        self.id          = uuid.uuid4().hex[:12]
+        self.key         = key
+        self.label       = label
+        self.func        = func
+        self.status      = ANTRI
+        self.error: str | None = None
+        self.created_at  = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.cancel_event = threading.Event()
+        self.future: Future | None = None
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            "id":          self.id,
+            "label":       self.label,
+            "status":      self.status,
+            "error":       self.error,
+            "created_at":  self.created_at,
+            "started_at":  self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed":     round(end - self.started_at, 1) if self.started_at else None,
+            "cancel_requested": self.cancel_event.is_set(),
+        }
+
+
+class JobQueue:
+    """
+    Antrian job dengan thread pool terbatas:
+
+        queue = JobQueue()
+        job, coalesced = queue.submit("pipeline", "Update data", run_all.main)
+
+    Fungsi job dipanggil dengan satu argumen keyword cancel (threading.Event)
+    dan harus mengembalikan True/None jika berhasil, False jika gagal.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_pending: int = MAX_PENDING):
+        self._lock     = threading.Lock()
+        self._pool     = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: dict[str, Job] = {}
+        self._active: dict[str, Job] = {}       # key → job yang masih antri / berjalan
+        self.max_pending = max_pending
+
+    def submit(self, key: str, label: str, func) -> tuple[Job, bool]:
+        """
+        Masukkan job ke antrian. Jika job dengan key yang sama masih aktif,
+        job itu yang dikembalikan. Kembalikan (job, True jika digabung).
+        Raise QueueFull jika antrian penuh.
+        """
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None:
+                return existing, True
+
+            pending = sum(1 for j in self._active.values() if j.status == ANTRI)
+            if pending >= self.max_pending:
+                raise QueueFull(f"Antrian penuh ({pending} job menunggu)")
+
+            job = Job(key, label, func)
+            self._jobs[job.id]  = job
+            self._active[key]   = job
+            job.future = self._pool.submit(self._run, job)
+            self._prune()
+        logger.info("Job %s (%s) masuk antrian.", job.id, label)
+        return job, False
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            if job.status != ANTRI:
+                return
+            job.status     = BERJALAN
+            job.started_at = time.time()
+        logger.info("Job %s (%s) mulai.", job.id, job.label)
+
+        try:
+            result = job.func(cancel=job.cancel_event)
+            if result is not False:
+                status = SELESAI
+            else:
+                status = DIBATALKAN if job.cancel_event.is_set() else GAGAL
+        except Exception as exc:
+            logger.error("Job %s (%s) error: %s", job.id, job.label, exc, exc_info=True)
+            job.error = str(exc)
+            status    = GAGAL
+
+        with self._lock:
+            job.status      = status
+            job.finished_at = time.time()
+            self._active.pop(job.key, None)
+        logger.info(
+            "Job %s (%s) %s (%.1f detik).",
+            job.id, job.label, status, job.finished_at - job.started_at,
+        )
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self) -> list[Job]:
+        """Semua job yang tersimpan, terbaru dulu."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Batalkan job. Job yang antri langsung dibatalkan; job yang berjalan
+        diberi sinyal batal dan berhenti di titik cek berikutnya.
+        Kembalikan False jika job tidak ada / sudah selesai.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE:
+                return False
+            job.cancel_event.set()
+            if job.status == ANTRI and job.future.cancel():
+                job.status      = DIBATALKAN
+                job.finished_at = time.time()
+                self._active.pop(job.key, None)
+        logger.info("Job %s (%s) diminta batal.", job.id, job.label)
+        return True
+
+    def _prune(self) -> None:
+        """Buang job selesai terlama di atas MAX_HISTORY (dipanggil dengan lock)."""
+        done = [j for j in self._jobs.values() if j.status not in ACTIVE]
+        done.sort(key=lambda j: j.created_at)
+        for job in done[:max(0, len(done) - MAX_HISTORY)]:
+            del self._jobs[job.id]
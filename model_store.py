@@ -0,0 +1,281 @@
+"""
+model_store.py — Penyimpanan versi model sentimen
+==================================================
+Setiap model hasil training disimpan sebagai artefak berversi:
+
+  data/model/<versi>/model.joblib   pipeline sklearn (array bisa di-mmap)
+  data/model/<versi>/meta.json      hash data latih, hyperparameter, metrik
+  data/model/LATEST                 nama versi yang aktif
+
+Model dimuat secara lazy & di-cache per proses lewat get_model(), sehingga
+import modul ini tetap ringan dan pemanggil berikutnya (pipeline / web app)
+cukup memuat artefak tanpa training ulang.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from pathlib import Path
+
+import joblib
+
+import storage
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+MODEL_DIR     = storage.DATA_DIR / "model"
+LATEST_PATH   = MODEL_DIR / "LATEST"
+EVAL_CACHE    = MODEL_DIR / "eval_cache.json"
+
+# Jumlah hasil evaluasi (cross-validation) yang disimpan di cache
+KEEP_EVALS = 50
+
+# Jumlah versi lama yang tetap disimpan (untuk rollback)
+KEEP_VERSIONS = 5
+
+# ── Hash & metadata ───────────────────────────────────────────────────────────
+
+def training_hasher():
+    """Objek hash kosong untuk training_hash yang dihitung bertahap (per chunk)."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def update_training_hash(h, texts, labels) -> None:
+    """Tambahkan satu chunk data latih ke hash dari training_hasher()."""
+    for text, label in zip(texts, labels):
+        h.update(f"{label}\x1f{text}\n".encode("utf-8"))
+
+
+def training_hash(texts, labels) -> str:
+    """Hash isi data latih (teks bersih + label, urutan ikut dihitung)."""
+    h = training_hasher()
+    update_training_hash(h, texts, labels)
+    return h.hexdigest()
+
+
+def model_params(model) -> dict:
+    """Hyperparameter pipeline dalam bentuk yang bisa disimpan ke JSON."""
+    params = {}
+    for key, value in model.get_params(deep=True).items():
+        if isinstance(value, (str, int, float, bool, type(None))):
+            params[key] = value
+        elif isinstance(value, tuple):
+            params[key] = list(value)
+    return params
+
+# ── Simpan / muat ─────────────────────────────────────────────────────────────
+
+def write_text_atomic(path: Path, text: str) -> None:
+    """
+    Tulis file teks secara atomik lewat file sementara bernama unik, sehingga
+    beberapa proses yang menulis file yang sama (web, run_all, search_model)
+    tidak saling menimpa file sementara dan tidak pernah menerbitkan isi terpotong.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False,
+    ) as f:
+        f.write(text)
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+# Versi asal setiap objek model yang disimpan / dimuat di proses ini
+_versions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def version_of(model) -> str | None:
+    """Nama versi tersimpan dari objek model, atau None jika model tidak berasal dari model_store."""
+    try:
+        return _versions.get(model)
+    except TypeError:
+        return None
+
+
+def latest_version() -> str | None:
+    """Nama versi model aktif, atau None jika belum ada model."""
+    try:
+        version = LATEST_PATH.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return version if (MODEL_DIR / version / "model.joblib").exists() else None
+
+
+def load_meta(version: str | None = None) -> dict | None:
+    """Metadata versi model (default: versi aktif)."""
+    version = version or latest_version()
+    if version is None:
+        return None
+    try:
+        return json.loads((MODEL_DIR / version / "meta.json").read_text(encoding="utf-8"))
+    except Exception as exc:
+        logger.warning("Metadata model %s tidak bisa dibaca: %s", version, exc)
+        return None
+
+
+def save_model(model, train_hash: str, n_train: int, metrics: dict | None = None) -> str:
+    """
+    Simpan model sebagai versi baru dan jadikan versi aktif.
+    Kembalikan nama versi.
+
+    Nama versi memakai waktu sampai mikrodetik (urut leksikografis = urut
+    waktu); versi yang sudah ada tidak pernah ditimpa — jika nama sudah
+    dipakai, ditambahkan akhiran -2, -3, dst.
+    """
+    now  = time.time_ns()
+    base = (
+        f"v{time.strftime('%Y%m%d-%H%M%S', time.localtime(now // 10**9))}"
+        f".{now // 1000 % 10**6:06d}-{train_hash[:8]}"
+    )
+    tmp  = MODEL_DIR / f".{base}.{uuid.uuid4().hex[:8]}.tmp"
+    tmp.mkdir(parents=True)
+
+    # Tanpa kompresi agar array numpy bisa di-mmap saat dimuat
+    joblib.dump(model, tmp / "model.joblib")
+    meta = {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now // 10**9)),
+        "train_hash": train_hash,
+        "n_train":    n_train,
+        "params":     model_params(model),
+        "metrics":    metrics or {},
+    }
+    for n in itertools.count(1):
+        version = base if n == 1 else f"{base}-{n}"
+        target  = MODEL_DIR / version
+        if target.exists():
+            continue
+        (tmp / "meta.json").write_text(
+            json.dumps({"version": version, **meta}, indent=2), encoding="utf-8",
+        )
+        try:
+            # rename gagal jika target sudah berisi (dibuat proses lain di antaranya)
+            os.rename(tmp, target)
+            break
+        except OSError:
+            if not target.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+
+    write_text_atomic(LATEST_PATH, version)
+    _versions[model] = version
+
+    _prune()
+    logger.info("Model disimpan sebagai versi %s (%d data latih).", version, n_train)
+    return version
+
+
+def load_model(version: str | None = None):
+    """Muat pipeline dari disk (array numpy di-mmap read-only). None jika tidak ada."""
+    version = version or latest_version()
+    if version is None:
+        return None
+    try:
+        model = joblib.load(MODEL_DIR / version / "model.joblib", mmap_mode="r")
+    except Exception as exc:
+        logger.warning("Model %s tidak bisa dimuat: %s", version, exc)
+        return None
+    _versions[model] = version
+    return model
+
+
+def find_version(train_hash: str, params: dict) -> str | None:
+    """Versi aktif jika dilatih dari data & hyperparameter yang sama persis."""
+    meta = load_meta()
+    if meta and meta.get("train_hash") == train_hash and meta.get("params") == params:
+        return meta["version"]
+    return None
+
+
+def update_meta(version: str, **fields) -> bool:
+    """Perbarui metadata versi model (mis. metrik yang dihitung belakangan)."""
+    meta = load_meta(version)
+    if meta is None:
+        return False
+    meta.update(fields)
+    write_text_atomic(MODEL_DIR / version / "meta.json", json.dumps(meta, indent=2))
+    return True
+
+
+def _prune(keep: int = KEEP_VERSIONS) -> None:
+    versions = sorted(p for p in MODEL_DIR.glob("v*") if p.is_dir())
+    active   = latest_version()
+    for old in versions[:-keep]:
+        if old.name != active:
+            shutil.rmtree(old, ignore_errors=True)
+
+# ── Cache hasil evaluasi ──────────────────────────────────────────────────────
+
+def _eval_key(train_hash: str, params: dict) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(train_hash.encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _load_evals() -> dict:
+    try:
+        return json.loads(EVAL_CACHE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def load_eval(train_hash: str, params: dict) -> dict | None:
+    """Metrik evaluasi tersimpan untuk data latih + hyperparameter ini, atau None."""
+    return _load_evals().get(_eval_key(train_hash, params))
+
+
+def save_eval(train_hash: str, params: dict, metrics: dict) -> None:
+    """Simpan metrik evaluasi ke cache (entri terlama dibuang setelah KEEP_EVALS)."""
+    evals = _load_evals()
+    evals.pop(_eval_key(train_hash, params), None)
+    evals[_eval_key(train_hash, params)] = metrics
+    evals = dict(list(evals.items())[-KEEP_EVALS:])
+
+    write_text_atomic(EVAL_CACHE, json.dumps(evals, indent=2))
+
+# ── Cache proses (lazy) ───────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_cached: tuple[str, object] | None = None
+
+
+def get_model():
+    """
+    Model versi aktif, dimuat sekali per proses dan dimuat ulang otomatis
+    jika versi aktif berganti. None jika belum ada model.
+    """
+    global _cached
+    version = latest_version()
+    if version is None:
+        return None
+
+    with _lock:
+        if _cached is None or _cached[0] != version:
+            t0    = time.perf_counter()
+            model = load_model(version)
+            if model is None:
+                return None
+            _cached = (version, model)
+            logger.info(
+                "Model %s dimuat (%.1f ms).", version, (time.perf_counter() - t0) * 1000,
+            )
+        return _cached[1]
@@ -0,0 +1,321 @@
+"""
+rollup.py — Agregat harian komentar per (tanggal, platform, sentimen)
+=====================================================================
+Tabel SQLite berisi jumlah komentar & total likes per (tanggal, platform,
+sentimen), sehingga dashboard, grafik tren, bar/pie chart, dan statistik PDF
+cukup membaca O(hari × platform × sentimen) baris, bukan seluruh komentar.
+
+Agregat diperbarui inkremental oleh penulis data:
+  - ingest.py          : baris baru ditambahkan
+  - classify_sentimen  : baris yang diberi label dipindah dari "belum berlabel"
+                         (atau label tidak valid) ke label barunya
+
+Penulis memegang lock tulis SQLite selama menulis data + memperbarui agregat,
+dan agregat menyimpan storage.data_version() terakhir yang sudah tercakup.
+Jika data ditulis lewat jalur lain (kompaksi, data dummy, migrasi), versi tidak
+cocok dan agregat dibangun ulang dari data saat dibaca berikutnya.
+
+Pemakaian CLI:
+  python rollup.py --stats     # ukuran agregat & status sinkron
+  python rollup.py --rebuild   # bangun ulang dari data yang tersimpan
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+import storage
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+ROLLUP_PATH = storage.DATA_DIR / "rollup.sqlite"
+
+KEYS    = ["tanggal", "platform", "sentimen"]
+COLUMNS = KEYS + ["n", "likes"]
+
+# Baris per batch saat membangun ulang dari data
+REBUILD_BATCH = 200_000
+
+# Kunci kosong di SQLite: tanggal tidak valid / platform kosong / belum berlabel
+_EMPTY = ""
+
+# ── Agregasi ──────────────────────────────────────────────────────────────────
+
+def aggregate(df: pd.DataFrame, sign: int = 1) -> pd.DataFrame:
+    """
+    Agregasi baris komentar (tipe kolom storage) menjadi delta agregat:
+    satu baris per (tanggal, platform, sentimen) dengan n & likes dikali sign.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    grouped = (
+        df.groupby(KEYS, observed=True, dropna=False)["likes"]
+        .agg(n="size", likes="sum")
+        .reset_index()
+    )
+    # Format kunci di hasil groupby (kecil), bukan per baris komentar
+    return pd.DataFrame({
+        "tanggal":  grouped["tanggal"].dt.strftime("%Y-%m-%d").fillna(_EMPTY),
+        "platform": grouped["platform"].astype("string").fillna(_EMPTY),
+        "sentimen": grouped["sentimen"].astype("string").fillna(_EMPTY),
+        "n":        grouped["n"].astype("int64") * sign,
+        "likes":    grouped["likes"].astype("int64") * sign,
+    })
+
+
+def relabel(rows: pd.DataFrame, old_sentimen: pd.Series) -> pd.DataFrame:
+    """Delta agregat untuk baris yang sentimennya berubah dari old_sentimen ke rows["sentimen"]."""
+    removed = rows.assign(sentimen=old_sentimen.reindex(rows.index))
+    return pd.concat([aggregate(removed, -1), aggregate(rows)], ignore_index=True)
+
+
+def _version_key(version: tuple | None) -> str | None:
+    return None if version is None else json.dumps(version)
+
+# ── Tabel agregat ─────────────────────────────────────────────────────────────
+
+class Rollup:
+    """
+    Tabel agregat di SQLite. Dipakai sebagai context manager:
+
+        with Rollup(write=True) as agg:        # lock tulis sampai keluar blok
+            before = storage.data_version()
+            storage.append_segment(baru)
+            agg.record(before, aggregate(baru))
+
+    write=True mengambil lock tulis (BEGIN IMMEDIATE) di awal, sehingga
+    penulisan data & pembaruan agregat tidak diselingi penulis lain.
+    """
+
+    def __init__(self, path: Path = ROLLUP_PATH, write: bool = False):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollup ("
+            " tanggal TEXT, platform TEXT, sentimen TEXT,"
+            " n INTEGER NOT NULL, likes INTEGER NOT NULL,"
+            " PRIMARY KEY (tanggal, platform, sentimen)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+        if write:
+            self.conn.execute("BEGIN IMMEDIATE")
+
+    def __enter__(self) -> "Rollup":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+
+    # ── Meta ──────────────────────────────────────────────────────────────────
+
+    def version(self) -> str | None:
+        """Versi data (storage.data_version) yang sudah tercakup agregat."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+        return row[0] if row else None
+
+    def _set_version(self, version: tuple | None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('data_version', ?)",
+            (_version_key(version),),
+        )
+
+    def is_current(self) -> bool:
+        version = storage.data_version()
+        return version is not None and self.version() == _version_key(version)
+
+    # ── Operasi agregat ───────────────────────────────────────────────────────
+
+    def apply(self, delta: pd.DataFrame) -> None:
+        """Tambahkan delta agregat (lihat aggregate) dengan UPSERT."""
+        if delta.empty:
+            return
+        delta = delta.groupby(KEYS, as_index=False)[["n", "likes"]].sum()
+        self.conn.executemany(
+            "INSERT INTO rollup (tanggal, platform, sentimen, n, likes) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (tanggal, platform, sentimen) DO UPDATE SET"
+            " n = n + excluded.n, likes = likes + excluded.likes",
+            delta[COLUMNS].itertuples(index=False, name=None),
+        )
+        self.conn.execute("DELETE FROM rollup WHERE n <= 0")
+
+    def record(self, before: tuple | None, *deltas: pd.DataFrame) -> bool:
+        """
+        Catat perubahan data yang baru ditulis: before adalah data_version()
+        sebelum penulisan. Delta hanya diterapkan jika agregat sinkron dengan
+        before; jika tidak, agregat dibiarkan basi dan dibangun ulang saat dibaca.
+        Kembalikan True jika delta diterapkan.
+        """
+        if before is None or self.version() != _version_key(before):
+            logger.info("Agregat tidak sinkron dengan data — akan dibangun ulang saat dibaca.")
+            return False
+        for delta in deltas:
+            self.apply(delta)
+        self._set_version(storage.data_version())
+        return True
+
+    def rebuild(self) -> int:
+        """Bangun ulang agregat dari seluruh data. Kembalikan jumlah baris agregat."""
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        version = storage.data_version()
+
+        parts = []
+        for path in storage.data_files():
+            for df in storage.iter_part(path, REBUILD_BATCH, columns=["tanggal", "platform", "likes", "sentimen"]):
+                parts.append(aggregate(df))
+
+        self.conn.execute("DELETE FROM rollup")
+        if parts:
+            self.apply(pd.concat(parts, ignore_index=True))
+        self._set_version(version)
+        self.conn.commit()
+
+        size = self.conn.execute("SELECT COUNT(*) FROM rollup").fetchone()[0]
+        logger.info("Agregat harian dibangun ulang: %d baris agregat.", size)
+        return size
+
+    def read(self) -> pd.DataFrame:
+        """Seluruh agregat dengan tipe kolom standar (tanggal datetime64, kategori)."""
+        raw = pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM rollup", self.conn)
+        empty = lambda s: s.mask(s == _EMPTY)      # noqa: E731
+        return pd.DataFrame({
+            "tanggal":  pd.to_datetime(empty(raw["tanggal"]), format="%Y-%m-%d"),
+            "platform": empty(raw["platform"]).astype("category"),
+            "sentimen": empty(raw["sentimen"]).astype("category"),
+            "n":        raw["n"].astype("int64"),
+            "likes":    raw["likes"].astype("int64"),
+        })
+
+    def stats(self) -> dict:
+        size, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(n), 0) FROM rollup").fetchone()
+        return {
+            "rows":       size,
+            "komentar":   total,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "current":    self.is_current(),
+        }
+
+# ── Baca (cache in-process) ───────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_cached: tuple[tuple | None, pd.DataFrame | None] = (None, None)
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({
+        "tanggal":  pd.Series(dtype="datetime64[ns]"),
+        "platform": pd.Series(dtype="category"),
+        "sentimen": pd.Series(dtype="category"),
+        "n":        pd.Series(dtype="int64"),
+        "likes":    pd.Series(dtype="int64"),
+    })
+
+
+def load(platform: str | None = None, sentimen: str | None = None) -> pd.DataFrame:
+    """
+    Agregat (tanggal, platform, sentimen, n, likes), dibangun ulang otomatis jika
+    tidak sinkron dengan data. Filter platform tidak peka huruf besar/kecil.
+    Sentimen NaN = komentar belum berlabel. DataFrame kosong jika belum ada data.
+    """
+    global _cached
+    if not storage.exists():
+        return _empty()
+
+    version = storage.data_version()
+    with _lock:
+        if version is None or _cached[0] != version:
+            with Rollup() as agg:
+                if not agg.is_current():
+                    if version is None:         # hanya CSV lama — migrasi dulu
+                        storage.migrate_from_csv()
+                        version = storage.data_version()
+                    agg.rebuild()
+                df = agg.read()
+            _cached = (version, df) if version == storage.data_version() else (None, None)
+        else:
+            df = _cached[1]
+
+    if platform:
+        df = df[df["platform"].astype("string").str.lower() == platform.lower()]
+    if sentimen:
+        df = df[df["sentimen"] == sentimen.lower()]
+    return df
+
+
+def sentiment_counts(platform: str | None = None) -> pd.Series:
+    """Jumlah komentar berlabel per sentimen."""
+    df = load(platform)
+    return df.groupby("sentimen", observed=True)["n"].sum()
+
+
+def daily_counts(platform: str | None = None) -> pd.DataFrame:
+    """Jumlah komentar berlabel per hari: index tanggal, kolom sentimen."""
+    df = load(platform)
+    df = df[df["tanggal"].notna() & df["sentimen"].notna()]
+    return (
+        df.pivot_table(index="tanggal", columns="sentimen", values="n",
+                       aggfunc="sum", fill_value=0, observed=True)
+        .sort_index()
+    )
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Kelola agregat harian sentimen komentar JKT48."
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Bangun ulang agregat dari data yang tersimpan",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Tampilkan ukuran agregat & status sinkron",
+    )
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        with Rollup() as agg:
+            if args.rebuild:
+                agg.rebuild()
+            if args.stats or not args.rebuild:
+                s = agg.stats()
+                logger.info(
+                    "Agregat harian: %d baris (%d komentar), %.1f KB | %s",
+                    s["rows"], s["komentar"], s["file_bytes"] / 1024,
+                    "sinkron" if s["current"] else "BASI (dibangun ulang saat dibaca)",
+                )
+    except Exception as exc:
+        logger.error("Operasi agregat gagal: %s", exc)
+        raise SystemExit(1)
+
+    raise SystemExit(0)
@@ -1,7 +1,13 @@
 import argparse
+import hashlib
+import json
 import logging
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
+from pathlib import Path
+
+import storage
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 
@@ -23,6 +29,16 @@ def _try_import(module_name: str):
         logger.warning("Modul '%s' tidak ditemukan: %s", module_name, exc)
         return None
 
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+BASE_DIR = Path(__file__).parent
+
+# Sidik jari input tiap step yang terakhir berhasil + memo hash isi file
+STATE_PATH = BASE_DIR / "data" / "pipeline_state.json"
+
+# Jumlah step yang boleh berjalan bersamaan
+MAX_WORKERS = 4
+
 # ── Step runner ───────────────────────────────────────────────────────────────
 
 def run_step(label: str, func, critical: bool = True) -> bool:
@@ -53,17 +69,334 @@ def run_step(label: str, func, critical: bool = True) -> bool:
     logger.info("%s: %s (%.1f detik)", status, label, elapsed)
     return success
 
+# ── Sidik jari step (incremental ala make) ────────────────────────────────────
+# Step yang mendeklarasikan input & output dilewati jika isi semua inputnya sama
+# dengan saat step itu terakhir berhasil dan semua outputnya masih ada.
+# Hash isi file di-memo per (size, mtime_ns), jadi file yang tidak disentuh
+# tidak dibaca ulang; file yang ditulis ulang dengan isi sama tetap dianggap sama.
+
+def _load_state() -> dict:
+    """Baca state pipeline. State kosong jika belum ada / rusak."""
+    state = {"steps": {}, "hashes": {}}
+    if STATE_PATH.exists():
+        try:
+            state.update(json.loads(STATE_PATH.read_text(encoding="utf-8")))
+        except Exception as exc:
+            logger.warning("State pipeline rusak, diabaikan: %s", exc)
+    return state
+
+
+def _save_state(state: dict) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    tmp.replace(STATE_PATH)
+
+
+def _rel(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(BASE_DIR.resolve()))
+    except ValueError:
+        return str(path)
+
+
+def file_digest(path: Path, memo: dict) -> str | None:
+    """Hash isi file (blake2b), memakai memo jika size & mtime tidak berubah. None jika tidak ada."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    name = _rel(path)
+    cached = memo.get(name)
+    if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+        return cached[2]
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    memo[name] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return memo[name][2]
+
+
+def fingerprint(paths, memo: dict) -> str:
+    """Sidik jari gabungan dari daftar file input (nama + isi)."""
+    entries = sorted((_rel(p), file_digest(p, memo)) for p in paths)
+    payload = json.dumps(entries)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+# ── DAG scheduler ─────────────────────────────────────────────────────────────
+
+class Step:
+    """
+    Satu node di graf pipeline.
+
+    key      : id unik step (dipakai di deps & hasil)
+    label    : nama step untuk log & ringkasan
+    func     : callable tanpa argumen, atau None jika step dilewati
+    deps     : key step yang harus selesai lebih dulu
+    critical : jika step ini gagal, step yang bergantung padanya tidak dijalankan
+    inputs   : callable yang mengembalikan daftar file input (dievaluasi saat step
+               siap jalan), atau None jika step selalu dijalankan (mis. scraping)
+    outputs  : file yang dihasilkan step; step hanya dilewati jika semuanya ada
+    """
+
+    def __init__(
+        self, key: str, label: str, func, deps: tuple = (), critical: bool = True,
+        inputs=None, outputs: tuple = (),
+    ):
+        self.key      = key
+        self.label    = label
+        self.func     = func
+        self.deps     = tuple(deps)
+        self.critical = critical
+        self.inputs   = inputs
+        self.outputs  = tuple(outputs)
+        self.fresh    = False       # True jika dilewati karena input tidak berubah
+
+    def is_fresh(self, state: dict) -> bool:
+        """True jika input sama dengan run sukses terakhir dan semua output ada."""
+        if self.inputs is None or self.key not in state["steps"]:
+            return False
+        if not all(path.exists() for path in self.outputs):
+            return False
+        return state["steps"][self.key] == fingerprint(self.inputs(), state["hashes"])
+
+    def record(self, state: dict) -> None:
+        """Simpan sidik jari input setelah step berhasil (dibaca ulang sesudah run)."""
+        if self.inputs is not None:
+            state["steps"][self.key] = fingerprint(self.inputs(), state["hashes"])
+
+
+def run_dag(
+    steps: list[Step], max_workers: int = MAX_WORKERS, cancel=None,
+    state: dict | None = None, force: bool = False,
+) -> tuple[dict[str, bool | None], dict[str, tuple[float, float]]]:
+    """
+    Jalankan step secara paralel sejauh dependensi mengizinkan.
+
+    Step dijalankan begitu semua dependensinya selesai. Step yang dependensinya
+    berupa step kritis yang gagal, atau yang belum mulai saat pembatalan diminta
+    (cancel: threading.Event), tidak dijalankan dan hasilnya None ("dilewati").
+
+    Jika state diberikan (lihat _load_state), sidik jari step yang berhasil dicatat
+    ke state, dan step yang masih terkini (Step.is_fresh) tidak dijalankan dan
+    dianggap berhasil — kecuali force=True.
+
+    Kembalikan (hasil per key, waktu (mulai, selesai) per key dalam detik relatif
+    terhadap awal DAG). steps harus terurut topologis.
+    """
+    by_key  = {step.key: step for step in steps}
+    pending = dict(by_key)
+    results: dict[str, bool | None] = {}
+    timings: dict[str, tuple[float, float]] = {}
+    running: dict[Future, Step] = {}
+    t0 = time.perf_counter()
+
+    def timed(step: Step) -> bool:
+        start = time.perf_counter() - t0
+        ok    = run_step(step.label, step.func, step.critical)
+        timings[step.key] = (start, time.perf_counter() - t0)
+        return ok
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="step") as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for key, step in list(pending.items()):
+                    if any(dep not in results for dep in step.deps):
+                        continue        # masih menunggu dependensi
+                    del pending[key]
+                    progressed = True
+
+                    failed = [d for d in step.deps if results[d] is False and by_key[d].critical]
+                    if step.func is None:
+                        results[key] = None
+                    elif failed:
+                        logger.warning(
+                            "⏭ %s dilewati — step kritis gagal: %s",
+                            step.label, ", ".join(by_key[d].label for d in failed),
+                        )
+                        results[key] = None
+                    elif cancel is not None and cancel.is_set():
+                        logger.warning("⏹ %s dilewati — pipeline dibatalkan.", step.label)
+                        results[key] = None
+                    elif state is not None and not force and step.is_fresh(state):
+                        logger.info("♻ %s dilewati — input tidak berubah.", step.label)
+                        step.fresh   = True
+                        results[key] = True
+                    else:
+                        running[pool.submit(timed, step)] = step
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                results[step.key] = future.result()
+                if results[step.key] and state is not None:
+                    step.record(state)
+
+    return results, timings
+
+
+def critical_path(steps: list[Step], timings: dict) -> tuple[float, list[str]]:
+    """
+    Rantai dependensi dengan total waktu step terpanjang (hanya step yang
+    dijalankan). Kembalikan (total detik, daftar key).
+    """
+    best: dict[str, tuple[float, list[str]]] = {}
+    for step in steps:
+        if step.key not in timings:
+            continue
+        start, end = timings[step.key]
+        prev = max(
+            (best[d] for d in step.deps if d in best),
+            key=lambda item: item[0],
+            default=(0.0, []),
+        )
+        best[step.key] = (prev[0] + end - start, prev[1] + [step.key])
+    return max(best.values(), key=lambda item: item[0], default=(0.0, []))
+
 # ── Pipeline utama ────────────────────────────────────────────────────────────
 
+def build_steps(
+    skip_twitter:   bool = False,
+    skip_instagram: bool = False,
+    skip_classify:  bool = False,
+    skip_visual:    bool = False,
+) -> list[Step]:
+    """
+    Graf pipeline (urut topologis):
+
+      scrape_twitter ──┐             ┌─► search_index
+                       ├─► compact ──┤
+      scrape_instagram ┘             └─► classify ─► visual_data ─┬─► chart_wordcloud
+                                                                  ├─► chart_trend
+                                                                  ├─► chart_bar
+                                                                  └─► chart_pie
+
+    Scraping selalu dijalankan; step lain mendeklarasikan input (file data +
+    kode modulnya) dan output sehingga dilewati jika tidak ada yang berubah.
+    """
+    steps: list[Step] = []
+
+    # ── 1-2. Scraping (independen, paralel) ───────────────────────────────
+    # Scraper TIDAK critical — boleh gagal, data lama masih bisa dipakai
+    for key, module_name, label, skip in (
+        ("scrape_twitter",   "scrape_twitter",   "Scraping Twitter/X", skip_twitter),
+        ("scrape_instagram", "scrape_instagram", "Scraping Instagram", skip_instagram),
+    ):
+        func = None
+        if skip:
+            logger.info("⏭ Skip: %s", label)
+        else:
+            mod = _try_import(module_name)
+            if mod and hasattr(mod, "run_scraper"):
+                func = mod.run_scraper
+            else:
+                logger.warning("%s tidak tersedia, step dilewati.", label)
+        steps.append(Step(key, label, func, critical=False))
+
+    # ── 3. Kompaksi segmen (hanya jika segmen ≥ COMPACT_MIN_SEGMENTS) ──────
+    # Tidak critical — tanpa kompaksi data tetap terbaca lengkap
+    mod  = _try_import("ingest")
+    func = mod.compact_segments if mod and hasattr(mod, "compact_segments") else None
+    steps.append(Step(
+        "compact", "Kompaksi Segmen", func,
+        deps=("scrape_twitter", "scrape_instagram"), critical=False,
+    ))
+
+    # Indeks pencarian dibangun ulang di sini (bukan di request) jika basi;
+    # tidak critical — selama basi, dashboard memakai pencarian substring
+    mod  = _try_import("search_index")
+    func = mod.ensure_current if mod and hasattr(mod, "ensure_current") else None
+    steps.append(Step(
+        "search_index", "Indeks Pencarian", func,
+        deps=("compact",), critical=False,
+    ))
+
+    # ── 4. Klasifikasi sentimen ───────────────────────────────────────────
+    func, inputs, outputs = None, None, ()
+    if skip_classify:
+        logger.info("⏭ Skip: Klasifikasi Sentimen")
+    else:
+        mod = _try_import("classify_sentimen")
+        if mod and hasattr(mod, "run_classifier"):
+            func = mod.run_classifier
+            # Klasifikasi menulis ulang file data — sidik jari diambil sesudah run
+            extra   = [storage.LEGACY_CSV, mod.TUNED_PARAMS_PATH, Path(mod.__file__)]
+            inputs  = lambda: storage.data_files() + extra   # noqa: E731
+            outputs = (mod.STATE_PATH, mod.model_store.LATEST_PATH)
+        else:
+            logger.error("Modul classify_sentimen tidak tersedia. Pipeline dihentikan.")
+            func = lambda: False     # noqa: E731 — gagal kritis, visual tidak dijalankan
+    steps.append(Step(
+        "classify", "Klasifikasi Sentimen", func,
+        deps=("compact",),
+        inputs=inputs, outputs=outputs,
+    ))
+
+    # ── 5. Visualisasi: muat data sekali, keempat chart paralel ───────────
+    mod = None if skip_visual else _try_import("generate_visual")
+    if skip_visual:
+        logger.info("⏭ Skip: Generate Visualisasi")
+    elif mod is None or not hasattr(mod, "CHARTS"):
+        logger.error("Modul generate_visual tidak tersedia.")
+
+    # visual_data memuat komentar & agregat harian ke cache proses (storage /
+    # rollup); chart membaca dari cache itu. Jika visual_data terkini (dilewati)
+    # tetapi ada chart yang perlu dibuat ulang, chart itu memuat sendiri.
+    available = mod is not None and hasattr(mod, "CHARTS")
+    inputs    = None
+    if available:
+        code   = [Path(mod.__file__), Path(mod.rollup.__file__)]
+        inputs = lambda: storage.data_files() + [storage.LEGACY_CSV] + code   # noqa: E731
+    steps.append(Step(
+        "visual_data", "Muat Data Visual",
+        None if skip_visual else (mod.prefetch if available else (lambda: False)),
+        deps=("classify",),
+        inputs=inputs,
+        outputs=tuple(mod.CHART_FILES.values()) if available else (),
+    ))
+    chart_labels = {
+        "wordcloud": "Chart Word Cloud",
+        "trend":     "Chart Tren",
+        "bar":       "Chart Batang",
+        "pie":       "Chart Pie",
+    }
+    for name, label in chart_labels.items():
+        func = mod.CHARTS[name] if available else None
+        steps.append(Step(
+            f"chart_{name}", label,
+            func,
+            deps=("visual_data",),
+            inputs=inputs,
+            outputs=(mod.CHART_FILES[name],) if available else (),
+        ))
+    return steps
+
+
 def main(
     skip_twitter:   bool = False,
     skip_instagram: bool = False,
     skip_classify:  bool = False,
     skip_visual:    bool = False,
+    cancel=None,
+    max_workers:    int = MAX_WORKERS,
+    force:          bool = False,
 ) -> bool:
     """
-    Jalankan pipeline lengkap.
-    Kembalikan True jika semua step kritis berhasil.
+    Jalankan pipeline lengkap sebagai DAG (lihat build_steps): kedua scraper
+    berjalan paralel, lalu klasifikasi, lalu keempat chart paralel.
+
+    cancel : threading.Event opsional (mis. dari jobs.JobQueue). Step yang belum
+             mulai saat event di-set tidak dijalankan dan main mengembalikan False.
+    force  : jalankan semua step walaupun inputnya tidak berubah sejak run
+             sukses terakhir (lihat Step.is_fresh).
+
+    Kembalikan True jika semua step yang dijalankan berhasil.
     """
     start_time = time.perf_counter()
     started_at = datetime.now().strftime("%d %B %Y, %H:%M:%S")
@@ -71,106 +404,65 @@ def main(
     logger.info("  Pipeline JKT48 Sentiment — %s", started_at)
     logger.info("═══════════════════════════════════════")
 
-    results: dict[str, bool | None] = {}
+    steps = build_steps(skip_twitter, skip_instagram, skip_classify, skip_visual)
+    state = _load_state()
+    results, timings = run_dag(
+        steps, max_workers=max_workers, cancel=cancel, state=state, force=force,
+    )
+    try:
+        _save_state(state)
+    except Exception as exc:
+        logger.warning("State pipeline tidak bisa disimpan: %s", exc)
 
-    # ── 1. Scraping Twitter ────────────────────────────────────────────────
-    if not skip_twitter:
-        mod = _try_import("scrape_twitter")
-        if mod and hasattr(mod, "run_scraper"):
-            # Scraper TIDAK critical — boleh gagal, data lama masih bisa dipakai
-            results["scrape_twitter"] = run_step(
-                "Scraping Twitter/X", mod.run_scraper, critical=False
-            )
-        else:
-            logger.warning("Scraper Twitter tidak tersedia, step dilewati.")
-            results["scrape_twitter"] = None
-    else:
-        logger.info("⏭ Skip: Scraping Twitter")
-        results["scrape_twitter"] = None
-
-    # ── 2. Scraping Instagram ──────────────────────────────────────────────
-    if not skip_instagram:
-        mod = _try_import("scrape_instagram")
-        if mod and hasattr(mod, "run_scraper"):
-            results["scrape_instagram"] = run_step(
-                "Scraping Instagram", mod.run_scraper, critical=False
-            )
-        else:
-            logger.warning("Scraper Instagram tidak tersedia, step dilewati.")
-            results["scrape_instagram"] = None
-    else:
-        logger.info("⏭ Skip: Scraping Instagram")
-        results["scrape_instagram"] = None
+    if results.get("classify") is False:
+        logger.error(
+            "Klasifikasi sentimen gagal. Pipeline dihentikan — "
+            "visualisasi tidak akan dijalankan."
+        )
 
-    # ── 3. Klasifikasi sentimen ────────────────────────────────────────────
-    if not skip_classify:
-        mod = _try_import("classify_sentimen")
-        if mod and hasattr(mod, "run_classifier"):
-            ok = run_step("Klasifikasi Sentimen", mod.run_classifier, critical=True)
-            results["classify"] = ok
-            if not ok:
-                logger.error(
-                    "Klasifikasi sentimen gagal. Pipeline dihentikan — "
-                    "visualisasi tidak akan dijalankan."
-                )
-                _print_summary(results, start_time)
-                return False
-        else:
-            logger.error("Modul classify_sentimen tidak tersedia. Pipeline dihentikan.")
-            _print_summary(results, start_time)
-            return False
-    else:
-        logger.info("⏭ Skip: Klasifikasi Sentimen")
-        results["classify"] = None
-
-    # ── 4. Generate visualisasi ────────────────────────────────────────────
-    if not skip_visual:
-        mod = _try_import("generate_visual")
-        if mod and hasattr(mod, "run_generate_visual"):
-            ok = run_step("Generate Visualisasi", mod.run_generate_visual, critical=True)
-            results["visual"] = ok
-            if not ok:
-                logger.error("Generate visualisasi gagal.")
-        else:
-            logger.error("Modul generate_visual tidak tersedia.")
-            results["visual"] = False
-    else:
-        logger.info("⏭ Skip: Generate Visualisasi")
-        results["visual"] = None
+    _print_summary(steps, results, timings, start_time)
 
-    _print_summary(results, start_time)
+    if cancel is not None and cancel.is_set():
+        return False
 
     # Pipeline berhasil jika semua step yang dijalankan (bukan None) berhasil
     critical_results = [v for v in results.values() if v is not None]
     return all(critical_results)
 
 
-def _print_summary(results: dict, start_time: float) -> None:
-    """Cetak ringkasan hasil seluruh pipeline."""
+def _print_summary(steps: list[Step], results: dict, timings: dict, start_time: float) -> None:
+    """Cetak ringkasan hasil seluruh pipeline, waktu per step, dan jalur kritis."""
     total = time.perf_counter() - start_time
     logger.info("═══════════════════════════════════════")
     logger.info("  Ringkasan Pipeline")
     logger.info("───────────────────────────────────────")
 
-    labels = {
-        "scrape_twitter":   "Scraping Twitter/X",
-        "scrape_instagram": "Scraping Instagram",
-        "classify":         "Klasifikasi Sentimen",
-        "visual":           "Generate Visualisasi",
-    }
-
-    for key, label in labels.items():
-        val = results.get(key)
+    for step in steps:
+        val = results.get(step.key)
         if val is None:
             icon = "⏭"
             status = "dilewati"
+        elif step.fresh:
+            icon = "♻"
+            status = "terkini"
         elif val:
             icon = "✅"
             status = "berhasil"
         else:
             icon = "❌"
             status = "GAGAL"
-        logger.info("  %s  %-26s %s", icon, label, status)
+        if step.key in timings:
+            start, end = timings[step.key]
+            logger.info("  %s  %-26s %-9s %6.1f detik", icon, step.label, status, end - start)
+        else:
+            logger.info("  %s  %-26s %s", icon, step.label, status)
+
+    cp_total, cp_keys = critical_path(steps, timings)
+    if cp_keys:
+        labels = {step.key: step.label for step in steps}
+        logger.info("───────────────────────────────────────")
+        logger.info("  Jalur kritis (%.1f detik):", cp_total)
+        logger.info("    %s", " → ".join(labels[k] for k in cp_keys))
 
     logger.info("───────────────────────────────────────")
     logger.info("  Total waktu: %.1f detik", total)
@@ -203,6 +495,14 @@ def parse_args() -> argparse.Namespace:
         "--only-visual", action="store_true",
         help="Hanya jalankan generate visualisasi (skip scrape & classify)"
     )
+    parser.add_argument(
+        "--workers", type=int, default=MAX_WORKERS,
+        help=f"Jumlah step yang boleh berjalan paralel (default: {MAX_WORKERS})"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Jalankan ulang semua step walaupun inputnya tidak berubah"
+    )
     return parser.parse_args()
 
 
@@ -216,6 +516,8 @@ if __name__ == "__main__":
         skip_instagram = args.skip_instagram or args.skip_scrape or args.only_visual,
         skip_classify  = args.skip_classify or args.only_visual,
         skip_visual    = False,
+        max_workers    = args.workers,
+        force          = args.force,
     )
 
     raise SystemExit(0 if success else 1)
\ No newline at end of file
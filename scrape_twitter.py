@@ -1,11 +1,12 @@
-import csv
 import logging
 import random
 from datetime import date, timedelta
-from pathlib import Path
 
 import pandas as pd
 
+import storage
+from ingest import ingest_rows
+
 # ── Logging ───────────────────────────────────────────────────────────────────
 
 logging.basicConfig(
@@ -14,11 +15,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# ── Path ──────────────────────────────────────────────────────────────────────
-
-DATA_DIR  = Path(__file__).parent / "data"
-HASIL_CSV = DATA_DIR / "hasil.csv"
-
 # ── Data dummy ────────────────────────────────────────────────────────────────
 
 DUMMY_COMMENTS = {
@@ -87,53 +83,25 @@ def _build_dummy_rows(n: int = 30) -> list[list]:
     return rows
 
 
-def _load_existing() -> pd.DataFrame:
-    if HASIL_CSV.exists():
-        try:
-            return pd.read_csv(HASIL_CSV)
-        except Exception as exc:
-            logger.warning("Gagal membaca CSV lama: %s", exc)
-    return pd.DataFrame(columns=["tanggal", "platform", "komentar", "likes", "sentimen"])
+# ── Fungsi utama ──────────────────────────────────────────────────────────────
+
+def run_scraper() -> bool:
+    logger.info("Memulai scraping Twitter (mode dummy)...")
 
+    rows   = _build_dummy_rows(n=30)
+    df_new = pd.DataFrame(rows, columns=["tanggal", "platform", "komentar", "likes", "sentimen"])
 
-def _save(df: pd.DataFrame) -> bool:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
     try:
-        df.to_csv(HASIL_CSV, index=False, quoting=csv.QUOTE_ALL, encoding="utf-8")
-        return True
+        new_count = ingest_rows(df_new)
     except Exception as exc:
-        logger.error("Gagal menyimpan CSV: %s", exc)
+        logger.error("Gagal menyimpan data: %s", exc)
         return False
 
-
-def _merge_and_dedup(existing: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
-    combined = pd.concat([existing, new_rows], ignore_index=True)
-    before   = len(combined)
-    combined = combined.drop_duplicates(subset=["komentar"], keep="first")
-    dupes    = before - len(combined)
-    if dupes:
-        logger.info("Dihapus %d duplikat komentar.", dupes)
-    return combined
-
-
-# ── Fungsi utama ──────────────────────────────────────────────────────────────
-
-def run_scraper() -> bool:
-    logger.info("Memulai scraping Twitter (mode dummy)...")
-
-    rows     = _build_dummy_rows(n=30)
-    df_new   = pd.DataFrame(rows, columns=["tanggal", "platform", "komentar", "likes", "sentimen"])
-    existing = _load_existing()
-    combined = _merge_and_dedup(existing, df_new)
-
-    ok = _save(combined)
-    if ok:
-        new_count = len(combined) - len(existing)
-        logger.info(
-            "✅ Twitter dummy — %d tweet baru ditambahkan. Total: %d baris.",
-            max(new_count, 0), len(combined),
-        )
-    return ok
+    logger.info(
+        "✅ Twitter dummy — %d tweet baru ditambahkan. Total: %d baris.",
+        new_count, storage.row_count(),
+    )
+    return True
 
 
 if __name__ == "__main__":
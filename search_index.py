@@ -0,0 +1,299 @@
+"""
+search_index.py — Indeks full-text komentar (SQLite FTS5)
+=========================================================
+Dipakai oleh pencarian di halaman detail / endpoint /api/comments
+(comment_index.py) agar pencarian kata tidak perlu memindai seluruh komentar.
+
+Isi indeks adalah token hasil clean_text (sama dengan preprocessing model),
+disimpan di tabel FTS5 contentless: teks komentar tidak disalin, rowid tiap
+dokumen adalah posisi baris global di storage.load() (file utama lalu segmen,
+urut nama). Query multi-kata = AND, tiap kata dicocokkan sebagai awalan token.
+
+Indeks diperbarui inkremental oleh ingest.py (segmen baru ditambahkan di akhir
+posisi). Indeks menyimpan storage.layout_version() terakhir yang tercakup;
+pemberian label (write_part) dan kompaksi (urutan baris tetap) tidak membuat
+indeks basi, sedangkan data dummy atau migrasi mengubah tata letak. Indeks
+basi dibangun ulang oleh pipeline (run_all, step "search_index") atau CLI
+--rebuild — tidak pernah di dalam request; selama basi, pencarian memakai
+substring biasa.
+
+Pemakaian CLI:
+  python search_index.py --stats            # ukuran indeks & status sinkron
+  python search_index.py --rebuild          # bangun ulang dari data tersimpan
+  python search_index.py --query "kata"     # uji pencarian
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import storage
+from text_clean import clean_texts
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+INDEX_PATH = storage.DATA_DIR / "fts.sqlite"
+
+# Baris per batch saat membangun ulang dari data
+REBUILD_BATCH = 100_000
+
+# ── Query ─────────────────────────────────────────────────────────────────────
+
+def query_terms(q: str) -> list[str]:
+    """Token query setelah clean_text (angka, URL, tanda baca, dll. dibuang)."""
+    return clean_texts(pd.Series([q])).iloc[0].split()
+
+
+def _match_expr(terms: list[str]) -> str:
+    """Ekspresi MATCH FTS5: semua kata wajib ada (AND), tiap kata sebagai awalan."""
+    return " ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+
+def _layout_key(layout: tuple | None) -> str | None:
+    return None if layout is None else json.dumps(layout)
+
+# ── Indeks ────────────────────────────────────────────────────────────────────
+
+class SearchIndex:
+    """
+    Indeks FTS5 di SQLite. Dipakai sebagai context manager:
+
+        with SearchIndex(write=True) as idx:   # lock tulis sampai keluar blok
+            before = storage.layout_version()
+            storage.append_segment(baru)
+            idx.record(before, baru["komentar"])
+
+    write=True mengambil lock tulis (BEGIN IMMEDIATE) di awal, sehingga
+    penulisan data & pembaruan indeks tidak diselingi penulis lain.
+    """
+
+    def __init__(self, path: Path = INDEX_PATH, write: bool = False):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS komentar_fts"
+            " USING fts5(teks, content='', detail=none)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+        if write:
+            self.conn.execute("BEGIN IMMEDIATE")
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+
+    # ── Meta ──────────────────────────────────────────────────────────────────
+
+    def layout(self) -> str | None:
+        """Tata letak data (storage.layout_version) yang sudah tercakup indeks."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'layout'").fetchone()
+        return row[0] if row else None
+
+    def _set_layout(self, layout: tuple | None) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('layout', ?)",
+            (_layout_key(layout),),
+        )
+
+    def is_current(self, layout: tuple | None = None) -> bool:
+        """Apakah indeks mencakup layout (default: tata letak data saat ini)."""
+        if layout is None:
+            layout = storage.layout_version()
+        return layout is not None and self.layout() == _layout_key(layout)
+
+    # ── Operasi indeks ────────────────────────────────────────────────────────
+
+    def _insert(self, start: int, texts: pd.Series) -> int:
+        """Indeks texts (urut posisi baris) mulai dari posisi global start."""
+        positions = np.arange(start, start + len(texts))
+        present   = texts.notna().to_numpy()
+        cleaned   = clean_texts(texts[present])
+        rows = [(int(pos), text) for pos, text in zip(positions[present], cleaned) if text]
+        self.conn.executemany("INSERT INTO komentar_fts (rowid, teks) VALUES (?, ?)", rows)
+        return len(rows)
+
+    def record(self, before: tuple | None, texts: pd.Series) -> bool:
+        """
+        Catat segmen yang baru ditambahkan: before adalah layout_version()
+        sebelum append_segment, texts kolom komentar segmen itu. Indeks hanya
+        diperbarui jika sinkron dengan before dan segmen baru berada di akhir
+        tata letak; jika tidak, indeks dibiarkan basi sampai dibangun ulang
+        pipeline (ensure_current). Kembalikan True jika indeks diperbarui.
+        """
+        after = storage.layout_version()
+        prev  = before or ()
+        if (
+            self.layout() != _layout_key(before)
+            or after is None
+            or after[:len(prev)] != prev
+            or len(after) != len(prev) + 1
+        ):
+            logger.info("Indeks pencarian tidak sinkron dengan data — dibangun ulang oleh pipeline.")
+            return False
+        self._insert(sum(n for _, n, _ in prev), texts.reset_index(drop=True))
+        self._set_layout(after)
+        return True
+
+    def relayout(self, before: tuple | None, after: tuple | None) -> bool:
+        """
+        Catat perubahan tata letak yang tidak mengubah urutan baris (kompaksi):
+        indeks yang sinkron dengan before ditandai sinkron dengan after, tanpa
+        mengindeks ulang. Kembalikan True jika indeks tetap sinkron.
+        """
+        total = lambda layout: sum(n for _, n, _ in layout or ())   # noqa: E731
+        if after is None or self.layout() != _layout_key(before) or total(before) != total(after):
+            return False
+        self._set_layout(after)
+        return True
+
+    def rebuild(self) -> int:
+        """Bangun ulang indeks dari seluruh data. Kembalikan jumlah dokumen terindeks."""
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        layout = storage.layout_version()
+
+        self.conn.execute("INSERT INTO komentar_fts (komentar_fts) VALUES ('delete-all')")
+        start = indexed = 0
+        for path in storage.data_files():
+            for df in storage.iter_part(path, REBUILD_BATCH, columns=["komentar"]):
+                indexed += self._insert(start, df["komentar"])
+                start   += len(df)
+        self._set_layout(layout)
+        self.conn.execute("INSERT INTO komentar_fts (komentar_fts) VALUES ('optimize')")
+        self.conn.commit()
+
+        logger.info("Indeks pencarian dibangun ulang: %d dari %d komentar.", indexed, start)
+        return indexed
+
+    def match(self, terms: list[str]) -> np.ndarray:
+        """Posisi baris (urut naik) yang komentarnya memuat semua terms."""
+        # group_concat di SQLite + parse numpy jauh lebih cepat daripada
+        # mengambil hasil baris per baris untuk query yang cocok dengan banyak komentar
+        joined = self.conn.execute(
+            "SELECT group_concat(rowid, ' ') FROM komentar_fts WHERE komentar_fts MATCH ?",
+            (_match_expr(terms),),
+        ).fetchone()[0]
+        if not joined:
+            return np.empty(0, dtype=np.int64)
+        return np.array(joined.split(), dtype=np.int64)
+
+    def stats(self) -> dict:
+        size = self.conn.execute("SELECT COUNT(*) FROM komentar_fts").fetchone()[0]
+        return {
+            "dokumen":    size,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "current":    self.is_current(),
+        }
+
+# ── Pencarian ─────────────────────────────────────────────────────────────────
+
+def search(q: str, layout: tuple | None) -> np.ndarray | None:
+    """
+    Posisi baris yang cocok dengan q pada tata letak layout. None jika q tidak
+    punya token yang bisa diindeks, atau indeks belum sinkron dengan layout
+    (indeks tidak dibangun ulang di sini) — pemanggil memakai pencarian biasa.
+    """
+    terms = query_terms(q)
+    if not terms or layout is None:
+        return None
+
+    with SearchIndex() as idx:
+        if not idx.is_current(layout):
+            return None
+        return idx.match(terms)
+
+
+def ensure_current() -> bool:
+    """
+    Bangun ulang indeks jika basi (dipanggil pipeline, bukan request).
+    Kembalikan True jika indeks sinkron dengan data.
+    """
+    try:
+        with SearchIndex(write=True) as idx:
+            if not idx.is_current():
+                idx.rebuild()
+    except Exception as exc:
+        logger.error("Gagal membangun ulang indeks pencarian: %s", exc)
+        return False
+    return True
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Kelola indeks pencarian full-text komentar JKT48."
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Bangun ulang indeks dari data yang tersimpan",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="Tampilkan ukuran indeks & status sinkron",
+    )
+    parser.add_argument(
+        "--query", type=str, default=None, metavar="TEKS",
+        help="Cari komentar yang memuat semua kata di TEKS",
+    )
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        with SearchIndex() as idx:
+            if args.rebuild:
+                idx.rebuild()
+            if args.stats or not (args.rebuild or args.query):
+                s = idx.stats()
+                logger.info(
+                    "Indeks pencarian: %d komentar, %.1f KB | %s",
+                    s["dokumen"], s["file_bytes"] / 1024,
+                    "sinkron" if s["current"] else "BASI (pencarian memakai substring sampai --rebuild)",
+                )
+        if args.query:
+            positions = search(args.query, storage.layout_version())
+            if positions is None:
+                logger.error(
+                    "Query tidak memuat kata yang bisa dicari atau indeks basi (jalankan --rebuild): %r",
+                    args.query,
+                )
+                raise SystemExit(1)
+            df = storage.load(["komentar"])
+            logger.info("%d komentar cocok dengan %r.", len(positions), args.query)
+            for text in df["komentar"].iloc[positions[:10]]:
+                logger.info("  %s", text)
+    except SystemExit:
+        raise
+    except Exception as exc:
+        logger.error("Operasi indeks pencarian gagal: %s", exc)
+        raise SystemExit(1)
+
+    raise SystemExit(0)
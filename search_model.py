@@ -0,0 +1,331 @@
+"""
+search_model.py — Pencarian hyperparameter model sentimen (TF-IDF + Naive Bayes)
+================================================================================
+Mencari kombinasi ngram_range, min_df, max_df (TF-IDF) dan alpha (Naive Bayes)
+terbaik dengan cross-validation pada data berlabel yang tersimpan.
+
+Supaya murah, vectorizer tidak dilatih ulang untuk setiap kandidat: per fold,
+CountVectorizer dilatih sekali per ngram_range. Setiap (min_df, max_df) cukup
+memilih kolom berdasarkan document frequency, lalu TF-IDF yang sama dipakai
+untuk semua nilai alpha. Hasilnya identik dengan TfidfVectorizer penuh.
+
+Metode:
+  random   — randomized search: n kandidat acak, dievaluasi di seluruh data
+  halving  — successive halving: semua kandidat mulai dengan sebagian kecil
+             data, hanya 1/factor terbaik yang lanjut ke ronde dengan data
+             factor kali lebih banyak (early stopping kandidat yang buruk)
+
+Hasil ditulis ke data/model/leaderboard.csv. Konfigurasi terbaik disimpan
+sebagai hyperparameter tuning (classify_sentimen.save_tuned_params) dan model
+dilatih ulang sebagai versi aktif di model_store.
+
+Pemakaian:
+  python search_model.py                        # randomized, 40 kandidat
+  python search_model.py --method halving -n 120
+  python search_model.py --no-promote           # hanya leaderboard
+"""
+
+import argparse
+import logging
+import math
+import random
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import MultinomialNB
+
+import classify_sentimen
+import model_store
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+LEADERBOARD_PATH = model_store.MODEL_DIR / "leaderboard.csv"
+
+SEARCH_SPACE = {
+    "ngram_range": [(1, 1), (1, 2), (1, 3)],
+    "min_df":      [1, 2, 3, 5],
+    "max_df":      [0.8, 0.9, 0.95, 1.0],
+    "alpha":       [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0],
+}
+
+MAX_FOLDS = 5
+
+# ── Evaluasi kandidat ─────────────────────────────────────────────────────────
+
+def sample_candidates(n: int, seed: int = 42) -> list[tuple]:
+    """n kandidat (ngram_range, min_df, max_df, alpha) acak tanpa pengulangan."""
+    grid = list(product(*SEARCH_SPACE.values()))
+    return random.Random(seed).sample(grid, min(n, len(grid)))
+
+
+def _df_mask(doc_freq: np.ndarray, n_docs: int, min_df: int, max_df: float) -> np.ndarray:
+    """Kolom yang lolos min_df / max_df — aturan sama dengan TfidfVectorizer."""
+    return (doc_freq >= min_df) & (doc_freq <= max_df * n_docs)
+
+
+def _score_fold(
+    texts: np.ndarray,
+    labels: np.ndarray,
+    train_idx: np.ndarray,
+    val_idx: np.ndarray,
+    ngram_range: tuple,
+    candidates: list[tuple],
+) -> dict[tuple, float]:
+    """
+    Akurasi validasi satu fold untuk semua kandidat dengan ngram_range yang sama.
+    Vectorizer dilatih sekali; TF-IDF per (min_df, max_df) dipakai untuk semua alpha.
+    """
+    counter = CountVectorizer(ngram_range=ngram_range)
+    X_train = counter.fit_transform(texts[train_idx])
+    X_val   = counter.transform(texts[val_idx])
+    doc_freq = np.bincount(X_train.indices, minlength=X_train.shape[1])
+
+    scores: dict[tuple, float] = {}
+    by_df: dict[tuple, list[float]] = {}
+    for _, min_df, max_df, alpha in candidates:
+        by_df.setdefault((min_df, max_df), []).append(alpha)
+
+    for (min_df, max_df), alphas in by_df.items():
+        mask = _df_mask(doc_freq, len(train_idx), min_df, max_df)
+        if not mask.any():
+            continue        # tidak ada token tersisa — kandidat tidak valid
+        tfidf   = TfidfTransformer(sublinear_tf=True)
+        T_train = tfidf.fit_transform(X_train[:, mask])
+        T_val   = tfidf.transform(X_val[:, mask])
+        for alpha in alphas:
+            nb = MultinomialNB(alpha=alpha).fit(T_train, labels[train_idx])
+            scores[(ngram_range, min_df, max_df, alpha)] = float(
+                (nb.predict(T_val) == labels[val_idx]).mean()
+            )
+    return scores
+
+
+def evaluate_candidates(
+    texts: np.ndarray,
+    labels: np.ndarray,
+    candidates: list[tuple],
+    n_jobs: int,
+    seed: int = 42,
+) -> dict[tuple, list[float]]:
+    """
+    Cross-validation untuk semua kandidat. Pekerjaan dibagi per (ngram_range, fold)
+    dan dijalankan paralel di n_jobs proses. Kembalikan skor per fold per kandidat.
+    """
+    n_folds = min(MAX_FOLDS, int(pd.Series(labels).value_counts().min()))
+    if n_folds < 2:
+        raise ValueError("Setiap kelas butuh minimal 2 data latih untuk cross-validation")
+    folds = list(StratifiedKFold(n_folds, shuffle=True, random_state=seed).split(texts, labels))
+
+    by_ngram: dict[tuple, list[tuple]] = {}
+    for cand in candidates:
+        by_ngram.setdefault(cand[0], []).append(cand)
+
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_score_fold)(texts, labels, train_idx, val_idx, ngram, cands)
+        for ngram, cands in by_ngram.items()
+        for train_idx, val_idx in folds
+    )
+
+    fold_scores: dict[tuple, list[float]] = {cand: [] for cand in candidates}
+    for scores in results:
+        for cand, score in scores.items():
+            fold_scores[cand].append(score)
+    return fold_scores
+
+
+def _rank(fold_scores: dict[tuple, list[float]], n_samples: int, round_no: int) -> list[dict]:
+    """Baris leaderboard untuk satu ronde, urut dari akurasi tertinggi."""
+    rows = [
+        {
+            "ngram_range": f"{cand[0][0]}-{cand[0][1]}",
+            "min_df":      cand[1],
+            "max_df":      cand[2],
+            "alpha":       cand[3],
+            "cv_accuracy_mean": float(np.mean(scores)),
+            "cv_accuracy_std":  float(np.std(scores)),
+            "n_samples":   n_samples,
+            "round":       round_no,
+            "candidate":   cand,
+        }
+        for cand, scores in fold_scores.items()
+        if scores
+    ]
+    return sorted(rows, key=lambda r: r["cv_accuracy_mean"], reverse=True)
+
+# ── Metode pencarian ──────────────────────────────────────────────────────────
+
+def random_search(texts, labels, candidates, n_jobs: int) -> list[dict]:
+    """Semua kandidat dievaluasi di seluruh data latih."""
+    logger.info("Randomized search: %d kandidat, %d data latih.", len(candidates), len(texts))
+    return _rank(evaluate_candidates(texts, labels, candidates, n_jobs), len(texts), 0)
+
+
+def _stratified_subset(order: np.ndarray, labels: np.ndarray, n_samples: int) -> np.ndarray:
+    """
+    Indeks sekitar n_samples data dengan proporsi kelas sama seperti seluruh
+    data, diambil dari urutan acak order per kelas (subset ronde berikutnya
+    memuat subset ronde sebelumnya). Setiap kelas mendapat minimal MAX_FOLDS
+    data (atau semua datanya jika lebih sedikit) agar cross-validation ronde
+    kecil tetap bisa berjalan.
+    """
+    ordered = labels[order]
+    parts   = []
+    for cls in pd.unique(ordered):
+        members = order[ordered == cls]
+        quota   = max(round(n_samples * len(members) / len(order)), MAX_FOLDS)
+        parts.append(members[:quota])
+    return np.sort(np.concatenate(parts))
+
+
+def halving_search(texts, labels, candidates, n_jobs: int, factor: int = 3, seed: int = 42) -> list[dict]:
+    """
+    Successive halving: ronde terakhir memakai seluruh data, setiap ronde
+    sebelumnya memakai data factor kali lebih sedikit (diambil terstratifikasi
+    per kelas). Hanya ceil(1/factor) kandidat terbaik yang lanjut ke ronde
+    berikutnya.
+    """
+    n_rounds  = max(1, math.ceil(math.log(len(candidates), factor)))
+    order     = np.random.default_rng(seed).permutation(len(texts))
+    rows: list[dict] = []
+
+    for round_no in range(n_rounds):
+        n_samples = max(len(texts) // factor ** (n_rounds - 1 - round_no), 30)
+        idx = _stratified_subset(order, labels, n_samples)
+        logger.info(
+            "Successive halving ronde %d/%d: %d kandidat, %d data latih.",
+            round_no + 1, n_rounds, len(candidates), len(idx),
+        )
+        ranked = _rank(evaluate_candidates(texts[idx], labels[idx], candidates, n_jobs), len(idx), round_no)
+        rows.extend(ranked)
+
+        keep = max(1, math.ceil(len(ranked) / factor))
+        candidates = [r["candidate"] for r in ranked[:keep]]
+
+    # Peringkat akhir: ronde terjauh dulu, lalu akurasi
+    return sorted(rows, key=lambda r: (r["round"], r["cv_accuracy_mean"]), reverse=True)
+
+# ── Leaderboard & promosi ─────────────────────────────────────────────────────
+
+def write_leaderboard(rows: list[dict]) -> None:
+    df = pd.DataFrame(rows).drop(columns="candidate")
+    df.insert(0, "rank", range(1, len(df) + 1))
+    LEADERBOARD_PATH.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(LEADERBOARD_PATH, index=False)
+    logger.info("Leaderboard (%d baris) ditulis ke %s", len(df), LEADERBOARD_PATH)
+
+
+def promote(best: dict) -> bool:
+    """
+    Latih model aktif dengan konfigurasi terbaik, lalu simpan konfigurasi itu
+    sebagai hyperparameter tuning. File tuning hanya ditulis setelah model
+    tersimpan, sehingga training yang gagal tidak meninggalkan tuning aktif
+    tanpa model yang cocok.
+    """
+    ngram_range, min_df, max_df, alpha = best["candidate"]
+    params = {
+        "tfidf__ngram_range": ngram_range,
+        "tfidf__min_df":      min_df,
+        "tfidf__max_df":      max_df,
+        "nb__alpha":          alpha,
+    }
+    trained = classify_sentimen.train_model(backend="tfidf", params=params)
+    version = model_store.version_of(trained[0]) if trained else None
+    if version is None:
+        logger.error("Model dengan konfigurasi terbaik gagal dilatih — hyperparameter tuning tidak diubah.")
+        return False
+    classify_sentimen.save_tuned_params({**params, "tfidf__ngram_range": list(ngram_range)})
+    logger.info("✅ Konfigurasi terbaik dipromosikan ke model aktif (%s).", version)
+    return True
+
+
+def run_search(method: str, n_candidates: int, n_jobs: int, do_promote: bool, seed: int = 42) -> bool:
+    """Jalankan pencarian hyperparameter. Kembalikan True jika berhasil."""
+    try:
+        train_df = classify_sentimen.load_training_data()
+    except Exception as exc:
+        logger.error("Gagal membaca data: %s", exc)
+        return False
+    if train_df is None:
+        return False
+
+    texts      = train_df["komentar"].to_numpy(dtype=object)
+    labels     = train_df["sentimen"].to_numpy(dtype=object)
+    candidates = sample_candidates(n_candidates, seed)
+
+    try:
+        if method == "halving":
+            rows = halving_search(texts, labels, candidates, n_jobs, seed=seed)
+        else:
+            rows = random_search(texts, labels, candidates, n_jobs)
+    except Exception as exc:
+        logger.error("Pencarian hyperparameter gagal: %s", exc)
+        return False
+
+    if not rows:
+        logger.error("Tidak ada kandidat yang valid.")
+        return False
+
+    write_leaderboard(rows)
+    logger.info("── Top 5 kandidat ──")
+    for r in rows[:5]:
+        logger.info(
+            "  ngram=%s min_df=%s max_df=%s alpha=%s → %.2f%% ± %.2f%% (%d data)",
+            r["ngram_range"], r["min_df"], r["max_df"], r["alpha"],
+            r["cv_accuracy_mean"] * 100, r["cv_accuracy_std"] * 100, r["n_samples"],
+        )
+
+    return promote(rows[0]) if do_promote else True
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pencarian hyperparameter model sentimen JKT48 (TF-IDF + Naive Bayes)."
+    )
+    parser.add_argument(
+        "--method", choices=["random", "halving"], default="random",
+        help="Metode pencarian (default: random)",
+    )
+    parser.add_argument(
+        "-n", "--candidates", type=int, default=40,
+        help="Jumlah kandidat acak dari ruang pencarian (default: 40)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=classify_sentimen.CV_JOBS,
+        help=f"Jumlah proses paralel (default: {classify_sentimen.CV_JOBS}, -1 = semua core)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=42,
+        help="Seed acak untuk sampling kandidat & fold (default: 42)",
+    )
+    parser.add_argument(
+        "--no-promote", action="store_true",
+        help="Jangan promosikan konfigurasi terbaik ke model aktif",
+    )
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+    success = run_search(
+        method=args.method,
+        n_candidates=args.candidates,
+        n_jobs=args.jobs,
+        do_promote=not args.no_promote,
+        seed=args.seed,
+    )
+    raise SystemExit(0 if success else 1)
@@ -0,0 +1,651 @@
+"""
+storage.py — Penyimpanan data komentar JKT48 dalam format kolumnar (Parquet)
+============================================================================
+hasil.parquet adalah sumber data utama (system of record) untuk semua modul.
+Data baru dari scraper ditambahkan sebagai segmen terpisah di data/segmen/
+(append-only). Segmen digabung kembali ke hasil.parquet oleh compact():
+otomatis di pipeline (run_all, step "compact") setelah jumlah segmen mencapai
+ingest.COMPACT_MIN_SEGMENTS, atau manual lewat CLI --compact.
+CSV hanya dipakai sebagai format ekspor.
+
+Modul lain membaca data lewat load(columns): frame bertipe standar yang di-cache
+per kolom di dalam proses, sehingga satu proses (web app / satu run pipeline)
+hanya mem-parse tiap kolom sekali per versi data.
+
+Skema kolom:
+  tanggal  : date (datetime64 di pandas)
+  platform : category
+  komentar : string
+  likes    : int32
+  sentimen : category (NaN = belum berlabel)
+
+Pemakaian CLI:
+  python storage.py --migrate            # migrasi satu kali dari data/hasil.csv
+  python storage.py --compact            # gabungkan semua segmen ke hasil.parquet
+  python storage.py --export-csv out.csv # ekspor ke CSV (gzip jika berakhiran .gz)
+"""
+
+import argparse
+import csv
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ── Logging ───────────────────────────────────────────────────────────────────
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+# ── Konstanta ─────────────────────────────────────────────────────────────────
+
+DATA_DIR       = Path(__file__).parent / "data"
+HASIL_PARQUET  = DATA_DIR / "hasil.parquet"
+SEGMENT_DIR    = DATA_DIR / "segmen"
+LEGACY_CSV     = DATA_DIR / "hasil.csv"     # hanya sumber migrasi
+LOCK_PATH      = DATA_DIR / ".storage.lock"  # lock tulis (lihat write_lock)
+
+COLUMNS = ["tanggal", "platform", "komentar", "likes", "sentimen"]
+
+SCHEMA = pa.schema([
+    ("tanggal",  pa.date32()),
+    ("platform", pa.dictionary(pa.int32(), pa.string())),
+    ("komentar", pa.string()),
+    ("likes",    pa.int32()),
+    ("sentimen", pa.dictionary(pa.int32(), pa.string())),
+])
+
+# Kunci metadata Parquet: id tata letak baris file (lihat layout_version)
+LAYOUT_KEY = b"layout_id"
+
+# Baris per batch saat ekspor streaming (iter_rows / iter_csv)
+EXPORT_BATCH = 50_000
+
+# ── Normalisasi ───────────────────────────────────────────────────────────────
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ubah DataFrame mentah (mis. hasil scraping / CSV lama) ke tipe kolom standar.
+    Kolom yang tidak ada diisi kosong; kolom di luar skema dibuang.
+    """
+    df = df.reindex(columns=COLUMNS)
+
+    sentimen = df["sentimen"].astype("string").str.lower().str.strip()
+    sentimen = sentimen.mask(sentimen == "")     # string kosong = belum berlabel
+
+    return pd.DataFrame({
+        "tanggal":  pd.to_datetime(df["tanggal"], errors="coerce").dt.normalize(),
+        "platform": df["platform"].astype("string").str.strip().astype("category"),
+        "komentar": df["komentar"].astype("string"),
+        "likes":    pd.to_numeric(df["likes"], errors="coerce").fillna(0).astype("int32"),
+        "sentimen": sentimen.astype("category"),
+    }, index=df.index)
+
+
+def empty_frame(columns: list[str] | None = None) -> pd.DataFrame:
+    """DataFrame kosong dengan tipe kolom standar."""
+    df = normalize(pd.DataFrame(columns=COLUMNS))
+    return df[columns] if columns else df
+
+
+def _to_table(df: pd.DataFrame) -> pa.Table:
+    df = normalize(df).reset_index(drop=True)
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+# ── Lock tulis ────────────────────────────────────────────────────────────────
+
+_lock_depth = threading.local()
+
+
+@contextmanager
+def write_lock(timeout: float = 600):
+    """
+    Lock tulis antar proses & thread untuk operasi yang menulis ulang file data
+    yang sudah ada (write_hasil, write_part, kompaksi). Memakai transaksi
+    BEGIN IMMEDIATE SQLite (lintas OS). Reentrant di dalam satu thread.
+    append_segment tidak perlu lock: segmen baru tidak pernah ditimpa atau
+    dihapus oleh penulis lain.
+    """
+    depth = getattr(_lock_depth, "n", 0)
+    if depth:
+        _lock_depth.n = depth + 1
+        try:
+            yield
+        finally:
+            _lock_depth.n = depth
+        return
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(LOCK_PATH), timeout=timeout, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _lock_depth.n = 1
+        try:
+            yield
+        finally:
+            _lock_depth.n = 0
+            conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+
+# ── Baca / tulis ──────────────────────────────────────────────────────────────
+
+def list_segments() -> list[Path]:
+    """Daftar file segmen append-only, urut dari yang paling lama."""
+    if not SEGMENT_DIR.exists():
+        return []
+    return sorted(SEGMENT_DIR.glob("seg-*.parquet"))
+
+
+def data_files() -> list[Path]:
+    """Semua file data: file utama (jika ada) diikuti segmen."""
+    files = [HASIL_PARQUET] if HASIL_PARQUET.exists() else []
+    return files + list_segments()
+
+
+def file_key(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) satu file data — berubah setiap kali file ditulis ulang."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def exists() -> bool:
+    """True jika data tersedia (Parquet, segmen, atau CSV lama yang belum dimigrasi)."""
+    return bool(data_files()) or LEGACY_CSV.exists()
+
+
+def data_version() -> tuple | None:
+    """
+    Penanda versi data berdasarkan stat file utama + semua segmen
+    (nama, mtime, size, inode). None jika data belum ada.
+    Berubah setiap kali data ditulis ulang atau segmen baru ditambahkan.
+    """
+    version = []
+    for path in data_files():
+        try:
+            st = path.stat()
+        except OSError:
+            continue        # segmen terhapus oleh kompaksi di tengah jalan
+        version.append((path.name, st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(version) or None
+
+
+def _layout_id(metadata: pq.FileMetaData) -> str | None:
+    value = (metadata.metadata or {}).get(LAYOUT_KEY)
+    return value.decode() if value else None
+
+
+def _file_layout_id(path: Path) -> str | None:
+    """Id tata letak file data yang sudah ada (None jika belum ada / file lama)."""
+    return _layout_id(pq.read_metadata(path)) if path.exists() else None
+
+
+def layout_version() -> tuple | None:
+    """
+    Penanda tata letak baris: (nama, jumlah baris, id tata letak) tiap file data.
+    Berbeda dengan data_version(), tidak berubah saat file hanya ditulis ulang
+    dengan baris & urutan yang sama (write_part / write_part_stream, mis. saat
+    memberi label sentimen). Dipakai indeks yang memetakan posisi baris ke isi
+    komentar (search_index). None jika data belum ada.
+    """
+    version = []
+    for path in data_files():
+        try:
+            metadata = pq.read_metadata(path)
+            version.append((path.name, metadata.num_rows, _layout_id(metadata)))
+        except OSError:
+            continue        # segmen terhapus oleh kompaksi di tengah jalan
+    return tuple(version) or None
+
+
+def row_count() -> int:
+    """Jumlah baris total, dibaca dari metadata Parquet (tanpa membaca isi data)."""
+    return sum(pq.ParquetFile(path).metadata.num_rows for path in data_files())
+
+
+def read_hasil(columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Baca data komentar (file utama + semua segmen) dengan tipe kolom standar.
+
+    Parameter
+    ---------
+    columns : proyeksi kolom — hanya kolom ini yang dibaca dari disk.
+              None berarti semua kolom.
+
+    Raise FileNotFoundError jika data belum ada. Jika hanya CSV lama yang ada,
+    migrasi dijalankan otomatis satu kali.
+    """
+    if not HASIL_PARQUET.exists() and LEGACY_CSV.exists():
+        migrate_from_csv()
+
+    files = data_files()
+    if not files:
+        raise FileNotFoundError(HASIL_PARQUET)
+
+    dataset = ds.dataset([str(f) for f in files], schema=SCHEMA, format="parquet")
+    table   = dataset.to_table(columns=columns)
+    return table.to_pandas(date_as_object=False)
+
+
+# ── Cache in-process ──────────────────────────────────────────────────────────
+
+class DataCache:
+    """
+    Cache kolom data komentar bertipe standar, dipakai bersama oleh semua
+    pemanggil dalam satu proses.
+
+    Cache disimpan per kolom: proyeksi yang meminta kolom baru hanya membaca
+    kolom yang belum ada dari disk. Validitas dicek lewat data_version()
+    (mtime, size, inode); jika data ditulis ulang, seluruh cache dibuang dan
+    pemanggil berikutnya membaca ulang. Kolom tidak di-cache jika data berubah
+    di tengah pembacaan (tidak ada state setengah jadi).
+    """
+
+    def __init__(self):
+        self._lock  = threading.Lock()
+        self._key: tuple | None = None
+        self._columns: dict[str, pd.Series] = {}
+        self.hits    = 0
+        self.misses  = 0
+        self.reloads = 0
+
+    def get(self, columns: list[str] | None = None) -> pd.DataFrame:
+        columns = list(columns or COLUMNS)
+        key = data_version()
+        with self._lock:
+            if key is None or key != self._key:
+                if self._columns:
+                    self.reloads += 1
+                self._key, self._columns = key, {}
+
+            missing = [c for c in columns if c not in self._columns]
+            if not missing:
+                self.hits += 1
+            else:
+                self.misses += 1
+                df = read_hasil(columns=missing)
+                if key is None or key != data_version():
+                    # Data berubah selama dibaca — jangan campur dengan cache lama
+                    self._key, self._columns = None, {}
+                    return read_hasil(columns=columns)
+                self._columns.update(df.items())
+                logger.info(
+                    "Cache data: %d baris, kolom dimuat %s (hit=%d, miss=%d, reload=%d)",
+                    len(df), missing, self.hits, self.misses, self.reloads,
+                )
+            return pd.DataFrame({c: self._columns[c] for c in columns}, copy=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._key, self._columns = None, {}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+
+_cache = DataCache()
+
+
+def load(columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Data komentar bertipe standar (lihat skema di atas) dari cache proses,
+    dengan proyeksi kolom. Reload otomatis jika data berubah.
+
+    DataFrame dipakai bersama antar pemanggil — JANGAN dimodifikasi in-place.
+    Raise FileNotFoundError jika data belum ada (sama seperti read_hasil).
+    """
+    return _cache.get(columns)
+
+
+def cache_stats() -> dict[str, int]:
+    """Counter hit/miss/reload cache data (untuk monitoring)."""
+    return _cache.stats()
+
+
+def _with_layout(schema: pa.Schema, layout_id: str | None) -> pa.Schema:
+    """Schema dengan id tata letak; id baru jika layout_id None."""
+    return schema.with_metadata({
+        **(schema.metadata or {}),
+        LAYOUT_KEY: (layout_id or uuid.uuid4().hex).encode(),
+    })
+
+
+def _write_atomic(table: pa.Table, path: Path, layout_id: str | None = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    table = table.replace_schema_metadata(_with_layout(table.schema, layout_id).metadata)
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def write_hasil(
+    df: pd.DataFrame, path: Path = HASIL_PARQUET, replaces: Iterable[Path] = (),
+) -> None:
+    """
+    Tulis seluruh data ke Parquet secara atomik (file sementara lalu rename),
+    sehingga pembaca tidak pernah melihat file setengah jadi.
+
+    replaces: segmen yang isinya sudah tercakup di df (atau sengaja dibuang
+    pemanggil); hanya segmen ini yang dihapus setelah df ditulis. Segmen yang
+    ditambahkan penulis lain sesudah pemanggil membaca data tidak tersentuh.
+    """
+    with write_lock():
+        _write_atomic(_to_table(df), path)
+        for seg in replaces:
+            seg.unlink(missing_ok=True)
+
+
+def read_part(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Baca satu file data (file utama atau satu segmen) dengan tipe kolom standar."""
+    return pq.read_table(path, columns=columns, schema=SCHEMA).to_pandas(date_as_object=False)
+
+
+def write_part(path: Path, df: pd.DataFrame) -> None:
+    """
+    Tulis ulang satu file data secara atomik tanpa menyentuh file lain.
+    Baris & urutannya harus sama dengan isi file lama (hanya nilai kolom yang
+    berubah) — id tata letak file dipertahankan.
+
+    Raise RuntimeError jika file sudah tidak ada atau jumlah barisnya berubah
+    sejak dibaca (mis. sudah digabung oleh kompaksi), agar baris tidak hilang
+    atau terduplikasi.
+    """
+    with write_lock():
+        _check_part(path, len(df))
+        _write_atomic(_to_table(df), path, _file_layout_id(path))
+
+
+def _check_part(path: Path, n_rows: int) -> None:
+    """Pastikan file data masih ada dengan n_rows baris (dipanggil dengan write_lock)."""
+    if not path.exists():
+        raise RuntimeError(f"{path.name} sudah tidak ada (dikompaksi?) — penulisan dibatalkan.")
+    current = pq.read_metadata(path).num_rows
+    if current != n_rows:
+        raise RuntimeError(
+            f"{path.name} berubah ({current} baris, diharapkan {n_rows}) — penulisan dibatalkan."
+        )
+
+
+def iter_part(
+    path: Path, batch_size: int, columns: list[str] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Baca satu file data per batch (maksimal batch_size baris) dengan tipe kolom
+    standar, sehingga memori puncak sebanding dengan batch, bukan ukuran file.
+    """
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas(date_as_object=False)
+
+
+def write_part_stream(path: Path, frames: Iterable[pd.DataFrame]) -> int:
+    """
+    Tulis ulang satu file data dari rangkaian DataFrame secara atomik.
+    Setiap DataFrame ditulis sebagai row group tersendiri lalu dilepas dari
+    memori. Kembalikan jumlah baris yang ditulis.
+    Seperti write_part, baris & urutannya harus sama dengan isi file lama;
+    frames sebaiknya dibaca dari file yang sama (iter_part) agar pembacaan
+    ikut terlindungi write_lock.
+    """
+    with write_lock():
+        if not path.exists():
+            raise RuntimeError(f"{path.name} sudah tidak ada (dikompaksi?) — penulisan dibatalkan.")
+        expected = pq.read_metadata(path).num_rows
+        tmp      = path.with_name(f".{path.name}.tmp")
+        schema   = _with_layout(SCHEMA, _file_layout_id(path))
+        n_rows   = 0
+        try:
+            with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+                for df in frames:
+                    writer.write_table(_to_table(df))
+                    n_rows += len(df)
+            if n_rows != expected:
+                raise RuntimeError(
+                    f"{path.name}: {n_rows} baris ditulis, diharapkan {expected} — penulisan dibatalkan."
+                )
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        os.replace(tmp, path)
+    return n_rows
+
+
+def compact(min_segments: int = 1) -> int:
+    """
+    Gabungkan hasil.parquet + segmen yang ada saat ini menjadi satu
+    hasil.parquet baru (urutan baris tetap sama), lalu hapus segmen yang
+    digabung. Dibaca & ditulis per batch, sehingga memori sebanding batch.
+    Segmen yang ditambahkan selama kompaksi tidak tersentuh.
+    Kembalikan jumlah segmen yang digabung (0 jika kurang dari min_segments).
+    """
+    with write_lock():
+        segments = list_segments()
+        if not segments or len(segments) < min_segments:
+            return 0
+
+        files  = ([HASIL_PARQUET] if HASIL_PARQUET.exists() else []) + segments
+        tmp    = HASIL_PARQUET.with_name(f".{HASIL_PARQUET.name}.tmp")
+        n_rows = 0
+        try:
+            with pq.ParquetWriter(tmp, _with_layout(SCHEMA, None), compression="zstd") as writer:
+                for path in files:
+                    with pq.ParquetFile(path) as pf:
+                        for batch in pf.iter_batches(batch_size=EXPORT_BATCH):
+                            writer.write_table(pa.Table.from_batches([batch]).cast(SCHEMA))
+                            n_rows += batch.num_rows
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        os.replace(tmp, HASIL_PARQUET)
+        for seg in segments:
+            seg.unlink(missing_ok=True)
+
+    logger.info("Kompaksi: %d segmen digabung ke %s (%d baris).", len(segments), HASIL_PARQUET.name, n_rows)
+    return len(segments)
+
+
+def append_segment(df: pd.DataFrame) -> Path:
+    """
+    Tambahkan baris baru sebagai file segmen tersendiri tanpa menyentuh data lama.
+    Biaya sebanding dengan ukuran batch, bukan ukuran total data.
+    """
+    path = SEGMENT_DIR / f"seg-{time.time_ns()}-{os.getpid()}.parquet"
+    _write_atomic(_to_table(df), path)
+    return path
+
+
+# ── Migrasi & ekspor ──────────────────────────────────────────────────────────
+
+def migrate_from_csv(csv_path: Path = LEGACY_CSV, force: bool = False) -> bool:
+    """
+    Migrasi satu kali dari hasil.csv ke hasil.parquet.
+    Dilewati jika Parquet sudah ada, kecuali force=True.
+    """
+    if HASIL_PARQUET.exists() and not force:
+        logger.info("Migrasi dilewati — %s sudah ada.", HASIL_PARQUET)
+        return True
+
+    if not csv_path.exists():
+        logger.error("File CSV sumber tidak ditemukan: %s", csv_path)
+        return False
+
+    df = pd.read_csv(csv_path)
+    with write_lock():
+        _write_atomic(_to_table(df), HASIL_PARQUET)   # tanpa kompaksi — segmen tetap dipakai
+    logger.info(
+        "✅ Migrasi %s → %s selesai (%d baris). CSV tidak lagi dibaca oleh pipeline.",
+        csv_path, HASIL_PARQUET, len(df),
+    )
+    return True
+
+
+def export_csv(df: pd.DataFrame, path_or_buf, header: bool = True) -> None:
+    """Ekspor DataFrame ke CSV (QUOTE_ALL, tanggal YYYY-MM-DD)."""
+    df.to_csv(
+        path_or_buf,
+        index=False,
+        header=header,
+        quoting=csv.QUOTE_ALL,
+        date_format="%Y-%m-%d",
+        na_rep="",
+    )
+
+
+def _category_mask(s: pd.Series, value: str) -> pd.Series:
+    """Mask baris yang kategorinya sama dengan value (tidak peka huruf besar/kecil)."""
+    wanted = [c for c in s.cat.categories if str(c).lower() == value.lower()]
+    return s.isin(wanted)
+
+
+def filter_rows(
+    df: pd.DataFrame, platform: str | None = None, sentimen: str | None = None,
+) -> pd.DataFrame:
+    """Filter baris menurut platform / sentimen (tidak peka huruf besar/kecil). None = semua."""
+    if platform:
+        df = df[_category_mask(df["platform"], platform)]
+    if sentimen:
+        df = df[_category_mask(df["sentimen"], sentimen)]
+    return df
+
+
+def iter_rows(
+    columns:    list[str] | None = None,
+    platform:   str | None = None,
+    sentimen:   str | None = None,
+    batch_size: int = EXPORT_BATCH,
+) -> Iterator[pd.DataFrame]:
+    """
+    Seluruh data sebagai rangkaian batch (maksimal batch_size baris) yang sudah
+    difilter, urut seperti load(). Semua file dibuka di awal, sehingga kompaksi
+    di tengah jalan tidak memengaruhi isi yang dibaca (snapshot).
+    Jika hanya CSV lama yang ada, migrasi dijalankan otomatis satu kali.
+    """
+    if not HASIL_PARQUET.exists() and LEGACY_CSV.exists():
+        migrate_from_csv()
+
+    read_columns = None
+    if columns:
+        filters      = [c for c, v in (("platform", platform), ("sentimen", sentimen)) if v]
+        read_columns = list(dict.fromkeys(columns + filters))
+
+    files = [pq.ParquetFile(path) for path in data_files()]
+    try:
+        for pf in files:
+            for batch in pf.iter_batches(batch_size=batch_size, columns=read_columns):
+                df = filter_rows(batch.to_pandas(date_as_object=False), platform, sentimen)
+                if not df.empty:
+                    yield df[columns] if columns else df
+    finally:
+        for pf in files:
+            pf.close()
+
+
+def iter_csv(
+    columns:    list[str] | None = None,
+    platform:   str | None = None,
+    sentimen:   str | None = None,
+    compress:   bool = False,
+    batch_size: int = EXPORT_BATCH,
+) -> Iterator[bytes]:
+    """
+    Ekspor CSV (format sama dengan export_csv) sebagai potongan bytes per batch,
+    opsional dikompres gzip. Header dikirim lebih dulu; memori sebanding dengan
+    batch_size, bukan ukuran data.
+    """
+    gz = zlib.compressobj(wbits=31) if compress else None      # wbits=31: format gzip
+
+    def encode(df: pd.DataFrame, header: bool) -> bytes:
+        buf = io.StringIO()
+        export_csv(df, buf, header=header)
+        data = buf.getvalue().encode("utf-8")
+        return gz.compress(data) if gz else data
+
+    # Batch pertama dibaca sebelum header, sehingga error membuka data muncul
+    # di potongan pertama (sebelum pemanggil mulai mengirim respons)
+    rows  = iter_rows(columns, platform, sentimen, batch_size)
+    first = next(rows, None)
+    yield encode(empty_frame(columns), header=True)
+    for df in ([first] if first is not None else []):
+        yield encode(df, header=False)
+    for df in rows:
+        chunk = encode(df, header=False)
+        if chunk:
+            yield chunk
+    if gz:
+        yield gz.flush()
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Kelola penyimpanan Parquet data sentimen JKT48."
+    )
+    parser.add_argument(
+        "--migrate", action="store_true",
+        help=f"Migrasi {LEGACY_CSV.name} ke {HASIL_PARQUET.name}",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Timpa Parquet yang sudah ada saat migrasi",
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help=(
+            "Gabungkan semua segmen ke hasil.parquet (agregat dibangun ulang saat "
+            "dibaca, indeks pencarian oleh pipeline)"
+        ),
+    )
+    parser.add_argument(
+        "--export-csv", type=str, default=None, metavar="PATH",
+        help="Ekspor seluruh data ke file CSV (dikompres gzip jika PATH berakhiran .gz)",
+    )
+    return parser.parse_args()
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    args = parse_args()
+    success = True
+
+    if args.migrate:
+        success = migrate_from_csv(force=args.force)
+
+    if success and args.compact:
+        try:
+            compact()
+        except Exception as exc:
+            logger.error("Kompaksi gagal: %s", exc)
+            success = False
+
+    if success and args.export_csv:
+        try:
+            out = Path(args.export_csv)
+            with out.open("wb") as f:
+                for chunk in iter_csv(compress=out.suffix == ".gz"):
+                    f.write(chunk)
+            logger.info("✅ Data diekspor ke %s", args.export_csv)
+        except Exception as exc:
+            logger.error("Gagal ekspor CSV: %s", exc)
+            success = False
+
+    raise SystemExit(0 if success else 1)
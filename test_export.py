@@ -0,0 +1,76 @@
+"""
+test_export.py — Uji endpoint /export/<format>
+==============================================
+Data uji kecil ditulis ke direktori sementara (path storage & cache ekspor
+dialihkan), sehingga data/ di repo tidak tersentuh.
+
+Pemakaian:
+  python -m pytest -q test_export.py
+"""
+
+import gzip
+import io
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import app as webapp
+import export_data
+import storage
+
+# ── Fixture ───────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    monkeypatch.setattr(storage, "DATA_DIR",      data_dir)
+    monkeypatch.setattr(storage, "HASIL_PARQUET", data_dir / "hasil.parquet")
+    monkeypatch.setattr(storage, "SEGMENT_DIR",   data_dir / "segmen")
+    monkeypatch.setattr(storage, "LEGACY_CSV",    data_dir / "hasil.csv")
+    monkeypatch.setattr(storage, "LOCK_PATH",     data_dir / ".storage.lock")
+    monkeypatch.setattr(export_data, "CACHE_DIR", data_dir / "ekspor")
+
+    storage.write_hasil(pd.DataFrame({
+        "tanggal":  ["2024-01-01", "2024-01-02", "2024-01-02"],
+        "platform": ["twitter", "twitter", "instagram"],
+        "komentar": ["Lagu barunya bagus", "Kecewa sama lineup", "Konsernya seru"],
+        "likes":    [3, 0, 7],
+        "sentimen": ["positif", "negatif", "positif"],
+    }), path=storage.HASIL_PARQUET)
+
+    client = webapp.app.test_client()
+    with client.session_transaction() as sess:
+        sess["logged_in"] = True
+    return client
+
+
+def _n_rows(fmt: str, body: bytes) -> int:
+    """Jumlah baris data di isi file ekspor."""
+    if fmt == "csv.gz":
+        fmt, body = "csv", gzip.decompress(body)
+    if fmt == "csv":
+        return len(body.decode("utf-8").splitlines()) - 1      # tanpa header
+    if fmt == "ndjson":
+        return len([json.loads(line) for line in body.decode("utf-8").splitlines()])
+    if fmt == "arrow":
+        return pa.ipc.open_stream(body).read_all().num_rows
+    return pq.read_table(io.BytesIO(body)).num_rows
+
+# ── Test ──────────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("fmt", list(export_data.FORMATS))
+def test_export_filtered(client, fmt):
+    response = client.get(f"/export/{fmt}?platform=twitter")
+    assert response.status_code == 200
+    assert _n_rows(fmt, response.get_data()) == 2
+
+
+@pytest.mark.parametrize("fmt", list(export_data.FORMATS))
+def test_export_empty_filter(client, fmt):
+    # Filter tanpa baris yang cocok tetap ekspor yang valid, bukan redirect error
+    response = client.get(f"/export/{fmt}?platform=tidakada")
+    assert response.status_code == 200
+    assert _n_rows(fmt, response.get_data()) == 0
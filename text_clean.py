@@ -0,0 +1,52 @@
+"""
+text_clean.py — Pembersihan teks komentar (preprocessing model & pencarian)
+===========================================================================
+Dipakai oleh classify_sentimen.py (training & prediksi), search_index.py
+(token indeks pencarian), dan app.py (/api/classify). Sengaja tanpa
+dependensi sklearn / model, sehingga modul yang hanya butuh pembersihan teks
+(ingest & scraper lewat search_index) tetap ringan saat diimport.
+"""
+
+import re
+import string
+
+import pandas as pd
+
+# ── Preprocessing ─────────────────────────────────────────────────────────────
+
+def clean_text(text: str) -> str:
+    """
+    Bersihkan teks komentar dari noise umum media sosial.
+    Urutan pembersihan penting — jangan diubah sembarangan.
+    """
+    text = str(text).lower()
+    text = re.sub(r"http\S+|www\S+|https\S+", " ", text, flags=re.MULTILINE)  # URL
+    text = re.sub(r"@\w+", " ", text)          # mention (@username)
+    text = re.sub(r"#\w+", " ", text)           # hashtag
+    text = re.sub(r"\d+", " ", text)            # angka
+    text = re.sub(r"[^\x00-\x7F]+", " ", text)  # karakter non-ASCII (emoji, dll)
+    text = text.translate(str.maketrans("", "", string.punctuation))
+    text = re.sub(r"\s+", " ", text).strip()    # spasi ganda
+    return text
+
+
+# Pola pre-compiled untuk clean_texts(). URL harus dihapus lebih dulu (URL
+# boleh memuat @, #, angka); setelah itu mention, hashtag, angka, dan non-ASCII
+# tidak pernah tumpang-tindih sehingga aman digabung dalam satu pass.
+_URL_RE   = re.compile(r"http\S+|www\S+|https\S+", flags=re.MULTILINE)
+_NOISE_RE = re.compile(r"@\w+|#\w+|\d+|[^\x00-\x7F]+")
+_PUNCT    = str.maketrans("", "", string.punctuation)
+
+
+def clean_texts(texts: pd.Series) -> pd.Series:
+    """
+    Versi batch dari clean_text untuk satu Series komentar.
+    Hasil identik byte-per-byte dengan texts.apply(clean_text), tetapi hanya
+    butuh dua pass regex per komentar (lihat benchmark.py clean-text).
+    """
+    url_sub, noise_sub, punct = _URL_RE.sub, _NOISE_RE.sub, _PUNCT
+    cleaned = [
+        " ".join(noise_sub(" ", url_sub(" ", str(t).lower())).translate(punct).split())
+        for t in texts
+    ]
+    return pd.Series(cleaned, index=texts.index)
@@ -6,7 +6,9 @@ matplotlib.use("Agg")  # WAJIB sebelum import pyplot — aman di server tanpa di
 
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import pandas as pd
+
+import rollup
+import storage
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 
@@ -20,8 +22,6 @@ logger = logging.getLogger(__name__)
 
 BASE_DIR   = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
-DATA_DIR   = BASE_DIR / "data"
-HASIL_CSV  = DATA_DIR / "hasil.csv"
 OUTPUT     = STATIC_DIR / "trend.png"
 
 SENTIMENT_ORDER  = ["positif", "netral", "negatif"]
@@ -59,44 +59,22 @@ def run_trend() -> bool:
     """
 
     # 1. Validasi file
-    if not HASIL_CSV.exists():
-        logger.error("File tidak ditemukan: %s", HASIL_CSV)
+    if not storage.exists():
+        logger.error("File tidak ditemukan: %s", storage.HASIL_PARQUET)
         return False
 
-    # 2. Baca & validasi kolom
+    # 2-4. Jumlah per (tanggal, sentimen) dari agregat harian — hanya data
+    #      berlabel dengan tanggal valid, tanpa membaca baris komentar
     try:
-        df = pd.read_csv(HASIL_CSV)
+        trend = rollup.daily_counts().reindex(columns=SENTIMENT_ORDER, fill_value=0)
     except Exception as exc:
-        logger.error("Gagal membaca CSV: %s", exc)
-        return False
-
-    missing = {"tanggal", "sentimen"} - set(df.columns)
-    if missing:
-        logger.error("Kolom wajib tidak ditemukan: %s", missing)
+        logger.error("Gagal membaca data: %s", exc)
         return False
 
-    # 3. Normalisasi & filter hanya data berlabel valid
-    df["sentimen"] = df["sentimen"].str.lower().str.strip()
-    df["tanggal"]  = pd.to_datetime(df["tanggal"], errors="coerce")
-
-    df = df[
-        df["tanggal"].notna() &
-        df["sentimen"].isin(SENTIMENT_ORDER)
-    ]
-
-    if df.empty:
+    if trend.empty or not trend.to_numpy().any():
         logger.warning("Tidak ada data berlabel dengan tanggal valid untuk dibuat tren.")
         return False
 
-    # 4. Hitung jumlah per (tanggal, sentimen)
-    trend = (
-        df.groupby(["tanggal", "sentimen"])
-        .size()
-        .unstack(fill_value=0)
-        .reindex(columns=SENTIMENT_ORDER, fill_value=0)
-        .sort_index()
-    )
-
     # 5. Hitung total per hari (untuk anotasi)
     daily_total = trend.sum(axis=1)
 
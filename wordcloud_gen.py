@@ -8,7 +8,7 @@ matplotlib.use("Agg")  # WAJIB sebelum import pyplot — aman di server tanpa di
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 
-import pandas as pd
+import storage
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 
@@ -22,8 +22,6 @@ logger = logging.getLogger(__name__)
 
 BASE_DIR   = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
-DATA_DIR   = BASE_DIR / "data"
-HASIL_CSV  = DATA_DIR / "hasil.csv"
 OUTPUT     = STATIC_DIR / "wordcloud.png"
 
 VALID_SENTIMEN = {"positif", "netral", "negatif"}
@@ -57,19 +55,16 @@ def run_wordcloud(sentimen_filter: str | None = None) -> bool:
     """
 
     # 1. Validasi file
-    if not HASIL_CSV.exists():
-        logger.error("File tidak ditemukan: %s", HASIL_CSV)
+    if not storage.exists():
+        logger.error("File tidak ditemukan: %s", storage.HASIL_PARQUET)
         return False
 
-    # 2. Baca & validasi kolom
+    # 2. Baca hanya kolom yang dibutuhkan
+    columns = ["komentar", "sentimen"] if sentimen_filter else ["komentar"]
     try:
-        df = pd.read_csv(HASIL_CSV)
+        df = storage.load(columns)
     except Exception as exc:
-        logger.error("Gagal membaca CSV: %s", exc)
-        return False
-
-    if "komentar" not in df.columns:
-        logger.error("Kolom 'komentar' tidak ditemukan di CSV.")
+        logger.error("Gagal membaca data: %s", exc)
         return False
 
     # 3. Filter per sentimen jika diminta
@@ -82,11 +77,6 @@ def run_wordcloud(sentimen_filter: str | None = None) -> bool:
             )
             return False
 
-        if "sentimen" not in df.columns:
-            logger.error("Kolom 'sentimen' tidak ditemukan, tidak bisa filter.")
-            return False
-
-        df["sentimen"] = df["sentimen"].str.lower().str.strip()
         df = df[df["sentimen"] == sentimen_filter]
         logger.info("Filter aktif: sentimen = '%s' (%d baris)", sentimen_filter, len(df))
 